@@ -22,6 +22,11 @@ setup(name='vr900-connector',
           "requests>=2.20.0,<3.0.0",
           "jsonpickle>=1.0,<2.0"
       ],
+      extras_require={
+          "async": ["aiohttp>=3.5.4,<4.0.0"],
+          "numpy": ["numpy>=1.15.0"],
+          "fastjson": ["orjson>=2.0.0; python_version>='3.6'", "ujson>=1.35; python_version<'3.6'"]
+      },
       entry_points={
           'console_scripts': [
               'vaillant=vaillant.__main__:main',
@@ -1,11 +1,14 @@
+import io
 import json
+import threading
+import time
 import unittest
 from unittest.mock import Mock
 
 import responses
 
 from tests.testutil import TestUtil
-from vr900connector.api import Urls, ApiError, ApiConnector
+from vr900connector.api import Urls, ApiError, ApiConnector, ResponseCache, MemorySessionStore
 
 
 class ApiConnectorTest(unittest.TestCase):
@@ -161,6 +164,53 @@ class ApiConnectorTest(unittest.TestCase):
         result = self.connector.get(Urls.rooms())
         self.assertEqual({"ok": "ok"}, result)
 
+    @responses.activate
+    def test_query_output(self):
+        serial = TestUtil.mock_full_auth_success()
+        self.connector = ApiConnector('user', 'pass', 'vr900-connector', TestUtil.temp_path(), ResponseCache())
+
+        with open(TestUtil.path('files/responses/livereport'), 'rb') as file:
+            raw = file.read()
+        url = Urls.live_report().format(serial_number=serial)
+        responses.add(responses.GET, url, body=raw, status=200)
+        responses.add(responses.GET, url, body=raw, status=200)
+
+        output = io.BytesIO()
+        written = self.connector.query(Urls.live_report(), output=output)
+        self.connector.query(Urls.live_report(), output=io.BytesIO())
+
+        self.assertEqual(raw, output.getvalue())
+        self.assertEqual(len(raw), written)
+        self.assertEqual(2, len([call for call in responses.calls if call.request.url == url]))
+        self.assertTrue(responses.calls[-1].response.raw.closed)
+
+    @responses.activate
+    def test_query_output_re_login(self):
+        serial = TestUtil.mock_full_auth_success()
+        url = Urls.live_report().format(serial_number=serial)
+        responses.add(responses.GET, url, status=401)
+        responses.add(responses.GET, url, body=b'{"body": {}}', status=200)
+
+        output = io.BytesIO()
+        self.connector.query(Urls.live_report(), output=output)
+
+        self.assertEqual(b'{"body": {}}', output.getvalue())
+
+    @responses.activate
+    def test_query_output_error(self):
+        serial = TestUtil.mock_full_auth_success()
+        url = Urls.live_report().format(serial_number=serial)
+        responses.add(responses.GET, url, body=b'{"errorCode": "FORBIDDEN"}', status=403)
+
+        output = io.BytesIO()
+        with self.assertRaises(ApiError) as context:
+            self.connector.query(Urls.live_report(), output=output)
+
+        self.assertEqual(b'', output.getvalue())
+        self.assertEqual(403, context.exception.response.status_code)
+        self.assertTrue(responses.calls[-1].response.raw.closed)
+        self.assertEqual(b'{"errorCode": "FORBIDDEN"}', context.exception.response.content)
+
     @responses.activate
     def test_call_error(self):
         serial = TestUtil.mock_full_auth_success()
@@ -245,6 +295,376 @@ class ApiConnectorTest(unittest.TestCase):
         self.assertEqual(Urls.facilities_list(), responses.calls[0].request.url)
         self.assertEqual(Urls.facilities_list(), responses.calls[1].request.url)
 
+    @responses.activate
+    def test_cache(self):
+        serial = TestUtil.mock_full_auth_success()
+        cache = ResponseCache()
+        self.connector = ApiConnector('user', 'pass', 'vr900-connector', TestUtil.temp_path(), cache)
+
+        url = Urls.live_report().format(serial_number=serial)
+        responses.add(responses.GET, url, json={'body': 'live_report'}, status=200)
+
+        first = self.connector.get(Urls.live_report())
+        second = self.connector.get(Urls.live_report())
+
+        self.assertEqual(first, second)
+        self.assertEqual(1, len([call for call in responses.calls if call.request.url == url]))
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(1, cache.misses)
+
+    @responses.activate
+    def test_cache_invalidated_on_write(self):
+        serial = TestUtil.mock_full_auth_success()
+        self.connector = ApiConnector('user', 'pass', 'vr900-connector', TestUtil.temp_path(), ResponseCache())
+
+        system_url = Urls.system().format(serial_number=serial)
+        responses.add(responses.GET, system_url, json={'body': 'system'}, status=200)
+        responses.add(responses.PUT, Urls.zone_heating_mode('zone').format(serial_number=serial), status=200)
+
+        self.connector.get(Urls.system())
+        self.connector.put(Urls.zone_heating_mode('zone'), {'mode': 'AUTO'})
+        self.connector.get(Urls.system())
+
+        self.assertEqual(2, len([call for call in responses.calls if call.request.url == system_url]))
+
+    @responses.activate
+    def test_cache_ignores_get_in_flight_during_write(self):
+        serial = TestUtil.mock_full_auth_success()
+        self.connector = ApiConnector('user', 'pass', 'vr900-connector', TestUtil.temp_path(),
+                                      ResponseCache(default_ttl=60))
+        self.connector.get(Urls.facilities_list())
+
+        url = Urls.zone('z1').format(serial_number=serial)
+        values = ['old', 'new']
+        sent = threading.Event()
+        written = threading.Event()
+
+        def callback(request):
+            value = values.pop(0)
+            sent.set()
+            written.wait(5)
+            return 200, {}, json.dumps({'body': value})
+
+        responses.add_callback(responses.GET, url, callback=callback)
+        setpoint_url = Urls.zone_heating_setpoint_temperature('z1')
+        responses.add(responses.PUT, setpoint_url.format(serial_number=serial), status=200)
+
+        results = []
+        thread = threading.Thread(target=lambda: results.append(self.connector.get(Urls.zone('z1'))))
+        thread.start()
+        sent.wait(5)
+        self.connector.put(setpoint_url, {'setpoint': 21})
+        written.set()
+        thread.join()
+
+        self.assertEqual([{'body': 'old'}], results)
+        self.assertEqual({'body': 'new'}, self.connector.get(Urls.zone('z1')))
+        self.assertEqual({'body': 'new'}, self.connector.get(Urls.zone('z1')))
+        self.assertEqual(2, len([call for call in responses.calls if call.request.url == url]))
+
+    @responses.activate
+    def test_get_after_write_not_coalesced_with_get_before(self):
+        serial = TestUtil.mock_full_auth_success()
+        self.connector.get(Urls.facilities_list())
+
+        url = Urls.zone('z1').format(serial_number=serial)
+        values = ['old', 'new']
+        sent = threading.Event()
+        released = threading.Event()
+
+        def callback(request):
+            value = values.pop(0)
+            if value == 'old':
+                sent.set()
+                released.wait(5)
+            return 200, {}, json.dumps({'body': value})
+
+        responses.add_callback(responses.GET, url, callback=callback)
+        setpoint_url = Urls.zone_heating_setpoint_temperature('z1')
+        responses.add(responses.PUT, setpoint_url.format(serial_number=serial), status=200)
+
+        results = []
+        thread = threading.Thread(target=lambda: results.append(self.connector.get(Urls.zone('z1'))))
+        thread.start()
+        sent.wait(5)
+        self.connector.put(setpoint_url, {'setpoint': 21})
+        after_write = self.connector.get(Urls.zone('z1'))
+        released.set()
+        thread.join()
+
+        self.assertEqual({'body': 'new'}, after_write)
+        self.assertEqual([{'body': 'old'}], results)
+        self.assertEqual(2, len([call for call in responses.calls if call.request.url == url]))
+
+    @responses.activate
+    def test_shared_store_one_login_per_expiry(self):
+        TestUtil.mock_token_success()
+        serial = TestUtil.mock_serial_success('facilities')
+        latest_cookie = ['value0']
+
+        def authenticate(request):
+            latest_cookie[0] = 'value' + str(len(logins()) + 1)
+            return 200, {'Set-Cookie': 'test=' + latest_cookie[0] + '; path=/; Secure; HttpOnly'}, ''
+
+        def system(request):
+            if request.headers.get('Cookie') == 'test={}'.format(latest_cookie[0]):
+                return 200, {}, json.dumps({'body': 'system'})
+            return 401, {}, ''
+
+        def logins():
+            return [call for call in responses.calls if call.request.url == Urls.authenticate()]
+
+        responses.add_callback(responses.POST, Urls.authenticate(), callback=authenticate)
+        responses.add_callback(responses.GET, Urls.system().format(serial_number=serial), callback=system)
+
+        store = MemorySessionStore()
+        connectors = [ApiConnector('user', 'pass', session_store=store) for _ in range(5)]
+        for connector in connectors:
+            connector.get(Urls.system())
+        self.assertEqual(1, len(logins()))
+
+        # session expired on the server
+        latest_cookie[0] = None
+        for _ in range(3):
+            for connector in connectors:
+                self.assertEqual({'body': 'system'}, connector.get(Urls.system()))
+
+        self.assertEqual(2, len(logins()))
+
+    @responses.activate
+    def test_concurrent_identical_get_coalesced(self):
+        serial = TestUtil.mock_full_auth_success()
+        self.connector.get(Urls.facilities_list())
+
+        url = Urls.system().format(serial_number=serial)
+
+        def callback(request):
+            time.sleep(0.2)
+            return 200, {}, json.dumps({'body': 'system'})
+
+        responses.add_callback(responses.GET, url, callback=callback)
+
+        results = []
+        barrier = threading.Barrier(5)
+
+        def call():
+            barrier.wait()
+            results.append(self.connector.get(Urls.system()))
+
+        threads = [threading.Thread(target=call) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(5, len(results))
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(1, len([call for call in responses.calls if call.request.url == url]))
+
+    @responses.activate
+    def test_concurrent_identical_get_error_shared(self):
+        serial = TestUtil.mock_full_auth_success()
+        self.connector.get(Urls.facilities_list())
+
+        url = Urls.system().format(serial_number=serial)
+
+        def callback(request):
+            time.sleep(0.2)
+            return 500, {}, ''
+
+        responses.add_callback(responses.GET, url, callback=callback)
+
+        errors = []
+        barrier = threading.Barrier(3)
+
+        def call():
+            barrier.wait()
+            try:
+                self.connector.get(Urls.system())
+            except ApiError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(3, len(errors))
+        self.assertEqual(1, len([call for call in responses.calls if call.request.url == url]))
+
+    @responses.activate
+    def test_concurrent_re_login_once(self):
+        serial = TestUtil.mock_full_auth_success()
+        self.connector.get(Urls.facilities_list())
+
+        zone_url = Urls.zone('zone').format(serial_number=serial)
+        hvac_url = Urls.hvac().format(serial_number=serial)
+        calls = []
+        calls_lock = threading.Lock()
+
+        def callback(request):
+            with calls_lock:
+                calls.append(request.url)
+                expired = len(calls) <= 2
+            time.sleep(0.2)
+            return (401, {}, '') if expired else (200, {}, json.dumps({'body': 'ok'}))
+
+        responses.add_callback(responses.GET, zone_url, callback=callback)
+        responses.add_callback(responses.GET, hvac_url, callback=callback)
+
+        results = []
+        barrier = threading.Barrier(2)
+
+        def call(url):
+            barrier.wait()
+            results.append(self.connector.get(url))
+
+        threads = [threading.Thread(target=call, args=(url,)) for url in [Urls.zone('zone'), Urls.hvac()]]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([{'body': 'ok'}, {'body': 'ok'}], results)
+        self.assertEqual(4, len(calls))
+        self.assertEqual(2, len([call for call in responses.calls if call.request.url == Urls.new_token()]))
+        self.assertEqual(2, len([call for call in responses.calls if call.request.url == Urls.authenticate()]))
+
+    @responses.activate
+    def test_re_login_keeps_session(self):
+        serial = TestUtil.mock_full_auth_success()
+        self.connector.get(Urls.facilities_list())
+        session = self.connector._session
+
+        url = Urls.zone('zone').format(serial_number=serial)
+        responses.add(responses.GET, url, status=401)
+        responses.add(responses.GET, url, json={'body': 'ok'}, status=200)
+
+        self.assertEqual({'body': 'ok'}, self.connector.get(Urls.zone('zone')))
+        self.assertIs(session, self.connector._session)
+
+    @responses.activate
+    def test_get_retried_on_service_unavailable(self):
+        serial = TestUtil.mock_full_auth_success()
+
+        url = Urls.system().format(serial_number=serial)
+        responses.add(responses.GET, url, status=503)
+        responses.add(responses.GET, url, json={'body': 'ok'}, status=200)
+
+        self.assertEqual({'body': 'ok'}, self.connector.get(Urls.system()))
+        self.assertEqual(2, len([call for call in responses.calls if call.request.url == url]))
+
+    @responses.activate
+    def test_put_not_retried_on_service_unavailable(self):
+        serial = TestUtil.mock_full_auth_success()
+
+        url = Urls.zone_heating_mode('zone').format(serial_number=serial)
+        responses.add(responses.PUT, url, status=503)
+        responses.add(responses.PUT, url, status=200)
+
+        try:
+            self.connector.put(Urls.zone_heating_mode('zone'), {'mode': 'AUTO'})
+            self.fail('Error expected')
+        except ApiError as e:
+            self.assertEqual(503, e.response.status_code)
+            self.assertEqual(1, len([call for call in responses.calls if call.request.url == url]))
+
+    @responses.activate
+    def test_get_retries_exhausted(self):
+        serial = TestUtil.mock_full_auth_success()
+        self.connector = ApiConnector('user', 'pass', 'vr900-connector', TestUtil.temp_path(), max_retries=2)
+
+        url = Urls.system().format(serial_number=serial)
+        responses.add(responses.GET, url, status=502)
+
+        try:
+            self.connector.get(Urls.system())
+            self.fail('Error expected')
+        except ApiError as e:
+            self.assertEqual(502, e.response.status_code)
+            self.assertEqual(3, len([call for call in responses.calls if call.request.url == url]))
+
+    def test_http_adapter(self):
+        self.connector = ApiConnector('user', 'pass', 'vr900-connector', TestUtil.temp_path(), pool_maxsize=42,
+                                      max_retries=5, backoff_factor=1)
+
+        adapter = self.connector._session.get_adapter(Urls.system())
+        self.assertEqual(42, adapter._pool_maxsize)
+        self.assertEqual(5, adapter.max_retries.total)
+        self.assertEqual(1, adapter.max_retries.backoff_factor)
+
+    def test_shared_http_adapter(self):
+        adapter = ApiConnector.create_http_adapter(pool_maxsize=3)
+        first = ApiConnector('user1', 'pass', 'vr900-connector', TestUtil.temp_path(), http_adapter=adapter)
+        second = ApiConnector('user2', 'pass', 'vr900-connector', TestUtil.temp_path(), http_adapter=adapter)
+
+        self.assertIs(adapter, first._session.get_adapter(Urls.system()))
+        self.assertIs(adapter, second._session.get_adapter(Urls.system()))
+        self.assertIsNot(first._session.cookies, second._session.cookies)
+        self.assertEqual(3, adapter._pool_maxsize)
+
+    @responses.activate
+    def test_http_adapter_kept_on_re_login(self):
+        TestUtil.mock_full_auth_success()
+        adapter = self.connector._session.get_adapter(Urls.system())
+
+        self.connector.refresh_session()
+
+        self.assertIs(adapter, self.connector._session.get_adapter(Urls.system()))
+
+    @responses.activate
+    def test_facilities_enumerated_once(self):
+        TestUtil.mock_full_auth_success('facilities_multiple')
+
+        facilities = self.connector.facilities()
+        self.connector.facilities()
+
+        self.assertEqual(TestUtil.serial_numbers('facilities_multiple'),
+                         [facility['serialNumber'] for facility in facilities])
+        self.assertEqual(1, len([call for call in responses.calls if call.request.url == Urls.facilities_list()]))
+        self.assertEqual(facilities, self.connector._session_store.get_facilities())
+
+    @responses.activate
+    def test_get_other_facility(self):
+        default, other = TestUtil.serial_numbers('facilities_multiple')
+        TestUtil.mock_full_auth_success('facilities_multiple')
+        responses.add(responses.GET, Urls.system().format(serial_number=default), json={'body': 'default'})
+        responses.add(responses.GET, Urls.system().format(serial_number=other), json={'body': 'other'})
+
+        self.assertEqual({'body': 'default'}, self.connector.get(Urls.system()))
+        self.assertEqual({'body': 'other'}, self.connector.get(Urls.system(), serial_number=other))
+        self.assertEqual(1, len([call for call in responses.calls if call.request.url == Urls.new_token()]))
+
+    @responses.activate
+    def test_concurrent_get_of_other_facilities_not_coalesced(self):
+        serial_numbers = TestUtil.serial_numbers('facilities_multiple')
+        TestUtil.mock_full_auth_success('facilities_multiple')
+        self.connector.get(Urls.facilities_list())
+
+        def callback(request):
+            time.sleep(0.2)
+            return 200, {}, json.dumps({'body': request.url})
+
+        for serial_number in serial_numbers:
+            responses.add_callback(responses.GET, Urls.system().format(serial_number=serial_number), callback=callback)
+
+        results = dict()
+        barrier = threading.Barrier(len(serial_numbers))
+
+        def call(serial_number):
+            barrier.wait()
+            results[serial_number] = self.connector.get(Urls.system(), serial_number=serial_number)
+
+        threads = [threading.Thread(target=call, args=(serial_number,)) for serial_number in serial_numbers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for serial_number in serial_numbers:
+            self.assertEqual(Urls.system().format(serial_number=serial_number), results[serial_number]['body'])
+
 
 if __name__ == '__main__':
     unittest.main()
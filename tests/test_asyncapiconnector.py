@@ -0,0 +1,220 @@
+import asyncio
+import json
+import time
+import unittest
+
+from aioresponses import aioresponses, CallbackResult
+
+from tests.testutil import TestUtil
+from vr900connector.api import Urls, ApiError, ApiConnector, MemorySessionStore
+from vr900connector.api.asyncapiconnector import AsyncApiConnector
+
+
+class AsyncApiConnectorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.connector = AsyncApiConnector('user', 'pass', 'vr900-connector', TestUtil.temp_path())
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.connector.close())
+        self.loop.close()
+
+    def test_login(self):
+        with aioresponses() as mocked:
+            serial = TestUtil.mock_full_auth_success_async(mocked)
+
+            result = self._run(self.connector.get(Urls.facilities_list()))
+
+            self.assertEqual(serial, result['body']['facilitiesList'][0]['serialNumber'])
+            self.assertEqual(3, len(mocked.requests))
+            self.assertEqual(2, len(self._calls(mocked, 'GET', Urls.facilities_list())))
+
+    def test_login_once(self):
+        with aioresponses() as mocked:
+            TestUtil.mock_full_auth_success_async(mocked)
+
+            self._run(self.connector.get(Urls.facilities_list()))
+            self._run(self.connector.get(Urls.facilities_list()))
+
+            self.assertEqual(1, len(self._calls(mocked, 'POST', Urls.new_token())))
+            self.assertEqual(1, len(self._calls(mocked, 'POST', Urls.authenticate())))
+            self.assertEqual(3, len(self._calls(mocked, 'GET', Urls.facilities_list())))
+
+    def test_concurrent_calls_login_once(self):
+        with aioresponses() as mocked:
+            serial = TestUtil.mock_full_auth_success_async(mocked)
+            mocked.get(Urls.hvac().format(serial_number=serial), payload={}, repeat=True)
+
+            async def calls():
+                return await asyncio.gather(*[self.connector.get(Urls.hvac()) for _ in range(5)])
+
+            self._run(calls())
+
+            self.assertEqual(1, len(self._calls(mocked, 'POST', Urls.new_token())))
+            self.assertEqual(5, len(self._calls(mocked, 'GET', Urls.hvac().format(serial_number=serial))))
+
+    def test_re_login_uses_session_of_shared_store(self):
+        store = MemorySessionStore()
+        self.connector = AsyncApiConnector('user', 'pass', session_store=store)
+        with aioresponses() as mocked:
+            serial = TestUtil.mock_full_auth_success_async(mocked)
+            hvac_url = Urls.hvac().format(serial_number=serial)
+            mocked.get(hvac_url, payload={})
+            mocked.get(hvac_url, status=401)
+            mocked.get(hvac_url, payload={'body': 'hvac'})
+            self._run(self.connector.get(Urls.hvac()))
+
+            # another connector sharing the store logged in again
+            store.set_cookies([{'name': 'test', 'value': 'renewed', 'domain': '', 'path': '/', 'expires': None,
+                                'secure': True}])
+            result = self._run(self.connector.get(Urls.hvac()))
+
+            self.assertEqual({'body': 'hvac'}, result)
+            self.assertEqual(1, len(self._calls(mocked, 'POST', Urls.new_token())))
+            self.assertEqual(['renewed'], [cookie.value for cookie in self.connector._session.cookie_jar])
+
+    def test_session_shared_with_expiry(self):
+        store = MemorySessionStore()
+        self.connector = AsyncApiConnector('user', 'pass', session_store=store)
+        with aioresponses() as mocked:
+            TestUtil.mock_token_success_async(mocked)
+            mocked.post(Urls.authenticate(), headers={'Set-Cookie': 'test=value; path=/; Max-Age=3600; Secure'})
+            with open(TestUtil.path('files/responses/facilities'), 'r') as file:
+                mocked.get(Urls.facilities_list(), payload=json.loads(file.read()), repeat=True)
+            before = time.time()
+
+            self._run(self.connector.facilities())
+
+        expiry = ApiConnector('user', 'pass', session_store=store).session_expiry
+        self.assertGreaterEqual(expiry, int(before) + 3600)
+        self.assertLessEqual(expiry, time.time() + 3600)
+
+    def test_re_login(self):
+        with aioresponses() as mocked:
+            serial = TestUtil.mock_full_auth_success_async(mocked)
+            repeaters_url = Urls.repeaters().format(serial_number=serial)
+            mocked.get(repeaters_url, status=401, repeat=True)
+
+            try:
+                self._run(self.connector.get(Urls.repeaters()))
+                self.fail('Error expected')
+            except ApiError as e:
+                self.assertEqual(401, e.response.status)
+                self.assertEqual(2, len(self._calls(mocked, 'POST', Urls.new_token())))
+                self.assertEqual(2, len(self._calls(mocked, 'GET', repeaters_url)))
+
+    def test_concurrent_401_re_login_once(self):
+        with aioresponses() as mocked:
+            serial = TestUtil.mock_full_auth_success_async(mocked)
+            self._run(self.connector.get(Urls.facilities_list()))
+            hvac_url = Urls.hvac().format(serial_number=serial)
+            calls_count = []
+
+            async def callback(url, **kwargs):
+                # The session expires while the first 3 calls are in flight
+                calls_count.append(url)
+                if len(calls_count) > 3:
+                    return CallbackResult(payload={'body': 'hvac'})
+                while len(calls_count) < 3:
+                    await asyncio.sleep(0)
+                return CallbackResult(status=401)
+
+            mocked.get(hvac_url, callback=callback, repeat=True)
+
+            async def calls():
+                return await asyncio.gather(*[self.connector.get(Urls.hvac()) for _ in range(3)])
+
+            results = self._run(calls())
+
+            self.assertEqual([{'body': 'hvac'}] * 3, results)
+            self.assertEqual(2, len(self._calls(mocked, 'POST', Urls.new_token())))
+            self.assertEqual(6, len(self._calls(mocked, 'GET', hvac_url)))
+
+    def test_login_wrong_authentication(self):
+        with open(TestUtil.path('files/responses/wrong_token'), 'r') as file:
+            token_data = json.loads(file.read())
+
+        with aioresponses() as mocked:
+            mocked.post(Urls.new_token(), payload=token_data, status=401)
+
+            try:
+                self._run(self.connector.get(Urls.facilities_list()))
+                self.fail("Error expected")
+            except ApiError as e:
+                self.assertEqual("Authentication failed", e.message)
+
+    def test_cookie_failed(self):
+        with aioresponses() as mocked:
+            TestUtil.mock_token_success_async(mocked)
+            mocked.post(Urls.authenticate(), status=401)
+
+            try:
+                self._run(self.connector.get(Urls.facilities_list()))
+                self.fail("Error expected")
+            except ApiError as e:
+                self.assertEqual("Cannot get cookies", e.message)
+
+    def test_put(self):
+        with aioresponses() as mocked:
+            serial = TestUtil.mock_full_auth_success_async(mocked)
+            url = Urls.rooms().format(serial_number=serial)
+            mocked.put(url, status=200)
+
+            result = self._run(self.connector.put(Urls.rooms(), {'test': 'value'}))
+
+            self.assertEqual({"ok": "ok"}, result)
+            self.assertEqual({'test': 'value'}, json.loads(self._calls(mocked, 'PUT', url)[0].kwargs['data']))
+
+    def test_call_error(self):
+        with aioresponses() as mocked:
+            serial = TestUtil.mock_full_auth_success_async(mocked)
+            mocked.get(Urls.rooms().format(serial_number=serial), status=500)
+
+            try:
+                self._run(self.connector.get(Urls.rooms()))
+                self.fail("Error expected")
+            except ApiError as e:
+                self.assertEqual(500, e.response.status)
+
+    def test_get_other_facility(self):
+        default, other = TestUtil.serial_numbers('facilities_multiple')
+        with aioresponses() as mocked:
+            TestUtil.mock_full_auth_success_async(mocked, 'facilities_multiple')
+            mocked.get(Urls.rooms().format(serial_number=other), payload={'body': 'other'})
+
+            facilities = self._run(self.connector.facilities())
+            result = self._run(self.connector.get(Urls.rooms(), serial_number=other))
+
+            self.assertEqual([default, other], [facility['serialNumber'] for facility in facilities])
+            self.assertEqual({'body': 'other'}, result)
+            self.assertEqual(1, len(self._calls(mocked, 'GET', Urls.facilities_list())))
+
+    def test_session_shared_with_files(self):
+        path = TestUtil.temp_path()
+        self.connector = AsyncApiConnector('user', 'pass', 'vr900-connector', path)
+
+        with aioresponses() as mocked:
+            TestUtil.mock_full_auth_success_async(mocked)
+            self._run(self.connector.get(Urls.facilities_list()))
+
+        other = AsyncApiConnector('user', 'pass', 'vr900-connector', path)
+        with aioresponses() as mocked:
+            mocked.get(Urls.facilities_list(), payload={})
+            self._run(other.get(Urls.facilities_list()))
+            self._run(other.close())
+
+            self.assertEqual(1, len(mocked.requests))
+
+    def _run(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def _calls(self, mocked, method, url):
+        for key, calls in mocked.requests.items():
+            if key[0] == method and str(key[1]) == url:
+                return calls
+        return []
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import asyncio
+import json
+import unittest
+
+from aioresponses import aioresponses
+
+from tests.testutil import TestUtil
+from vr900connector.api import Urls, Payloads
+from vr900connector.asyncsystemmanager import AsyncSystemManager
+from vr900connector.model import HeatingMode, Mapper, Zone
+
+
+class AsyncSystemManagerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.manager = AsyncSystemManager('user', 'pass', 'vr900-connector', TestUtil.temp_path())
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.manager.close())
+        self.loop.close()
+
+    def test_system(self):
+        with open(TestUtil.path('files/responses/livereport'), 'r') as file:
+            livereport_data = json.loads(file.read())
+
+        with open(TestUtil.path('files/responses/rooms'), 'r') as file:
+            rooms_data = json.loads(file.read())
+
+        with open(TestUtil.path('files/responses/systemcontrol'), 'r') as file:
+            system_data = json.loads(file.read())
+
+        with open(TestUtil.path('files/responses/hvacstate'), 'r') as file:
+            hvacstate_data = json.loads(file.read())
+
+        with aioresponses() as mocked:
+            serial = TestUtil.mock_full_auth_success_async(mocked)
+            mocked.get(Urls.live_report().format(serial_number=serial), payload=livereport_data)
+            mocked.get(Urls.rooms().format(serial_number=serial), payload=rooms_data)
+            mocked.get(Urls.system().format(serial_number=serial), payload=system_data)
+            mocked.get(Urls.hvac().format(serial_number=serial), payload=hvacstate_data)
+
+            system = self.loop.run_until_complete(self.manager.get_system())
+
+        expected = Mapper.system(system_data, livereport_data, hvacstate_data, rooms_data)
+        self.assertEqual(2, len(system.zones))
+        self.assertEqual(4, len(system.rooms))
+        self.assertEqual(expected.boiler_status.code, system.boiler_status.code)
+        self.assertEqual(expected.hot_water.current_temperature, system.hot_water.current_temperature)
+        self.assertEqual(expected.outdoor_temperature, system.outdoor_temperature)
+
+    def test_set_zone_operation_mode(self):
+        zone = Zone('id', None, None, None, None, None, None, None, None, None)
+
+        with aioresponses() as mocked:
+            serial = TestUtil.mock_full_auth_success_async(mocked)
+            url = Urls.zone_heating_mode(zone.id).format(serial_number=serial)
+            mocked.put(url, status=200)
+
+            self.assertTrue(self.loop.run_until_complete(self.manager.set_zone_operation_mode(zone,
+                                                                                              HeatingMode.AUTO)))
+            calls = [calls for key, calls in mocked.requests.items() if str(key[1]) == url][0]
+            self.assertEqual(Payloads.zone_operation_mode('AUTO'), json.loads(calls[0].kwargs['data']))
+
+    def test_get_systems_and_write_to_other_facility(self):
+        default, other = TestUtil.serial_numbers('facilities_multiple')
+        with open(TestUtil.path('files/responses/systemcontrol'), 'r') as file:
+            system_data = json.loads(file.read())
+
+        with aioresponses() as mocked:
+            TestUtil.mock_full_auth_success_async(mocked, 'facilities_multiple')
+            for serial in (default, other):
+                mocked.get(Urls.live_report().format(serial_number=serial), payload={})
+                mocked.get(Urls.rooms().format(serial_number=serial), payload={})
+                mocked.get(Urls.system().format(serial_number=serial), payload=system_data)
+                mocked.get(Urls.hvac().format(serial_number=serial), payload={})
+            systems = self.loop.run_until_complete(self.manager.get_systems())
+            zone = list(systems[other].zones)[0]
+            url = Urls.zone_heating_setpoint_temperature(zone.id).format(serial_number=other)
+            mocked.put(url, status=200)
+
+            self.assertTrue(self.loop.run_until_complete(
+                self.manager.set_zone_setpoint_temperature(zone, 21, serial_number=other)))
+
+            self.assertEqual([default, other], list(systems))
+            urls = [str(key[1]) for key in mocked.requests if key[0] == 'PUT']
+            self.assertEqual([url], urls)
+
+    def test_set_zone_operation_mode_wrong_mode(self):
+        zone = Zone('id', None, None, None, None, None, None, None, None, None)
+        self.assertFalse(self.loop.run_until_complete(self.manager.set_zone_operation_mode(zone, HeatingMode.ON)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import datetime
+import unittest
+
+from vr900connector.model import Events, Zone, HeatingMode, QuickVeto, BoilerStatus, SystemErrorMessage, \
+    TargetTemperatureChanged, OperationModeChanged, QuickVetoStarted, QuickVetoEnded, BoilerStatusCodeChanged, \
+    ErrorMessageAdded
+
+
+class EventsTest(unittest.TestCase):
+
+    def test_component_no_change(self):
+        old = Zone('zone', 'Zone', None, 20, 22, HeatingMode.AUTO, None, 18, 'HEATING', False)
+        new = Zone('zone', 'Zone', None, 21, 22, HeatingMode.AUTO, None, 18, 'HEATING', False)
+        self.assertEqual([], Events.component(old, new))
+
+    def test_component_target_temperature_and_mode(self):
+        old = Zone('zone', 'Zone', None, 20, 22, HeatingMode.AUTO, None, 18, 'HEATING', False)
+        new = Zone('zone', 'Zone', None, 20, 23, HeatingMode.DAY, None, 18, 'HEATING', False)
+
+        events = Events.component(old, new)
+
+        self.assertEqual(2, len(events))
+        self.assertIsInstance(events[0], TargetTemperatureChanged)
+        self.assertEqual('zone', events[0].component_id)
+        self.assertEqual(22, events[0].old_temperature)
+        self.assertEqual(23, events[0].new_temperature)
+        self.assertIsInstance(events[1], OperationModeChanged)
+        self.assertEqual(HeatingMode.DAY, events[1].new_mode)
+
+    def test_component_quick_veto(self):
+        without = Zone('zone', 'Zone', None, 20, 22, HeatingMode.AUTO, None, 18, 'HEATING', False)
+        quick_veto = QuickVeto(-1, 22)
+        with_quick_veto = Zone('zone', 'Zone', None, 20, 22, HeatingMode.AUTO, quick_veto, 18, 'HEATING', False)
+
+        started = Events.component(without, with_quick_veto)
+        ended = Events.component(with_quick_veto, without)
+
+        self.assertEqual(1, len(started))
+        self.assertIsInstance(started[0], QuickVetoStarted)
+        self.assertIs(quick_veto, started[0].quick_veto)
+        self.assertEqual(1, len(ended))
+        self.assertIsInstance(ended[0], QuickVetoEnded)
+
+    def test_component_new(self):
+        new = Zone('zone', 'Zone', None, 20, 22, HeatingMode.AUTO, None, 18, 'HEATING', False)
+        self.assertEqual([], Events.component(None, new))
+
+    def test_boiler_status_code(self):
+        old = BoilerStatus('boiler', 'desc', 'title', 'S.8', 'hint', None, 'ONLINE', '', 1.9, 40)
+        same_code = BoilerStatus('boiler', 'desc', 'title', 'S.8', 'hint', None, 'ONLINE', '', 1.8, 42)
+        new = BoilerStatus('boiler', 'desc', 'title', 'F.28', 'hint', None, 'ONLINE', '', 1.9, 40)
+
+        self.assertEqual([], Events.boiler_status(old, same_code))
+        events = Events.boiler_status(old, new)
+        self.assertEqual(1, len(events))
+        self.assertIsInstance(events[0], BoilerStatusCodeChanged)
+        self.assertEqual(BoilerStatusCodeChanged.COMPONENT_ID, events[0].component_id)
+        self.assertEqual('S.8', events[0].old_code)
+        self.assertEqual('F.28', events[0].new_code)
+
+    def test_errors(self):
+        timestamp = datetime.datetime(2019, 1, 2, 10, 0)
+        known = SystemErrorMessage('boiler', 'title', 'F.28', 'desc', timestamp)
+        same = SystemErrorMessage('boiler', 'title', 'F.28', 'desc', timestamp)
+        added = SystemErrorMessage('boiler', 'title', 'F.29', 'desc', timestamp)
+
+        events = Events.errors([known], [same, added])
+
+        self.assertEqual(1, len(events))
+        self.assertIsInstance(events[0], ErrorMessageAdded)
+        self.assertIs(added, events[0].error)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,191 @@
+import json
+import threading
+import time
+import unittest
+from unittest import mock
+
+import responses
+
+from tests.testutil import TestUtil
+from vr900connector.api import Urls, MemorySessionStore
+from vr900connector.fleetmanager import FleetManager
+from vr900connector.systemmanager import SystemManager
+
+
+class FleetManagerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.fleet = FleetManager(max_workers=2, file_path=TestUtil.temp_path())
+
+    def tearDown(self):
+        self.fleet.shutdown()
+
+    def test_shared_http_adapter(self):
+        first = self.fleet.add_account('a', 'user1', 'pass')
+        second = self.fleet.add_account('b', 'user2', 'pass')
+
+        first_adapter = first._connector._session.get_adapter(Urls.system())
+        self.assertIs(first_adapter, second._connector._session.get_adapter(Urls.system()))
+        self.assertEqual(2, first_adapter._pool_maxsize)
+        self.assertNotEqual(first._connector._session_store._file, second._connector._session_store._file)
+        self.assertEqual(['a', 'b'], self.fleet.accounts)
+
+    def test_add_account_twice(self):
+        self.fleet.add_account('a', 'user', 'pass')
+
+        with self.assertRaises(ValueError):
+            self.fleet.add_account('a', 'user', 'pass')
+
+    def test_fair_scheduling(self):
+        self.fleet = FleetManager(max_workers=1, file_path=TestUtil.temp_path())
+        self.fleet.add_account('a', 'user1', 'pass', session_store=MemorySessionStore())
+        self.fleet.add_account('b', 'user2', 'pass', session_store=MemorySessionStore())
+        started = threading.Event()
+        release = threading.Event()
+        order = []
+
+        def blocking(manager):
+            started.set()
+            release.wait(5)
+            order.append('a1')
+
+        def task(name):
+            return lambda manager: order.append(name)
+
+        futures = [self.fleet.submit('a', blocking)]
+        started.wait(5)
+        futures += [self.fleet.submit('a', task('a2')), self.fleet.submit('a', task('a3')),
+                    self.fleet.submit('b', task('b1'))]
+        release.set()
+        for future in futures:
+            future.result(5)
+
+        self.assertEqual(['a1', 'b1', 'a2', 'a3'], order)
+
+    def test_one_task_per_account(self):
+        self.fleet = FleetManager(max_workers=4, file_path=TestUtil.temp_path())
+        self.fleet.add_account('a', 'user1', 'pass', session_store=MemorySessionStore())
+        self.fleet.add_account('b', 'user2', 'pass', session_store=MemorySessionStore())
+        lock = threading.Lock()
+        running = {'a': 0, 'b': 0}
+        max_running = {'a': 0, 'b': 0, 'total': 0}
+
+        def task(account_id):
+            def run(manager):
+                with lock:
+                    running[account_id] += 1
+                    max_running[account_id] = max(max_running[account_id], running[account_id])
+                    max_running['total'] = max(max_running['total'], sum(running.values()))
+                time.sleep(0.01)
+                with lock:
+                    running[account_id] -= 1
+            return run
+
+        futures = [self.fleet.submit(account_id, task(account_id)) for _ in range(5) for account_id in ('a', 'b')]
+        for future in futures:
+            future.result(5)
+
+        self.assertEqual(1, max_running['a'])
+        self.assertEqual(1, max_running['b'])
+        self.assertEqual(2, max_running['total'])
+
+    def test_submit_error(self):
+        self.fleet.add_account('a', 'user', 'pass', session_store=MemorySessionStore())
+
+        def failing(manager):
+            raise ValueError('test')
+
+        future = self.fleet.submit('a', failing)
+
+        self.assertIsInstance(future.exception(5), ValueError)
+        self.assertEqual('ok', self.fleet.submit('a', lambda manager: 'ok').result(5))
+
+    def test_remove_account(self):
+        self.fleet.add_account('a', 'user', 'pass', session_store=MemorySessionStore())
+
+        manager = self.fleet.manager('a')
+
+        with mock.patch.object(manager, 'close') as close:
+            self.fleet.remove_account('a')
+
+        close.assert_called_once_with()
+        self.assertEqual([], self.fleet.accounts)
+        with self.assertRaises(KeyError):
+            self.fleet.submit('a', lambda manager: None)
+
+    def test_remove_unknown_account(self):
+        self.fleet.add_account('a', 'user', 'pass', session_store=MemorySessionStore())
+
+        self.fleet.remove_account('b')
+
+        self.assertEqual(['a'], self.fleet.accounts)
+
+    def test_submit_after_shutdown(self):
+        self.fleet.add_account('a', 'user', 'pass', session_store=MemorySessionStore())
+        self.fleet.shutdown()
+
+        with self.assertRaises(RuntimeError):
+            self.fleet.submit('a', lambda manager: None)
+
+    @responses.activate
+    def test_map_get_system(self):
+        serial = TestUtil.mock_full_auth_success()
+        files = {'livereport': Urls.live_report(), 'rooms': Urls.rooms(), 'systemcontrol': Urls.system(),
+                 'hvacstate': Urls.hvac()}
+        for name, url in files.items():
+            with open(TestUtil.path('files/responses/' + name), 'r') as file:
+                responses.add(responses.GET, url.format(serial_number=serial), json=json.loads(file.read()))
+        self.fleet.add_account('a', 'user1', 'pass', session_store=MemorySessionStore())
+        self.fleet.add_account('b', 'user2', 'pass', session_store=MemorySessionStore())
+
+        futures = self.fleet.map(SystemManager.get_system)
+
+        self.assertEqual(['a', 'b'], list(futures))
+        for future in futures.values():
+            self.assertEqual(2, len(future.result(5).zones))
+
+    def test_polling(self):
+        self.fleet.add_account('a', 'user1', 'pass', session_store=MemorySessionStore())
+        self.fleet.add_account('b', 'user2', 'pass', session_store=MemorySessionStore())
+        polled = []
+        done = threading.Event()
+
+        def poll(manager):
+            polled.append(manager)
+            if len(polled) == 2:
+                done.set()
+            return []
+
+        def next_poll_delay(manager):
+            return 30 if manager in polled else 0
+
+        with mock.patch.object(SystemManager, 'poll', autospec=True, side_effect=poll), \
+                mock.patch.object(SystemManager, 'next_poll_delay', autospec=True, side_effect=next_poll_delay):
+            self.fleet.start_polling()
+            self.assertTrue(done.wait(5))
+            time.sleep(0.1)
+            self.fleet.stop_polling()
+
+        self.assertEqual(2, len(polled))
+        self.assertEqual({self.fleet.manager('a'), self.fleet.manager('b')}, set(polled))
+
+    def test_polling_error_retried_later(self):
+        self.fleet.add_account('a', 'user', 'pass', session_store=MemorySessionStore())
+        failed = threading.Event()
+
+        def poll(manager):
+            failed.set()
+            raise ValueError('test')
+
+        with mock.patch.object(SystemManager, 'poll', autospec=True, side_effect=poll) as mocked, \
+                mock.patch.object(SystemManager, 'next_poll_delay', return_value=0):
+            self.fleet.start_polling()
+            self.assertTrue(failed.wait(5))
+            time.sleep(0.1)
+            self.fleet.stop_polling()
+
+        self.assertEqual(1, mocked.call_count)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import subprocess
+import sys
+import unittest
+
+import vr900connector.model
+from tests.testutil import TestUtil
+
+
+class LazyImportTest(unittest.TestCase):
+
+    def test_dir_and_all(self):
+        self.assertIn('Mapper', dir(vr900connector.model))
+        self.assertIn('TimeProgram', vr900connector.model.__all__)
+        mapper = vr900connector.model.Mapper
+        self.assertIs(vr900connector.model.mapper.Mapper, mapper)
+
+    def test_unknown_attribute(self):
+        with self.assertRaises(AttributeError):
+            vr900connector.model.Unknown
+
+    def test_model_without_http_stack(self):
+        modules = self._modules_after("from vr900connector.model import TimeProgram")
+
+        self.assertIn('vr900connector.model.timeprogram', modules)
+        self.assertNotIn('vr900connector.model.mapper', modules)
+        self.assertNotIn('vr900connector.api', modules)
+        self.assertNotIn('requests', modules)
+
+    def test_eager_before_python_3_7(self):
+        modules = self._modules_after("sys.version_info = (3, 6, 9); import vr900connector.model, vr900connector.api; "
+                                      "assert '__getattr__' not in vars(vr900connector.model); "
+                                      "assert vr900connector.model.LazySystem and vr900connector.api.ApiConnector")
+
+        self.assertIn('vr900connector.model.lazysystem', modules)
+        self.assertIn('requests', modules)
+
+    def _modules_after(self, code):
+        process = subprocess.run([sys.executable, '-c', 'import sys; ' + code + '; print("\\n".join(sys.modules))'],
+                                 stdout=subprocess.PIPE, universal_newlines=True, cwd=TestUtil.path('..'),
+                                 check=True)
+        return process.stdout.splitlines()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import json
+import time
+import unittest
+from unittest.mock import patch
+
+from tests.testutil import TestUtil
+from vr900connector.model import LazySystem, Mapper, Zone, HeatingMode
+
+
+class LazySystemTest(unittest.TestCase):
+
+    def setUp(self):
+        self.responses = []
+        for name in ('systemcontrol', 'livereport', 'hvacstate', 'rooms'):
+            with open(TestUtil.path('files/responses/' + name), 'r') as file:
+                self.responses.append(json.loads(file.read()))
+
+    def test_same_as_system(self):
+        system = Mapper.system(*self.responses)
+        lazy = LazySystem(*self.responses)
+
+        self.assertEqual([zone.id for zone in system.zones], [zone.id for zone in lazy.zones])
+        self.assertEqual([room.id for room in system.rooms], [room.id for room in lazy.rooms])
+        self.assertEqual(system.get_zone('Control_ZO2').target_temperature,
+                         lazy.get_zone('Control_ZO2').target_temperature)
+        self.assertEqual(system.get_room(1).name, lazy.get_room('1').name)
+        self.assertEqual(system.outdoor_temperature, lazy.outdoor_temperature)
+        self.assertEqual(system.boiler_status.code, lazy.boiler_status.code)
+        self.assertEqual(system.hot_water.target_temperature, lazy.hot_water.target_temperature)
+        self.assertEqual(system.circulation.id, lazy.circulation.id)
+        self.assertEqual(system.quick_mode, lazy.quick_mode)
+        self.assertEqual(system.holiday_mode.active, lazy.holiday_mode.active)
+        self.assertEqual(len(system.errors), len(lazy.errors))
+        self.assertEqual(len(system.reports), len(lazy.reports))
+        self.assertEqual(system.get_active_mode_zone(system.get_zone('Control_ZO1')).current_mode,
+                         lazy.get_active_mode_zone(lazy.get_zone('Control_ZO1')).current_mode)
+
+    def test_map_on_first_access(self):
+        with patch.object(Mapper, 'zone', wraps=Mapper.zone) as zone, \
+                patch.object(Mapper, 'room', wraps=Mapper.room) as room, \
+                patch.object(Mapper, 'boiler_status', wraps=Mapper.boiler_status) as boiler_status:
+            lazy = LazySystem(*self.responses)
+            self.assertEqual(0, zone.call_count + room.call_count + boiler_status.call_count)
+
+            self.assertIs(lazy.boiler_status, lazy.boiler_status)
+            self.assertIs(lazy.get_zone('Control_ZO1'), lazy.get_zone('Control_ZO1'))
+            self.assertEqual(1, boiler_status.call_count)
+            self.assertEqual(1, zone.call_count)
+            self.assertEqual(0, room.call_count)
+
+            self.assertEqual(['Control_ZO1', 'Control_ZO2'], [zone.id for zone in lazy.zones])
+            self.assertEqual(2, zone.call_count)
+
+    def test_set_and_remove(self):
+        lazy = LazySystem(*self.responses)
+        zone = Zone('Control_ZO2', 'Zone', None, 20, 22, HeatingMode.AUTO, None, 18, 'HEATING', False)
+
+        lazy.set_zone('Control_ZO2', zone)
+        lazy.remove_room(0)
+        lazy.outdoor_temperature = 12
+
+        self.assertIs(zone, lazy.get_zone('Control_ZO2'))
+        self.assertEqual([1, 2, 3], [room.id for room in lazy.rooms])
+        self.assertEqual(12, lazy.outdoor_temperature)
+        with self.assertRaises(KeyError):
+            lazy.get_room(0)
+
+    def test_without_rooms(self):
+        lazy = LazySystem(self.responses[0], None, None, None)
+
+        self.assertEqual([], list(lazy.rooms))
+        self.assertEqual([], lazy.reports)
+        self.assertEqual(2, len(lazy.zones))
+
+    def test_few_values_benchmark(self):
+        """
+        Reading the outdoor temperature and the boiler status of a lazy system is more than 10 times cheaper than
+        mapping the full system
+        """
+        start = time.perf_counter()
+        for _ in range(200):
+            Mapper.system(*self.responses)
+        eager = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(200):
+            lazy = LazySystem(*self.responses)
+            lazy.outdoor_temperature
+            lazy.boiler_status
+        on_demand = time.perf_counter() - start
+
+        self.assertLess(on_demand, eager)
+
+
+if __name__ == '__main__':
+    unittest.main()
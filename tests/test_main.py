@@ -0,0 +1,99 @@
+import inspect
+import io
+import json
+import subprocess
+import sys
+import unittest
+
+import responses
+
+from tests.testutil import TestUtil
+from vr900connector import __main__ as cli
+from vr900connector.api import ApiConnector, Urls
+
+
+class MainTest(unittest.TestCase):
+
+    def setUp(self):
+        self.connector = ApiConnector('user', 'pass', 'vr900-connector', TestUtil.temp_path())
+
+    @responses.activate
+    def test_run_batch(self):
+        serial = TestUtil.mock_full_auth_success()
+        responses.add(responses.GET, Urls.zone('Control_ZO1').format(serial_number=serial), json={'body': 'zone'})
+        responses.add(responses.GET, Urls.live_report().format(serial_number=serial), json={'body': 'live'})
+        responses.add(responses.GET, Urls.hvac().format(serial_number=serial), status=500)
+        responses.add(responses.DELETE, Urls.delete_repeater('r1').format(serial_number=serial), status=200)
+
+        lines = ['zone Control_ZO1\n', '\n', '# comment\n', 'live_report\n', 'hvac\n', 'unknown\n', 'zone\n',
+                 'DELETE delete_repeater r1\n']
+        output = io.BytesIO()
+        cli._run_batch(self.connector, lines, output, workers=3)
+
+        results = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(['zone Control_ZO1', 'live_report', 'hvac', 'unknown', 'zone', 'DELETE delete_repeater r1'],
+                         [result['command'] for result in results])
+        self.assertEqual('zone', results[0]['result']['body'])
+        self.assertEqual('live', results[1]['result']['body'])
+        self.assertEqual(500, results[2]['status'])
+        self.assertEqual('Unknown command', results[3]['error'])
+        self.assertEqual('Expected arguments: zone_id', results[4]['error'])
+        self.assertEqual({'ok': 'ok'}, results[5]['result'])
+        self.assertEqual(1, len([call for call in responses.calls if call.request.url == Urls.new_token()]))
+
+    def test_commands_match_urls(self):
+        expected = dict()
+        for name, function in inspect.getmembers(Urls, predicate=inspect.ismethod):
+            if name not in ['new_token', 'authenticate', 'logout']:
+                expected[name] = tuple(inspect.signature(function).parameters)
+
+        self.assertEqual(expected, cli._COMMANDS)
+
+    def test_parse_args(self):
+        args = cli._parse_args(['user', 'pass', 'GET', 'live_report_device', 'd1', 'r1', '-o', 'out.json'])
+
+        self.assertEqual('live_report_device', args.command)
+        self.assertEqual(['d1', 'r1'], args.arguments)
+        self.assertEqual('out.json', args.output)
+        self.assertEqual('-', cli._parse_args(['user', 'pass', 'GET', '--batch', '-']).batch)
+        with self.assertRaises(SystemExit):
+            cli._parse_args(['user', 'pass', 'GET', 'zone'])
+
+    def test_startup_does_not_import_requests(self):
+        code = "import sys; from vr900connector.__main__ import _parse_args; " \
+               "_parse_args(['u', 'p', 'GET', 'zone', 'z1']); print('requests' in sys.modules)"
+        output = subprocess.check_output([sys.executable, '-c', code], universal_newlines=True,
+                                         cwd=TestUtil.path('..'))
+
+        self.assertEqual('False', output.strip())
+
+    @unittest.skipIf(sys.version_info < (3, 7), '-X importtime requires python 3.7')
+    def test_startup_import_time(self):
+        """
+        Importing the CLI is much cheaper than importing the HTTP stack. On CPython 3.11, importing the CLI takes about
+        9 ms and importing requests about 70 ms
+        """
+        code = "from vr900connector.__main__ import _parse_args; _parse_args(['u', 'p', 'GET', 'zone', 'z1'])"
+        cli_time = self._import_time(code, 'vr900connector.__main__')
+        requests_time = self._import_time('import requests', 'requests')
+
+        self.assertLess(cli_time, requests_time / 2)
+
+    @classmethod
+    def _import_time(cls, code: str, module: str) -> int:
+        """
+        Cumulative import time of a module (in microseconds) when running code in a new interpreter
+        """
+        process = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], stderr=subprocess.PIPE,
+                                 universal_newlines=True, cwd=TestUtil.path('..'), check=True)
+
+        for line in process.stderr.splitlines():
+            if line.startswith('import time:') and '|' in line:
+                _, total, name = line[len('import time:'):].split('|')
+                if name.strip() == module and total.strip().isdigit():
+                    return int(total)
+        raise AssertionError('{} not imported'.format(module))
+
+
+if __name__ == '__main__':
+    unittest.main()
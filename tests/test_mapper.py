@@ -1,9 +1,13 @@
+import gc
 import json
+import tracemalloc
 import unittest
 from datetime import date, datetime
+from unittest import mock
 
 from tests.testutil import TestUtil
 from vr900connector.model import Mapper, QuickMode, HeatingMode
+from vr900connector.model import mapper as mapper_module
 
 
 class MapperTest(unittest.TestCase):
@@ -64,6 +68,28 @@ class MapperTest(unittest.TestCase):
         name = Mapper.installation_name(facilities)
         self.assertEqual("Home", name)
 
+    def test_installation_name_of_facility(self):
+        with open(TestUtil.path('files/responses/facilities_multiple'), 'r') as file:
+            facilities = json.loads(file.read())
+
+        self.assertEqual("Home", Mapper.installation_name(facilities))
+        self.assertEqual("Office", Mapper.installation_name(facilities, "9876543210987654321098765432"))
+        self.assertIsNone(Mapper.installation_name(facilities, "unknown"))
+
+    def test_facilities(self):
+        with open(TestUtil.path('files/responses/facilities_multiple'), 'r') as file:
+            raw_facilities = json.loads(file.read())
+
+        facilities = Mapper.facilities(raw_facilities)
+
+        self.assertEqual(2, len(facilities))
+        self.assertEqual("1234567890123456789012345678", facilities[0].serial_number)
+        self.assertEqual("Home", facilities[0].name)
+        self.assertEqual("Office", facilities[1].name)
+        self.assertEqual("1.2.4", facilities[1].firmware_version)
+        self.assertEqual(["Home", "Office"],
+                         [facility.name for facility in Mapper.facilities(raw_facilities['body']['facilitiesList'])])
+
     def test_rooms_none(self):
         rooms = Mapper.rooms(None)
         self.assertIsNotNone(rooms)
@@ -147,6 +173,19 @@ class MapperTest(unittest.TestCase):
         self.assertEqual(False, devices_room1[1].radio_out_of_reach)
         self.assertEqual(False, devices_room1[1].radio_out_of_reach)
 
+    def test_has_rbr_zone(self):
+        with open(TestUtil.path('files/responses/systemcontrol'), 'r') as file:
+            raw_system = json.loads(file.read())
+
+        self.assertTrue(Mapper.has_rbr_zone(raw_system))
+
+    def test_has_rbr_zone_none(self):
+        with open(TestUtil.path('files/responses/zone'), 'r') as file:
+            raw_zone = json.loads(file.read())
+
+        self.assertFalse(Mapper.has_rbr_zone(None))
+        self.assertFalse(Mapper.has_rbr_zone({"body": {"zones": [raw_zone["body"]]}}))
+
     def test_holiday_mode_none(self):
         with open(TestUtil.path('files/responses/systemcontrol'), 'r') as file:
             raw_system = json.loads(file.read())
@@ -289,5 +328,144 @@ class MapperTest(unittest.TestCase):
         self.assertEqual('VR920', errors[0].device_name)
         self.assertEqual('F.900', errors[0].status_code)
 
+    def test_reports(self):
+        with open(TestUtil.path('files/responses/livereport'), 'r') as file:
+            live_report = json.loads(file.read())
+
+        reports = Mapper.reports(live_report)
+
+        self.assertEqual(3, len(reports))
+        self.assertEqual('Control_SYS_MultiMatic', reports[2].device_id)
+        self.assertEqual('multiMATIC', reports[2].device_name)
+        self.assertEqual('WaterPressureSensor', reports[2].report_id)
+        self.assertEqual(1.9, reports[2].value)
+        self.assertEqual('bar', reports[2].unit)
+        self.assertEqual('PRESSURE', reports[2].measurement_category)
+        self.assertEqual('HEATING', reports[2].associated_device_function)
+
+    def test_reports_empty(self):
+        self.assertEqual([], Mapper.reports(None))
+        self.assertEqual([], Mapper.reports({"body": {}}))
+
+    def test_system_reports(self):
+        responses = []
+        for name in ('systemcontrol', 'livereport', 'hvacstate', 'rooms'):
+            with open(TestUtil.path('files/responses/' + name), 'r') as file:
+                responses.append(json.loads(file.read()))
+
+        system = Mapper.system(*responses)
+
+        self.assertEqual(['DomesticHotWaterTankTemperature', 'FlowTemperatureSensor', 'WaterPressureSensor'],
+                         [report.report_id for report in system.reports])
+
+    def test_live_report_indexed_once_per_mapping(self):
+        with open(TestUtil.path('files/responses/livereport'), 'r') as file:
+            live_report = json.loads(file.read())
+        with open(TestUtil.path('files/responses/hvacstate'), 'r') as file:
+            hvac_state = json.loads(file.read())
+
+        with open(TestUtil.path('files/responses/systemcontrol'), 'r') as file:
+            full_system = json.loads(file.read())
+
+        with mock.patch.object(Mapper, '_live_report_index', wraps=Mapper._live_report_index) as index:
+            system = Mapper.system(full_system, live_report, hvac_state, None)
+            self.assertEqual(1, index.call_count)
+            Mapper.fragments(full_system, live_report, hvac_state, None)
+            self.assertEqual(2, index.call_count)
+
+        self.assertEqual(1.9, system.boiler_status.water_pressure)
+        self.assertEqual(38, system.boiler_status.current_temperature)
+        self.assertEqual(44.5, system.hot_water.current_temperature)
+
+    def test_time_program_interned(self):
+        with open(TestUtil.path('files/responses/systemcontrol'), 'r') as file:
+            system = json.loads(file.read())
+
+        zones = Mapper.zones(system)
+        zones_again = Mapper.zones(system)
+
+        self.assertIs(zones[0].time_program, zones_again[0].time_program)
+        self.assertIs(zones[1].time_program, zones_again[1].time_program)
+
+    def test_time_program_interned_by_content(self):
+        raw = {"monday": [{"startTime": "06:00", "setting": "DAY"}, {"startTime": "22:00", "setting": "NIGHT"}]}
+        same = json.loads(json.dumps(raw))
+        other = {"monday": [{"startTime": "06:00", "setting": "DAY"}, {"startTime": "23:00", "setting": "NIGHT"}]}
+
+        time_program = Mapper.time_program(raw, "setting")
+
+        self.assertIs(time_program, Mapper.time_program(same, "setting"))
+        self.assertIsNot(time_program, Mapper.time_program(other, "setting"))
+        self.assertIsNot(time_program, Mapper.time_program(raw, "mode"))
+
+    def test_time_program_interned_released(self):
+        raw = {"sunday": [{"startTime": "07:00", "temperatureSetpoint": 21.5}]}
+        gc.collect()
+        size = len(mapper_module._TIME_PROGRAMS)
+
+        time_program = Mapper.time_program(raw)
+        self.assertEqual(size + 1, len(mapper_module._TIME_PROGRAMS))
+
+        del time_program
+        gc.collect()
+        self.assertEqual(size, len(mapper_module._TIME_PROGRAMS))
+
+    def test_system_memory_benchmark(self):
+        """
+        Model objects of a snapshot have no instance dictionary. On CPython 3.11, a snapshot of the test files takes
+        about 6.6 KB, against 7.6 KB with dictionary based objects. Without sharing time programs between snapshots, it
+        takes about 41 KB, against 51 KB with dictionary based objects
+        """
+        responses = []
+        for name in ('systemcontrol', 'livereport', 'hvacstate', 'rooms'):
+            with open(TestUtil.path('files/responses/' + name), 'r') as file:
+                responses.append(file.read())
+
+        system = Mapper.system(*[json.loads(response) for response in responses])
+        for component in list(system.zones) + list(system.rooms) + [system.hot_water, system.circulation]:
+            self.assertFalse(hasattr(component, '__dict__'))
+            for day in component.time_program.time_program_days.values():
+                self.assertFalse(hasattr(day, '__dict__'))
+                for setting in day.time_program_day_settings:
+                    self.assertFalse(hasattr(setting, '__dict__'))
+        for room in system.rooms:
+            for device in room.devices:
+                self.assertFalse(hasattr(device, '__dict__'))
+        self.assertFalse(hasattr(system.boiler_status, '__dict__'))
+
+        dict_based_mapper = TestUtil.dict_based_mapper()
+        dict_based_system = dict_based_mapper.system(*[json.loads(response) for response in responses])
+        self.assertTrue(hasattr(next(iter(dict_based_system.zones)), '__dict__'))
+        self.assertTrue(hasattr(next(iter(dict_based_system.rooms)).devices[0], '__dict__'))
+
+        dict_based_size = self._snapshot_size(dict_based_mapper, responses)
+        size = self._snapshot_size(Mapper, responses)
+        dict_based_unshared_size = self._snapshot_size(dict_based_mapper, responses, share_time_programs=False)
+        unshared_size = self._snapshot_size(Mapper, responses, share_time_programs=False)
+        self.assertLess(size, dict_based_size)
+        self.assertLess(unshared_size, dict_based_unshared_size * 0.85)
+        self.assertLess(size, unshared_size * 0.25)
+
+    @classmethod
+    def _snapshot_size(cls, mapper, responses, share_time_programs=True):
+        """
+        Memory taken by each system mapped from the responses, in bytes. Responses are decoded for each snapshot, as
+        mapped objects keep decoded values
+        """
+        def time_program(raw_time_program, mode_key_name=""):
+            return mapper._map_time_program(raw_time_program, mode_key_name)
+
+        with mock.patch.object(mapper, 'time_program', mapper.time_program if share_time_programs else time_program):
+            gc.collect()
+            tracemalloc.start()
+            try:
+                start = tracemalloc.get_traced_memory()[0]
+                snapshots = [mapper.system(*[json.loads(response) for response in responses]) for _ in range(50)]
+                gc.collect()
+                return (tracemalloc.get_traced_memory()[0] - start) / len(snapshots)
+            finally:
+                tracemalloc.stop()
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,87 @@
+import copy
+import json
+import unittest
+from unittest.mock import patch
+
+from tests.testutil import TestUtil
+from vr900connector.pollscheduler import PollScheduler
+
+
+class PollSchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = PollScheduler({PollScheduler.LIVE_REPORT: (60, 10, 200)}, backoff_factor=2)
+
+    def test_everything_due_at_start(self):
+        self.assertEqual(PollScheduler.FAMILIES, self.scheduler.due())
+
+    def test_record_schedules_next_request(self):
+        with patch('vr900connector.pollscheduler.monotonic', return_value=1000):
+            self.assertTrue(self.scheduler.record(PollScheduler.LIVE_REPORT, {'body': {'value': 1}}))
+
+        with patch('vr900connector.pollscheduler.monotonic', return_value=1059):
+            self.assertNotIn(PollScheduler.LIVE_REPORT, self.scheduler.due())
+        with patch('vr900connector.pollscheduler.monotonic', return_value=1060):
+            self.assertIn(PollScheduler.LIVE_REPORT, self.scheduler.due())
+
+    def test_back_off_when_unchanged(self):
+        self.scheduler.record(PollScheduler.LIVE_REPORT, {'body': {'value': 1}, 'meta': {'timestamp': 1}})
+        self.assertFalse(self.scheduler.record(PollScheduler.LIVE_REPORT,
+                                               {'body': {'value': 1}, 'meta': {'timestamp': 2}}))
+        self.assertEqual(120, self.scheduler.interval(PollScheduler.LIVE_REPORT))
+
+        self.scheduler.record(PollScheduler.LIVE_REPORT, {'body': {'value': 1}})
+        self.assertEqual(200, self.scheduler.interval(PollScheduler.LIVE_REPORT))
+
+        self.assertTrue(self.scheduler.record(PollScheduler.LIVE_REPORT, {'body': {'value': 2}}))
+        self.assertEqual(60, self.scheduler.interval(PollScheduler.LIVE_REPORT))
+
+    def test_boost(self):
+        with patch('vr900connector.pollscheduler.monotonic', return_value=1000):
+            self.scheduler.record(PollScheduler.LIVE_REPORT, {'body': {'value': 1}})
+            self.scheduler.boost(PollScheduler.LIVE_REPORT)
+
+        self.assertEqual(10, self.scheduler.interval(PollScheduler.LIVE_REPORT))
+        with patch('vr900connector.pollscheduler.monotonic', return_value=1010):
+            self.assertIn(PollScheduler.LIVE_REPORT, self.scheduler.due())
+            self.assertTrue(self.scheduler.record(PollScheduler.LIVE_REPORT, {'body': {'value': 2}}))
+        self.assertEqual(10, self.scheduler.interval(PollScheduler.LIVE_REPORT))
+
+    def test_boost_expires(self):
+        self.scheduler = PollScheduler({PollScheduler.LIVE_REPORT: (60, 10, 200)}, backoff_factor=2, boost_polls=2)
+        self.scheduler.record(PollScheduler.LIVE_REPORT, {'body': {'value': 0}})
+        self.scheduler.boost(PollScheduler.LIVE_REPORT)
+
+        intervals = []
+        for value in range(1, 11):
+            self.scheduler.record(PollScheduler.LIVE_REPORT, {'body': {'value': value}})
+            intervals.append(self.scheduler.interval(PollScheduler.LIVE_REPORT))
+
+        self.assertEqual([10, 10] + [60] * 8, intervals)
+
+    def test_controller_clock_ignored(self):
+        self.scheduler = PollScheduler({PollScheduler.SYSTEM: (30, 10, 120)}, backoff_factor=2)
+        with open(TestUtil.path('files/responses/systemcontrol'), 'r') as file:
+            system = json.loads(file.read())
+
+        self.assertTrue(self.scheduler.record(PollScheduler.SYSTEM, system))
+        for second in range(10, 13):
+            system = copy.deepcopy(system)
+            system['body']['status']['datetime'] = '2019-01-02T14:32:{}.000Z'.format(second)
+            self.assertFalse(self.scheduler.record(PollScheduler.SYSTEM, system))
+        self.assertEqual(120, self.scheduler.interval(PollScheduler.SYSTEM))
+
+        system = copy.deepcopy(system)
+        system['body']['status']['outside_temperature'] += 1
+        self.assertTrue(self.scheduler.record(PollScheduler.SYSTEM, system))
+        self.assertEqual(30, self.scheduler.interval(PollScheduler.SYSTEM))
+
+    def test_next_delay(self):
+        with patch('vr900connector.pollscheduler.monotonic', return_value=1000):
+            for family in PollScheduler.FAMILIES:
+                self.scheduler.record(family, {'body': {}})
+            self.assertEqual(60, self.scheduler.next_delay())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+from unittest.mock import patch
+
+from vr900connector.api import ResponseCache, Urls
+
+_SERIAL = '1234567890'
+
+
+class ResponseCacheTest(unittest.TestCase):
+
+    def test_get_miss(self):
+        cache = ResponseCache()
+
+        self.assertIsNone(cache.get(self._url(Urls.system())))
+        self.assertEqual(0, cache.hits)
+        self.assertEqual(1, cache.misses)
+
+    def test_get_hit(self):
+        cache = ResponseCache()
+        cache.put(Urls.system(), self._url(Urls.system()), {'body': {}})
+
+        self.assertEqual({'body': {}}, cache.get(self._url(Urls.system())))
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(0, cache.misses)
+
+    def test_expired(self):
+        cache = ResponseCache(default_ttl=10, ttls={Urls.live_report(): 60})
+
+        with patch('vr900connector.api.responsecache.monotonic', return_value=100):
+            cache.put(Urls.system(), self._url(Urls.system()), {'system': 'ok'})
+            cache.put(Urls.live_report(), self._url(Urls.live_report()), {'live_report': 'ok'})
+
+        with patch('vr900connector.api.responsecache.monotonic', return_value=120):
+            self.assertIsNone(cache.get(self._url(Urls.system())))
+            self.assertEqual({'live_report': 'ok'}, cache.get(self._url(Urls.live_report())))
+
+    def test_ttl_zero_not_cached(self):
+        cache = ResponseCache(ttls={Urls.hvac(): 0})
+        cache.put(Urls.hvac(), self._url(Urls.hvac()), {'hvac': 'ok'})
+
+        self.assertIsNone(cache.get(self._url(Urls.hvac())))
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(max_size=2)
+        cache.put(Urls.system(), self._url(Urls.system()), 'system')
+        cache.put(Urls.hvac(), self._url(Urls.hvac()), 'hvac')
+        cache.get(self._url(Urls.system()))
+        cache.put(Urls.rooms(), self._url(Urls.rooms()), 'rooms')
+
+        self.assertEqual('system', cache.get(self._url(Urls.system())))
+        self.assertIsNone(cache.get(self._url(Urls.hvac())))
+        self.assertEqual('rooms', cache.get(self._url(Urls.rooms())))
+
+    def test_invalidate_same_resource(self):
+        cache = ResponseCache()
+        cache.put(Urls.system(), self._url(Urls.system()), 'system')
+        cache.put(Urls.zone('zone'), self._url(Urls.zone('zone')), 'zone')
+        cache.put(Urls.live_report(), self._url(Urls.live_report()), 'live_report')
+        cache.put(Urls.rooms(), self._url(Urls.rooms()), 'rooms')
+
+        cache.invalidate(self._url(Urls.zone_heating_mode('zone')))
+
+        self.assertIsNone(cache.get(self._url(Urls.system())))
+        self.assertIsNone(cache.get(self._url(Urls.zone('zone'))))
+        self.assertEqual('live_report', cache.get(self._url(Urls.live_report())))
+        self.assertEqual('rooms', cache.get(self._url(Urls.rooms())))
+
+    def test_invalidate_hvac_update(self):
+        cache = ResponseCache()
+        cache.put(Urls.hvac(), self._url(Urls.hvac()), 'hvac')
+
+        cache.invalidate(self._url(Urls.hvac_update()))
+
+        self.assertIsNone(cache.get(self._url(Urls.hvac())))
+
+    def test_put_after_invalidation_not_cached(self):
+        cache = ResponseCache()
+        system_generation = cache.generation(self._url(Urls.system()))
+        facilities_generation = cache.generation(Urls.facilities_list())
+        live_report_generation = cache.generation(self._url(Urls.live_report()))
+
+        cache.invalidate(self._url(Urls.zone_heating_mode('zone')))
+        cache.put(Urls.system(), self._url(Urls.system()), 'system', system_generation)
+        cache.put(Urls.facilities_list(), Urls.facilities_list(), 'facilities', facilities_generation)
+        cache.put(Urls.live_report(), self._url(Urls.live_report()), 'live_report', live_report_generation)
+
+        self.assertIsNone(cache.get(self._url(Urls.system())))
+        self.assertIsNone(cache.get(Urls.facilities_list()))
+        self.assertEqual('live_report', cache.get(self._url(Urls.live_report())))
+
+        cache.put(Urls.system(), self._url(Urls.system()), 'system', cache.generation(self._url(Urls.system())))
+        self.assertEqual('system', cache.get(self._url(Urls.system())))
+
+    def test_clear(self):
+        cache = ResponseCache()
+        cache.put(Urls.hvac(), self._url(Urls.hvac()), 'hvac')
+        cache.clear()
+
+        self.assertIsNone(cache.get(self._url(Urls.hvac())))
+
+    def _url(self, url):
+        return url.format(serial_number=_SERIAL)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import time
+import unittest
+from unittest import mock
+from unittest.mock import Mock
+
+import responses
+
+from tests.testutil import TestUtil
+from vr900connector.api import ApiConnector, SessionRefresher, Urls
+
+
+class SessionRefresherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.connector = ApiConnector('user', 'pass', 'vr900-connector', TestUtil.temp_path())
+
+    @responses.activate
+    def test_session_expiry(self):
+        expires = int(time.time()) + 3600
+        self._mock_auth_with_cookie_expiry(expires)
+
+        self.connector.get(Urls.facilities_list())
+
+        self.assertEqual(expires, self.connector.session_expiry)
+
+    @responses.activate
+    def test_session_expiry_no_expiry(self):
+        TestUtil.mock_full_auth_success()
+
+        self.connector.get(Urls.facilities_list())
+
+        self.assertIsNone(self.connector.session_expiry)
+
+    @responses.activate
+    def test_refresh_before_expiry(self):
+        self._mock_auth_with_cookie_expiry(int(time.time()) + 60)
+        self.connector.get(Urls.facilities_list())
+
+        SessionRefresher(self.connector, None, 120)._tick()
+
+        self.assertEqual(2, len([call for call in responses.calls if call.request.url == Urls.new_token()]))
+
+    @responses.activate
+    def test_no_refresh_long_before_expiry(self):
+        self._mock_auth_with_cookie_expiry(int(time.time()) + 3600)
+        self.connector.get(Urls.facilities_list())
+
+        SessionRefresher(self.connector, None, 120)._tick()
+
+        self.assertEqual(1, len([call for call in responses.calls if call.request.url == Urls.new_token()]))
+
+    @responses.activate
+    def test_keep_alive_when_idle(self):
+        TestUtil.mock_full_auth_success()
+        self.connector.get(Urls.facilities_list())
+        calls = len(responses.calls)
+
+        SessionRefresher(self.connector, 0, 120)._tick()
+
+        self.assertEqual(calls + 1, len(responses.calls))
+        self.assertEqual(Urls.facilities_list(), responses.calls[-1].request.url)
+
+    @responses.activate
+    def test_no_keep_alive_when_active(self):
+        TestUtil.mock_full_auth_success()
+        self.connector.get(Urls.facilities_list())
+        calls = len(responses.calls)
+
+        SessionRefresher(self.connector, 3600, 120)._tick()
+
+        self.assertEqual(calls, len(responses.calls))
+
+    def test_tick_error_not_raised(self):
+        connector = Mock()
+        connector.session_expiry = time.time()
+        connector.refresh_session.side_effect = Exception('Test exception')
+
+        self.assertFalse(SessionRefresher(connector, None, 120)._tick())
+
+    def test_start_stop(self):
+        connector = Mock()
+        connector.session_expiry = None
+        connector.idle_time = 0
+
+        refresher = SessionRefresher(connector)
+        refresher.start()
+        self.assertTrue(refresher.is_running)
+
+        refresher.stop()
+        self.assertFalse(refresher.is_running)
+
+    def test_short_lived_cookies_not_renewed_in_loop(self):
+        connector = Mock()
+        connector.idle_time = 0
+        connector.session_expiry = time.time() + 2
+
+        def refresh_session():
+            connector.session_expiry = time.time() + 2
+
+        connector.refresh_session.side_effect = refresh_session
+
+        with mock.patch('vr900connector.api.sessionrefresher._MIN_DELAY', 0.01):
+            refresher = SessionRefresher(connector, None, 120)
+            refresher.start()
+            time.sleep(0.5)
+            refresher.stop()
+
+        self.assertEqual(1, connector.refresh_session.call_count)
+        self.assertGreater(refresher._time_before_refresh(), 0.5)
+
+    def test_no_renewal_when_expiry_does_not_move(self):
+        connector = Mock()
+        connector.idle_time = 0
+        connector.session_expiry = time.time() + 60
+
+        with mock.patch('vr900connector.api.sessionrefresher._MIN_DELAY', 0.01):
+            refresher = SessionRefresher(connector, None, 120)
+            refresher.start()
+            time.sleep(0.2)
+            refresher.stop()
+
+        self.assertEqual(1, connector.refresh_session.call_count)
+
+    def _mock_auth_with_cookie_expiry(self, expires):
+        TestUtil.mock_token_success()
+        TestUtil.mock_serial_success()
+        expires_header = time.strftime('%a, %d %b %Y %H:%M:%S GMT', time.gmtime(expires))
+        responses.add(responses.POST, Urls.authenticate(), status=200,
+                      headers={"Set-Cookie": "test=value; path=/; Expires=" + expires_header + "; Secure; HttpOnly"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import stat
+import unittest
+from unittest.mock import patch
+
+import responses
+
+from tests.testutil import TestUtil
+from vr900connector.api import ApiConnector, Defaults, FileSessionStore, MemorySessionStore, Urls
+
+_COOKIES = [{'name': 'test', 'value': 'value', 'domain': '', 'path': '/', 'expires': None, 'secure': False}]
+
+
+class SessionStoreTest(unittest.TestCase):
+
+    def test_memory_store(self):
+        store = MemorySessionStore()
+        self.assertIsNone(store.get_cookies())
+
+        store.set_cookies(_COOKIES)
+        store.set_serial_number('serial')
+        self.assertEqual(_COOKIES, store.get_cookies())
+        self.assertEqual('serial', store.get_serial_number())
+
+        store.clear()
+        self.assertIsNone(store.get_cookies())
+        self.assertIsNone(store.get_serial_number())
+
+    def test_file_store_survives_instances(self):
+        path = os.path.join(TestUtil.temp_path(), 'sub')
+        store = FileSessionStore(path)
+        store.set_cookies(_COOKIES)
+        store.set_serial_number('serial')
+
+        other = FileSessionStore(path)
+        self.assertEqual(_COOKIES, other.get_cookies())
+        self.assertEqual('serial', other.get_serial_number())
+        self.assertEqual([Defaults.SESSION_FILE_NAME], os.listdir(path))
+        self.assertEqual(0o600, stat.S_IMODE(os.stat(os.path.join(path, Defaults.SESSION_FILE_NAME)).st_mode))
+
+    def test_file_store_loaded_once(self):
+        path = TestUtil.temp_path()
+        FileSessionStore(path).set_serial_number('serial')
+        store = FileSessionStore(path)
+
+        with patch('vr900connector.api.sessionstore.open', create=True, wraps=open) as mock_open:
+            store.get_serial_number()
+            store.get_cookies()
+            store.get_serial_number()
+
+        self.assertEqual(1, mock_open.call_count)
+
+    def test_file_store_clear(self):
+        path = TestUtil.temp_path()
+        store = FileSessionStore(path)
+        store.set_serial_number('serial')
+
+        store.clear()
+
+        self.assertFalse(os.path.exists(os.path.join(path, Defaults.SESSION_FILE_NAME)))
+        self.assertIsNone(store.get_serial_number())
+
+    def test_file_store_invalid_file(self):
+        path = TestUtil.temp_path()
+        with open(os.path.join(path, Defaults.SESSION_FILE_NAME), 'wb') as file:
+            file.write(b'\x80\x03not json')
+
+        store = FileSessionStore(path)
+
+        self.assertIsNone(store.get_cookies())
+        store.set_serial_number('serial')
+        self.assertEqual('serial', FileSessionStore(path).get_serial_number())
+
+    def test_file_store_write_error(self):
+        path = TestUtil.temp_path()
+        store = FileSessionStore(path)
+
+        with patch('os.replace', side_effect=OSError('Test exception')):
+            store.set_serial_number('serial')
+
+        self.assertEqual([], os.listdir(path))
+        self.assertEqual('serial', store.get_serial_number())
+
+    @responses.activate
+    def test_shared_between_connectors(self):
+        TestUtil.mock_full_auth_success()
+        store = MemorySessionStore()
+
+        ApiConnector('user', 'pass', 'vr900-connector', session_store=store).get(Urls.facilities_list())
+        ApiConnector('user', 'pass', 'vr900-connector', session_store=store).get(Urls.facilities_list())
+
+        self.assertEqual(1, len([call for call in responses.calls if call.request.url == Urls.new_token()]))
+        self.assertEqual('test', store.get_cookies()[0]['name'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,12 +1,20 @@
+import gc
 import json
+import threading
+import time
+import tracemalloc
 import unittest
 from datetime import date, timedelta
+from unittest import mock
 
 import responses
 
 from tests.testutil import TestUtil
 from vr900connector.api import Urls, Payloads
-from vr900connector.model import HotWater, HeatingMode, QuickMode, QuickVeto, Room, Zone, Circulation, Constants
+from vr900connector.model import Mapper, HotWater, HeatingMode, QuickMode, QuickVeto, Room, Zone, Circulation, \
+    Constants, System, LazySystem, TargetTemperatureChanged, QuickVetoStarted, BoilerStatusCodeChanged, \
+    OperationModeChanged
+from vr900connector.pollscheduler import PollScheduler
 from vr900connector.systemmanager import SystemManager
 
 
@@ -40,6 +48,123 @@ class SystemManagerTest(unittest.TestCase):
         self.assertEqual(2, len(system.zones))
         self.assertEqual(4, len(system.rooms))
 
+    @responses.activate
+    def test_system_concurrent(self):
+        serial = TestUtil.mock_full_auth_success()
+        self.manager = SystemManager('user', 'pass', 'vr900-connector', TestUtil.temp_path(), concurrent=True)
+
+        hvacstate_data, livereport_data, rooms_data, system_data = self._load_system_files()
+        self._mock_urls(hvacstate_data, livereport_data, rooms_data, serial, system_data)
+
+        system = self.manager.get_system()
+
+        self.assertEqual(2, len(system.zones))
+        self.assertEqual(4, len(system.rooms))
+        self.assertEqual(38, system.boiler_status.current_temperature)
+        self.assertEqual(44.5, system.hot_water.current_temperature)
+
+    @responses.activate
+    def test_system_concurrent_no_rbr(self):
+        serial = TestUtil.mock_full_auth_success()
+        self.manager = SystemManager('user', 'pass', 'vr900-connector', TestUtil.temp_path(), concurrent=True)
+
+        hvacstate_data, livereport_data, rooms_data, system_data = self._load_system_files()
+        for zone in system_data['body']['zones']:
+            zone['currently_controlled_by'] = {'name': 'VRC700'}
+        self._mock_urls(hvacstate_data, livereport_data, rooms_data, serial, system_data)
+
+        system = self.manager.get_system()
+
+        self.assertEqual(0, len(system.rooms))
+        rooms_url = Urls.rooms().format(serial_number=serial)
+        self.assertNotIn(rooms_url, [call.request.url for call in responses.calls])
+
+    @responses.activate
+    def test_logout_shuts_down_executor(self):
+        serial = TestUtil.mock_full_auth_success()
+        TestUtil.mock_logout()
+        self.manager = SystemManager('user', 'pass', 'vr900-connector', TestUtil.temp_path(), concurrent=True)
+        hvacstate_data, livereport_data, rooms_data, system_data = self._load_system_files()
+        self._mock_urls(hvacstate_data, livereport_data, rooms_data, serial, system_data)
+        self.manager.get_system()
+        executor = self.manager._executor
+
+        self.manager.logout()
+
+        self.assertIsNone(self.manager._executor)
+        with self.assertRaises(RuntimeError):
+            executor.submit(lambda: None)
+
+    @responses.activate
+    def test_close_then_reuse(self):
+        serial = TestUtil.mock_full_auth_success()
+        self.manager = SystemManager('user', 'pass', 'vr900-connector', TestUtil.temp_path(), concurrent=True)
+        hvacstate_data, livereport_data, rooms_data, system_data = self._load_system_files()
+        self._mock_urls(hvacstate_data, livereport_data, rooms_data, serial, system_data)
+        self.manager.get_system()
+
+        self.manager.close()
+
+        self.assertIsNone(self.manager._executor)
+        self.assertEqual(2, len(self.manager.get_system().zones))
+
+    @responses.activate
+    def test_snapshots_dont_keep_responses(self):
+        serial = TestUtil.mock_full_auth_success()
+        hvacstate_data, livereport_data, rooms_data, system_data = self._load_system_files()
+        self._mock_urls(hvacstate_data, livereport_data, rooms_data, serial, system_data)
+        raw = [json.dumps(data) for data in (system_data, livereport_data, hvacstate_data, rooms_data)]
+        self.manager.get_system()
+
+        mapped_size = self._retained_size(lambda: Mapper.system(*[json.loads(data) for data in raw]))
+        snapshot_size = self._retained_size(self.manager.get_system)
+
+        self.assertLess(snapshot_size, mapped_size * 1.5)
+
+    @responses.activate
+    def test_system_memory_benchmark(self):
+        """
+        Without sharing time programs between snapshots, on CPython 3.11, a snapshot of the test files returned by the
+        manager takes about 44 KB, against 55 KB with dictionary based objects
+        """
+        serial = TestUtil.mock_full_auth_success()
+        hvacstate_data, livereport_data, rooms_data, system_data = self._load_system_files()
+        self._mock_urls(hvacstate_data, livereport_data, rooms_data, serial, system_data)
+        self.manager.get_system()
+
+        dict_based_mapper = TestUtil.dict_based_mapper()
+        with mock.patch('vr900connector.systemmanager.Mapper', dict_based_mapper), \
+                self._unshared_time_programs(dict_based_mapper):
+            self.assertTrue(hasattr(next(iter(self.manager.get_system().zones)), '__dict__'))
+            dict_based_size = self._retained_size(self.manager.get_system)
+        with self._unshared_time_programs(Mapper):
+            size = self._retained_size(self.manager.get_system)
+
+        self.assertFalse(hasattr(next(iter(self.manager.get_system().zones)), '__dict__'))
+        self.assertLess(size, dict_based_size * 0.9)
+
+    @responses.activate
+    def test_system_concurrent_benchmark(self):
+        """
+        Each API call is delayed, a concurrent refresh must take about the time of the slowest chain of calls
+        (system then rooms the first time, only one call when rooms are speculatively requested).
+        """
+        latency = 0.2
+        serial = TestUtil.mock_full_auth_success()
+        hvacstate_data, livereport_data, rooms_data, system_data = self._load_system_files()
+        self._mock_urls_with_latency(hvacstate_data, livereport_data, rooms_data, serial, system_data, latency)
+
+        sequential = SystemManager('user', 'pass', 'vr900-connector', TestUtil.temp_path())
+        concurrent = SystemManager('user', 'pass', 'vr900-connector', TestUtil.temp_path(), concurrent=True)
+
+        sequential_time = self._time_get_system(sequential)
+        first_concurrent_time = self._time_get_system(concurrent)
+        speculative_time = self._time_get_system(concurrent)
+
+        self.assertGreaterEqual(sequential_time, 4 * latency)
+        self.assertLess(first_concurrent_time, 3 * latency)
+        self.assertLess(speculative_time, 2 * latency)
+
     @responses.activate
     def test_get_hot_water(self):
         serial = TestUtil.mock_full_auth_success()
@@ -80,7 +205,7 @@ class SystemManagerTest(unittest.TestCase):
         responses.add(responses.PUT, url.format(serial_number=serial), status=200)
 
         self.assertTrue(self.manager.set_hot_water_setpoint_temperature(hotwater, 60))
-        self.assertEqual(json.dumps(payload), responses.calls[-1].request.body.decode('utf-8'))
+        self.assertEqual(payload, json.loads(responses.calls[-1].request.body))
 
     @responses.activate
     def test_set_hot_water_setpoint_temperature_number_to_round(self):
@@ -93,7 +218,7 @@ class SystemManagerTest(unittest.TestCase):
         responses.add(responses.PUT, url.format(serial_number=serial), status=200)
 
         self.assertTrue(self.manager.set_hot_water_setpoint_temperature(hotwater, 60.4))
-        self.assertEqual(json.dumps(payload), responses.calls[-1].request.body.decode('utf-8'))
+        self.assertEqual(payload, json.loads(responses.calls[-1].request.body))
 
     @responses.activate
     def test_set_quick_mode_no_current_quick_mode(self):
@@ -105,7 +230,7 @@ class SystemManagerTest(unittest.TestCase):
         responses.add(responses.PUT, url.format(serial_number=serial), status=200)
 
         self.assertTrue(self.manager.set_quick_mode(None, QuickMode.QM_VENTILATION_BOOST))
-        self.assertEqual(json.dumps(payload), responses.calls[-1].request.body.decode('utf-8'))
+        self.assertEqual(payload, json.loads(responses.calls[-1].request.body))
 
     def test_set_quick_mode_existing_quick_mode(self):
         TestUtil.mock_full_auth_success()
@@ -295,7 +420,7 @@ class SystemManagerTest(unittest.TestCase):
         responses.add(responses.PUT, url.format(serial_number=serial), status=200)
 
         self.assertTrue(self.manager.set_room_setpoint_temperature(room, 22))
-        self.assertEqual(json.dumps(payload), responses.calls[-1].request.body.decode('utf-8'))
+        self.assertEqual(payload, json.loads(responses.calls[-1].request.body))
 
     def test_set_zone_setpoint_temperature_no_value(self):
         self.assertFalse(self.manager.set_zone_setpoint_temperature(None, 18))
@@ -314,7 +439,7 @@ class SystemManagerTest(unittest.TestCase):
         responses.add(responses.PUT, url.format(serial_number=serial), status=200)
 
         self.assertTrue(self.manager.set_zone_setpoint_temperature(zone, 25.5))
-        self.assertEqual(json.dumps(payload), responses.calls[-1].request.body.decode('utf-8'))
+        self.assertEqual(payload, json.loads(responses.calls[-1].request.body))
 
     def test_set_zone_setback_temperature_no_value(self):
         self.assertFalse(self.manager.set_zone_setback_temperature(None, 18))
@@ -333,7 +458,7 @@ class SystemManagerTest(unittest.TestCase):
         responses.add(responses.PUT, url.format(serial_number=serial), status=200)
 
         self.assertTrue(self.manager.set_zone_setback_temperature(zone, 18))
-        self.assertEqual(json.dumps(payload), responses.calls[-1].request.body.decode('utf-8'))
+        self.assertEqual(payload, json.loads(responses.calls[-1].request.body))
 
     @responses.activate
     def test_set_holiday_mode(self):
@@ -347,7 +472,7 @@ class SystemManagerTest(unittest.TestCase):
         payload = Payloads.holiday_mode(True, tomorrow, after_tomorrow, 15)
 
         self.assertTrue(self.manager.set_holiday_mode(tomorrow, after_tomorrow, 15))
-        self.assertEqual(json.dumps(payload), responses.calls[-1].request.body.decode('utf-8'))
+        self.assertEqual(payload, json.loads(responses.calls[-1].request.body))
 
         return True
 
@@ -363,7 +488,7 @@ class SystemManagerTest(unittest.TestCase):
         payload = Payloads.holiday_mode(False, before_yesterday, yesterday, Constants.FROST_PROTECTION_TEMP)
 
         self.assertTrue(self.manager.remove_holiday_mode())
-        self.assertEqual(json.dumps(payload), responses.calls[-1].request.body.decode('utf-8'))
+        self.assertEqual(payload, json.loads(responses.calls[-1].request.body))
 
     @responses.activate
     def test_remove_zone_quick_veto(self):
@@ -399,6 +524,351 @@ class SystemManagerTest(unittest.TestCase):
         self.assertTrue(self.manager.request_hvac_update())
         self.assertEqual(url, responses.calls[-1].request.url)
 
+    @responses.activate
+    def test_refresh_no_change(self):
+        serial = TestUtil.mock_full_auth_success()
+        hvacstate_data, livereport_data, rooms_data, system_data = self._load_system_files()
+        self._mock_urls(hvacstate_data, livereport_data, rooms_data, serial, system_data)
+
+        system = self.manager.get_system()
+        zones = list(system.zones)
+        hot_water = system.hot_water
+
+        changes = self.manager.refresh(system)
+
+        self.assertFalse(changes)
+        self.assertEqual([id(zone) for zone in zones], [id(zone) for zone in system.zones])
+        self.assertIs(hot_water, system.hot_water)
+
+    @responses.activate
+    def test_get_lazy_system_and_refresh(self):
+        serial = TestUtil.mock_full_auth_success()
+        hvacstate_data, livereport_data, rooms_data, system_data = self._load_system_files()
+        self._mock_urls(hvacstate_data, livereport_data, rooms_data, serial, system_data)
+
+        system = self.manager.get_system(lazy=True)
+        self.assertIsInstance(system, LazySystem)
+        unchanged_zone = system.get_zone('Control_ZO1')
+
+        system_data['body']['zones'][1]['heating']['configuration']['setpoint_temperature'] = 25.5
+        responses.replace(responses.GET, Urls.system().format(serial_number=serial), json=system_data, status=200)
+
+        changes = self.manager.refresh(system)
+
+        self.assertEqual(['Control_ZO2'], changes.zones)
+        self.assertEqual(25.5, system.get_zone('Control_ZO2').target_temperature)
+        self.assertIs(unchanged_zone, system.get_zone('Control_ZO1'))
+
+    @responses.activate
+    def test_refresh_changed_zone_and_room(self):
+        serial = TestUtil.mock_full_auth_success()
+        hvacstate_data, livereport_data, rooms_data, system_data = self._load_system_files()
+        self._mock_urls(hvacstate_data, livereport_data, rooms_data, serial, system_data)
+
+        system = self.manager.get_system()
+        unchanged_zone = system.get_zone('Control_ZO1')
+        unchanged_room = system.get_room(1)
+
+        system_data['body']['zones'][1]['heating']['configuration']['setpoint_temperature'] = 25.5
+        rooms_data['body']['rooms'][0]['configuration']['temperatureSetpoint'] = 19.5
+        responses.replace(responses.GET, Urls.system().format(serial_number=serial), json=system_data, status=200)
+        responses.replace(responses.GET, Urls.rooms().format(serial_number=serial), json=rooms_data, status=200)
+
+        changes = self.manager.refresh(system)
+
+        self.assertEqual(['Control_ZO2'], changes.zones)
+        self.assertEqual([0], changes.rooms)
+        self.assertEqual([], changes.attributes)
+        self.assertEqual(25.5, system.get_zone('Control_ZO2').target_temperature)
+        self.assertEqual(19.5, system.get_room(0).target_temperature)
+        self.assertIs(unchanged_zone, system.get_zone('Control_ZO1'))
+        self.assertIs(unchanged_room, system.get_room(1))
+
+    @responses.activate
+    def test_refresh_removed_zone_and_attributes(self):
+        serial = TestUtil.mock_full_auth_success()
+        hvacstate_data, livereport_data, rooms_data, system_data = self._load_system_files()
+        self._mock_urls(hvacstate_data, livereport_data, rooms_data, serial, system_data)
+
+        system = self.manager.get_system()
+
+        del system_data['body']['zones'][1]
+        system_data['body']['status']['outside_temperature'] = 1.5
+        for device in livereport_data['body']['devices']:
+            for report in device['reports']:
+                if report['_id'] == 'WaterPressureSensor':
+                    report['value'] = 1.2
+        responses.replace(responses.GET, Urls.system().format(serial_number=serial), json=system_data, status=200)
+        responses.replace(responses.GET, Urls.live_report().format(serial_number=serial), json=livereport_data,
+                          status=200)
+
+        changes = self.manager.refresh(system)
+
+        self.assertEqual([], changes.zones)
+        self.assertEqual(['Control_ZO2'], changes.removed_zones)
+        self.assertEqual(['outdoor_temperature', 'boiler_status', 'reports'], changes.attributes)
+        self.assertEqual(1, len(system.zones))
+        self.assertEqual(1.5, system.outdoor_temperature)
+        self.assertEqual(1.2, system.boiler_status.water_pressure)
+
+    @responses.activate
+    def test_refresh_unknown_system(self):
+        serial = TestUtil.mock_full_auth_success()
+        hvacstate_data, livereport_data, rooms_data, system_data = self._load_system_files()
+        self._mock_urls(hvacstate_data, livereport_data, rooms_data, serial, system_data)
+
+        system = System(None, None, [Zone('old', 'Old', None, 20, 22, HeatingMode.AUTO, None, 20, 'Heating', False)],
+                        None, None, None, None, None, [])
+
+        changes = self.manager.refresh(system)
+
+        self.assertEqual(['Control_ZO1', 'Control_ZO2'], sorted(changes.zones))
+        self.assertEqual(['old'], changes.removed_zones)
+        self.assertEqual(4, len(changes.rooms))
+        self.assertEqual(2, len(system.zones))
+        self.assertIsNotNone(system.hot_water)
+
+    @responses.activate
+    def test_poll_emits_events_to_subscribers(self):
+        serial = TestUtil.mock_full_auth_success()
+        hvacstate_data, livereport_data, rooms_data, system_data = self._load_system_files()
+        self._mock_urls(hvacstate_data, livereport_data, rooms_data, serial, system_data)
+
+        self.manager = SystemManager('user', 'pass', 'vr900-connector', TestUtil.temp_path(),
+                                     scheduler=self._always_due_scheduler())
+        zone_events = []
+        all_events = []
+        self.manager.subscribe('Control_ZO2', zone_events.append)
+        self.manager.subscribe(None, all_events.append)
+
+        self.assertEqual([], self.manager.poll())
+
+        system_data['body']['zones'][1]['heating']['configuration']['setpoint_temperature'] = 25.5
+        system_data['body']['zones'][0]['configuration']['quick_veto']['active'] = True
+        hvacstate_data['body']['errorMessages'][0]['statusCode'] = 'S.4'
+        responses.replace(responses.GET, Urls.system().format(serial_number=serial), json=system_data, status=200)
+        responses.replace(responses.GET, Urls.hvac().format(serial_number=serial), json=hvacstate_data, status=200)
+
+        events = self.manager.poll()
+
+        self.assertEqual(3, len(events))
+        self.assertEqual(events, all_events)
+        self.assertEqual(1, len(zone_events))
+        self.assertIsInstance(zone_events[0], TargetTemperatureChanged)
+        self.assertEqual(25.5, zone_events[0].new_temperature)
+        self.assertIn(QuickVetoStarted, [type(event) for event in events])
+        self.assertIn(BoilerStatusCodeChanged, [type(event) for event in events])
+
+        self.assertEqual([], self.manager.poll())
+
+    @responses.activate
+    def test_poll_failing_subscriber(self):
+        serial = TestUtil.mock_full_auth_success()
+        hvacstate_data, livereport_data, rooms_data, system_data = self._load_system_files()
+        self._mock_urls(hvacstate_data, livereport_data, rooms_data, serial, system_data)
+
+        self.manager = SystemManager('user', 'pass', 'vr900-connector', TestUtil.temp_path(),
+                                     scheduler=self._always_due_scheduler())
+
+        def failing(event):
+            raise ValueError(event)
+
+        events = []
+        self.manager.subscribe('Control_ZO2', failing)
+        self.manager.subscribe('Control_ZO2', events.append)
+        self.manager.subscribe('Control_ZO1', events.append)
+        self.manager.unsubscribe('Control_ZO1', events.append)
+        self.manager.poll()
+
+        system_data['body']['zones'][1]['heating']['configuration']['mode'] = 'DAY'
+        system_data['body']['zones'][0]['heating']['configuration']['mode'] = 'DAY'
+        responses.replace(responses.GET, Urls.system().format(serial_number=serial), json=system_data, status=200)
+
+        self.manager.poll()
+
+        self.assertEqual(1, len(events))
+        self.assertIsInstance(events[0], OperationModeChanged)
+        self.assertEqual('Control_ZO2', events[0].component_id)
+
+    @responses.activate
+    def test_start_polling(self):
+        serial = TestUtil.mock_full_auth_success()
+        hvacstate_data, livereport_data, rooms_data, system_data = self._load_system_files()
+        self._mock_urls(hvacstate_data, livereport_data, rooms_data, serial, system_data)
+        system_data['body']['zones'][1]['heating']['configuration']['setpoint_temperature'] = 25.5
+        responses.add(responses.GET, Urls.system().format(serial_number=serial), json=system_data, status=200)
+
+        self.manager = SystemManager('user', 'pass', 'vr900-connector', TestUtil.temp_path(),
+                                     scheduler=PollScheduler(dict((family, (0.01, 0.01, 0.01))
+                                                                  for family in PollScheduler.FAMILIES)))
+        received = threading.Event()
+        self.manager.subscribe('Control_ZO2', lambda event: received.set())
+
+        self.manager.start_polling()
+        try:
+            self.assertTrue(received.wait(5))
+        finally:
+            self.manager.stop_polling()
+
+    @responses.activate
+    def test_poll_only_due_families(self):
+        serial = TestUtil.mock_full_auth_success()
+        hvacstate_data, livereport_data, rooms_data, system_data = self._load_system_files()
+        self._mock_urls(hvacstate_data, livereport_data, rooms_data, serial, system_data)
+        scheduler = PollScheduler({PollScheduler.LIVE_REPORT: (0, 0, 0)})
+        self.manager = SystemManager('user', 'pass', 'vr900-connector', TestUtil.temp_path(), scheduler=scheduler)
+
+        self.manager.poll()
+        calls_count = len(responses.calls)
+        self.manager.poll()
+
+        self.assertEqual([Urls.live_report().format(serial_number=serial)],
+                         [call.request.url for call in responses.calls[calls_count:]])
+
+    @responses.activate
+    def test_write_boosts_polling(self):
+        serial = TestUtil.mock_full_auth_success()
+        hvacstate_data, livereport_data, rooms_data, system_data = self._load_system_files()
+        self._mock_urls(hvacstate_data, livereport_data, rooms_data, serial, system_data)
+        responses.add(responses.PUT, Urls.hvac_update().format(serial_number=serial), status=200)
+        scheduler = PollScheduler({PollScheduler.HVAC: (300, 0, 3600), PollScheduler.LIVE_REPORT: (60, 0, 600)})
+        self.manager = SystemManager('user', 'pass', 'vr900-connector', TestUtil.temp_path(), scheduler=scheduler)
+
+        self.manager.poll()
+        self.assertEqual([], scheduler.due())
+
+        self.manager.request_hvac_update()
+
+        self.assertEqual([PollScheduler.LIVE_REPORT, PollScheduler.HVAC], scheduler.due())
+
+    def _always_due_scheduler(self):
+        return PollScheduler(dict((family, (0, 0, 0)) for family in PollScheduler.FAMILIES))
+
+    @responses.activate
+    def test_get_systems_of_every_facility(self):
+        serial_numbers = TestUtil.serial_numbers('facilities_multiple')
+        TestUtil.mock_full_auth_success('facilities_multiple')
+        hvacstate_data, livereport_data, rooms_data, system_data = self._load_system_files()
+        for serial in serial_numbers:
+            self._mock_urls(hvacstate_data, livereport_data, rooms_data, serial, system_data)
+
+        facilities = self.manager.get_facilities()
+        systems = self.manager.get_systems()
+
+        self.assertEqual(serial_numbers, [facility.serial_number for facility in facilities])
+        self.assertEqual(serial_numbers, list(systems))
+        for system in systems.values():
+            self.assertEqual(2, len(system.zones))
+        self.assertEqual(1, len([call for call in responses.calls if call.request.url == Urls.new_token()]))
+        self.assertEqual(1, len([call for call in responses.calls if call.request.url == Urls.facilities_list()]))
+
+    @responses.activate
+    def test_manager_of_other_facility(self):
+        default, other = TestUtil.serial_numbers('facilities_multiple')
+        TestUtil.mock_full_auth_success('facilities_multiple')
+        hvacstate_data, livereport_data, rooms_data, system_data = self._load_system_files()
+        self._mock_urls(hvacstate_data, livereport_data, rooms_data, other, system_data)
+        self.manager = SystemManager('user', 'pass', 'vr900-connector', TestUtil.temp_path(), serial_number=other)
+        responses.add(responses.PUT, Urls.hvac_update().format(serial_number=other), status=200)
+
+        system = self.manager.get_system()
+        self.manager.refresh(system)
+        self.manager.request_hvac_update()
+
+        urls = [call.request.url for call in responses.calls]
+        self.assertFalse(any(default in url for url in urls))
+        self.assertIn(Urls.hvac_update().format(serial_number=other), urls)
+
+    @responses.activate
+    def test_write_to_other_facility(self):
+        default, other = TestUtil.serial_numbers('facilities_multiple')
+        TestUtil.mock_full_auth_success('facilities_multiple')
+        hvacstate_data, livereport_data, rooms_data, system_data = self._load_system_files()
+        for serial in (default, other):
+            self._mock_urls(hvacstate_data, livereport_data, rooms_data, serial, system_data)
+        systems = self.manager.get_systems()
+        zone = list(systems[other].zones)[0]
+        url = Urls.zone_heating_setpoint_temperature(zone.id).format(serial_number=other)
+        responses.add(responses.PUT, url, status=200)
+        responses.add(responses.DELETE, Urls.zone_quick_veto(zone.id).format(serial_number=other), status=200)
+
+        self.manager.set_zone_setpoint_temperature(zone, 21, serial_number=other)
+        self.manager.remove_zone_quick_veto(zone, serial_number=other)
+
+        writes = [call.request.url for call in responses.calls if call.request.method in ('PUT', 'DELETE')]
+        self.assertEqual([url, Urls.zone_quick_veto(zone.id).format(serial_number=other)], writes)
+        self.assertEqual(Payloads.zone_temperature_setpoint(21), json.loads(responses.calls[-2].request.body))
+
+    @responses.activate
+    def test_refresh_system_of_other_facility(self):
+        default, other = TestUtil.serial_numbers('facilities_multiple')
+        TestUtil.mock_full_auth_success('facilities_multiple')
+        hvacstate_data, livereport_data, rooms_data, system_data = self._load_system_files()
+        self._mock_urls(hvacstate_data, livereport_data, rooms_data, other, system_data)
+
+        system = self.manager.get_system(serial_number=other)
+        changes = self.manager.refresh(system)
+
+        self.assertFalse(changes)
+        self.assertFalse(any(default in call.request.url for call in responses.calls))
+
+    def _unshared_time_programs(self, mapper):
+        def time_program(raw_time_program, mode_key_name=""):
+            return mapper._map_time_program(raw_time_program, mode_key_name)
+
+        return mock.patch.object(mapper, 'time_program', time_program)
+
+    def _retained_size(self, create_system):
+        """
+        Memory kept alive by each system, in bytes
+        """
+        gc.collect()
+        tracemalloc.start()
+        try:
+            start = tracemalloc.get_traced_memory()[0]
+            systems = [create_system() for _ in range(20)]
+            responses.calls.reset()
+            for response in responses.registered():
+                response.calls.reset()
+            gc.collect()
+            return (tracemalloc.get_traced_memory()[0] - start) / len(systems)
+        finally:
+            tracemalloc.stop()
+
+    def _load_system_files(self):
+        with open(TestUtil.path('files/responses/livereport'), 'r') as file:
+            livereport_data = json.loads(file.read())
+
+        with open(TestUtil.path('files/responses/rooms'), 'r') as file:
+            rooms_data = json.loads(file.read())
+
+        with open(TestUtil.path('files/responses/systemcontrol'), 'r') as file:
+            system_data = json.loads(file.read())
+
+        with open(TestUtil.path('files/responses/hvacstate'), 'r') as file:
+            hvacstate_data = json.loads(file.read())
+
+        return hvacstate_data, livereport_data, rooms_data, system_data
+
+    def _mock_urls_with_latency(self, hvacstate_data, livereport_data, rooms_data, serial, system_data, latency):
+        def delayed(data):
+            def callback(request):
+                time.sleep(latency)
+                return 200, {}, json.dumps(data)
+            return callback
+
+        responses.add_callback(responses.GET, Urls.live_report().format(serial_number=serial),
+                               callback=delayed(livereport_data))
+        responses.add_callback(responses.GET, Urls.rooms().format(serial_number=serial), callback=delayed(rooms_data))
+        responses.add_callback(responses.GET, Urls.system().format(serial_number=serial), callback=delayed(system_data))
+        responses.add_callback(responses.GET, Urls.hvac().format(serial_number=serial),
+                               callback=delayed(hvacstate_data))
+
+    def _time_get_system(self, manager):
+        start = time.perf_counter()
+        manager.get_system()
+        return time.perf_counter() - start
+
     def _mock_urls(self, hvacstate_data, livereport_data, rooms_data, serial, system_data):
         responses.add(responses.GET, Urls.live_report().format(serial_number=serial), json=livereport_data,
                       status=200)
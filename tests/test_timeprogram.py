@@ -1,9 +1,21 @@
+import copy
+import math
+import time
 import unittest
-from datetime import datetime
+from datetime import datetime, timedelta
+from unittest.mock import patch
 
 from vr900connector.model import TimeProgramDaySetting, TimeProgramDay, TimeProgram, HeatingMode
 
 
+def _has_numpy():
+    try:
+        import numpy  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
 class TimeProgramTest(unittest.TestCase):
 
     def test_time_program_simple(self):
@@ -42,9 +54,251 @@ class TimeProgramTest(unittest.TestCase):
         current = timeprogram.get_time_program_for(datetime(2019, 2, 18, 0, 30))
         self._assert(tpds_sunday, current)
 
+    def test_time_program_exactly_at_start(self):
+        tpds1 = TimeProgramDaySetting('00:00', 25, HeatingMode.ON)
+        tpds2 = TimeProgramDaySetting('02:00', 20, HeatingMode.OFF)
+        tpds3 = TimeProgramDaySetting('05:00', 22, HeatingMode.ON)
+
+        timeprogram = TimeProgram({'monday': TimeProgramDay([tpds1, tpds2, tpds3])})
+
+        self.assertIs(tpds2, timeprogram.get_time_program_for(datetime(2019, 2, 18, 2, 0)))
+        self.assertIs(tpds2, timeprogram.get_time_program_for(datetime(2019, 2, 18, 4, 59)))
+        self.assertIs(tpds3, timeprogram.get_time_program_for(datetime(2019, 2, 18, 5, 0)))
+
+    def test_time_program_wrap_around_week(self):
+        tpds_monday = TimeProgramDaySetting('06:00', 21, HeatingMode.ON)
+        tpds_saturday = TimeProgramDaySetting('22:00', 17, HeatingMode.OFF)
+
+        timeprogram = TimeProgram({'monday': TimeProgramDay([tpds_monday]), 'tuesday': TimeProgramDay([]),
+                                   'saturday': TimeProgramDay([tpds_saturday])})
+
+        self.assertIs(tpds_saturday, timeprogram.get_time_program_for(datetime(2019, 2, 18, 5, 0)))
+        self.assertIs(tpds_monday, timeprogram.get_time_program_for(datetime(2019, 2, 20, 12, 0)))
+        self.assertIs(tpds_saturday, timeprogram.get_time_program_for(datetime(2019, 2, 24, 12, 0)))
+
+    def test_time_program_empty(self):
+        self.assertIsNone(TimeProgram({}).get_time_program_for(datetime(2019, 2, 18, 5, 0)))
+
+    def test_setting_immutable(self):
+        tpds = TimeProgramDaySetting('06:00', 21, HeatingMode.ON)
+
+        with self.assertRaises(AttributeError):
+            tpds.target_temperature = 25
+        self.assertIs(tpds, copy.deepcopy(tpds))
+
+    def test_time_program_immutable(self):
+        tpds1 = TimeProgramDaySetting('06:00', 21, HeatingMode.ON)
+        tpds2 = TimeProgramDaySetting('22:00', 17, HeatingMode.ON)
+        settings = [tpds1]
+        monday = TimeProgramDay(settings)
+        days = {'monday': monday}
+        timeprogram = TimeProgram(days)
+        self.assertIs(tpds1, timeprogram.get_time_program_for(datetime(2019, 2, 18, 23, 0)))
+
+        settings.append(tpds2)
+        days['tuesday'] = TimeProgramDay([tpds2])
+        with self.assertRaises(AttributeError):
+            monday.time_program_day_settings.append(tpds2)
+        with self.assertRaises(AttributeError):
+            monday.time_program_day_settings = [tpds2]
+        with self.assertRaises(TypeError):
+            timeprogram.time_program_days['monday'] = TimeProgramDay([tpds2])
+        with self.assertRaises(AttributeError):
+            timeprogram.time_program_days = {}
+
+        self.assertEqual((tpds1,), monday.time_program_day_settings)
+        self.assertEqual(['monday'], list(timeprogram.time_program_days))
+        self.assertIs(tpds1, timeprogram.get_time_program_for(datetime(2019, 2, 18, 23, 0)))
+        self.assertIs(timeprogram, copy.deepcopy(timeprogram))
+
+    def test_lookup_benchmark(self):
+        """
+        Compiled lookups must be much faster than the previous implementation (day name formatting, linear scan and
+        copy of the setting)
+        """
+        settings = [TimeProgramDaySetting('{:02d}:{:02d}'.format(hour, minute), 20, HeatingMode.ON)
+                    for hour in range(0, 24, 3) for minute in (0, 30)]
+        timeprogram = TimeProgram(dict((day, TimeProgramDay(settings)) for day in
+                                       ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday',
+                                        'sunday')))
+        dates = [datetime(2019, 2, 18) + timedelta(minutes=7 * minute) for minute in range(5000)]
+
+        start = time.perf_counter()
+        for date in dates:
+            self._legacy_get_time_program_for(timeprogram, date)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for date in dates:
+            timeprogram.get_time_program_for(date)
+        compiled_time = time.perf_counter() - start
+
+        self.assertLess(compiled_time * 3, legacy_time)
+
+    def test_evaluate(self):
+        timeprogram = self._week_time_program()
+        start = datetime(2019, 2, 23, 21, 58, 30)
+        end = start + timedelta(days=8)
+        step = timedelta(minutes=7)
+
+        temperatures, modes = timeprogram.evaluate(start, end, step)
+
+        self.assertEqual(math.ceil((end - start) / step), len(temperatures))
+        self.assertEqual(len(temperatures), len(modes))
+        for index in range(len(temperatures)):
+            setting = timeprogram.get_time_program_for(start + index * step)
+            if setting.target_temperature is None:
+                self.assertTrue(math.isnan(temperatures[index]))
+            else:
+                self.assertEqual(setting.target_temperature, temperatures[index])
+            expected_mode = list(HeatingMode).index(setting.mode) if setting.mode else -1
+            self.assertEqual(expected_mode, modes[index])
+
+    def test_evaluate_array_fallback(self):
+        with patch('vr900connector.model.timeprogram._numpy', return_value=None):
+            temperatures, modes = self._week_time_program().evaluate(datetime(2019, 2, 18, 5, 59),
+                                                                     datetime(2019, 2, 18, 6, 2))
+
+        self.assertEqual('d', temperatures.typecode)
+        self.assertEqual('b', modes.typecode)
+        self.assertTrue(math.isnan(temperatures[0]))
+        self.assertEqual([21, 21], list(temperatures[1:]))
+
+    @unittest.skipUnless(_has_numpy(), 'numpy is not installed')
+    def test_evaluate_numpy(self):
+        import numpy
+
+        temperatures, modes = self._week_time_program().evaluate(datetime(2019, 2, 18, 5, 59),
+                                                                 datetime(2019, 2, 18, 6, 2))
+
+        self.assertIsInstance(temperatures, numpy.ndarray)
+        self.assertEqual([-1, 1, 1], modes.tolist())
+
+    def test_evaluate_empty(self):
+        temperatures, modes = TimeProgram({}).evaluate(datetime(2019, 2, 18), datetime(2019, 2, 18, 0, 10))
+
+        self.assertEqual(10, len(temperatures))
+        self.assertTrue(all(math.isnan(temperature) for temperature in temperatures))
+        self.assertEqual([-1] * 10, list(modes))
+
+    def test_evaluate_wrong_step(self):
+        self.assertRaises(ValueError, TimeProgram({}).evaluate, datetime(2019, 2, 18), datetime(2019, 2, 19),
+                          timedelta(0))
+
+    def test_evaluate_benchmark(self):
+        """
+        Evaluating a week at 1 minute resolution must be much faster than a lookup per minute
+        """
+        timeprogram = self._week_time_program()
+        start = datetime(2019, 2, 18)
+
+        begin = time.perf_counter()
+        for minute in range(7 * 24 * 60):
+            timeprogram.get_time_program_for(start + timedelta(minutes=minute))
+        lookups_time = time.perf_counter() - begin
+
+        begin = time.perf_counter()
+        timeprogram.evaluate(start, start + timedelta(days=7))
+        evaluate_time = time.perf_counter() - begin
+
+        self.assertLess(evaluate_time * 3, lookups_time)
+
+    def test_next_transition(self):
+        timeprogram = self._week_time_program()
+
+        change_date, setting = timeprogram.next_transition(datetime(2019, 2, 18, 6, 0))
+
+        self.assertEqual(datetime(2019, 2, 18, 22, 0), change_date)
+        self.assertEqual('22:00', setting.start_time)
+
+    def test_next_transition_wrap_around_week(self):
+        tpds_monday = TimeProgramDaySetting('06:00', 21, HeatingMode.ON)
+        tpds_saturday = TimeProgramDaySetting('22:00', 17, HeatingMode.OFF)
+        timeprogram = TimeProgram({'monday': TimeProgramDay([tpds_monday]),
+                                   'saturday': TimeProgramDay([tpds_saturday])})
+
+        self.assertEqual((datetime(2019, 2, 25, 6, 0), tpds_monday),
+                         timeprogram.next_transition(datetime(2019, 2, 23, 22, 0)))
+        self.assertEqual((datetime(2019, 2, 23, 22, 0), tpds_saturday),
+                         timeprogram.next_transition(datetime(2019, 2, 23, 21, 59, 59)))
+
+    def test_next_transition_never(self):
+        settings = [TimeProgramDaySetting('06:00', 21, HeatingMode.ON),
+                    TimeProgramDaySetting('22:00', 21, HeatingMode.ON)]
+        timeprogram = TimeProgram({'monday': TimeProgramDay(settings)})
+
+        self.assertIsNone(timeprogram.next_transition(datetime(2019, 2, 18)))
+        self.assertIsNone(TimeProgram({}).next_transition(datetime(2019, 2, 18)))
+        self.assertEqual([], list(timeprogram.transitions(datetime(2019, 2, 18))))
+
+    def test_next_transition_does_not_scan_settings(self):
+        reads = []
+
+        class CountingSetting(TimeProgramDaySetting):
+            __slots__ = ()
+
+            def __getattribute__(self, name):
+                if name == 'target_temperature':
+                    reads.append(self)
+                return super().__getattribute__(name)
+
+        settings = [CountingSetting('{:02d}:{:02d}'.format(minute // 60, minute % 60), 17 + minute % 2, None)
+                    for minute in range(0, 24 * 60, 15)]
+        timeprogram = TimeProgram(dict((day, TimeProgramDay(settings)) for day in
+                                       ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')))
+        timeprogram.next_transition(datetime(2019, 2, 18, 6, 0))
+        reads.clear()
+
+        change_date, setting = timeprogram.next_transition(datetime(2019, 2, 20, 6, 0))
+
+        self.assertEqual(datetime(2019, 2, 20, 6, 15), change_date)
+        self.assertLessEqual(len(reads), 4)
+
+    def test_transitions_skip_same_setting(self):
+        monday = [TimeProgramDaySetting('06:00', 21, HeatingMode.ON),
+                  TimeProgramDaySetting('08:00', 21, HeatingMode.ON),
+                  TimeProgramDaySetting('22:00', 17, HeatingMode.OFF)]
+        tuesday = [TimeProgramDaySetting('06:00', 21, HeatingMode.ON)]
+        timeprogram = TimeProgram({'monday': TimeProgramDay(monday), 'tuesday': TimeProgramDay(tuesday)})
+
+        transitions = list(timeprogram.transitions(datetime(2019, 2, 18), datetime(2019, 2, 26, 7, 0)))
+
+        self.assertEqual([datetime(2019, 2, 18, 22, 0), datetime(2019, 2, 19, 6, 0), datetime(2019, 2, 25, 22, 0),
+                          datetime(2019, 2, 26, 6, 0)], [transition[0] for transition in transitions])
+
+    def test_transitions_lazy(self):
+        transitions = self._week_time_program().transitions(datetime(2019, 2, 18))
+
+        first = [next(transitions) for _ in range(3)]
+
+        self.assertEqual([datetime(2019, 2, 18, 6, 0), datetime(2019, 2, 18, 22, 0), datetime(2019, 2, 19, 6, 0)],
+                         [transition[0] for transition in first])
+
     def test_wrong_start_time(self):
         self.assertRaises(ValueError, TimeProgramDaySetting, 'xx', 25, 'Test1')
 
+    def _week_time_program(self):
+        days = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+        settings = [TimeProgramDaySetting('06:00', 21, HeatingMode.ON), TimeProgramDaySetting('22:00', None, None)]
+        return TimeProgram(dict((day, TimeProgramDay(settings)) for day in days))
+
+    def _legacy_get_time_program_for(self, timeprogram, search_date):
+        day = search_date.strftime("%A").lower()
+        day_before = (search_date - timedelta(days=1)).strftime("%A").lower()
+        time_string = str(search_date.hour) + ':' + str(search_date.minute)
+        absolute_minute = TimeProgramDaySetting.to_absolute_minute(time_string)
+        settings = timeprogram.time_program_days[day].time_program_day_settings
+
+        if absolute_minute < settings[0].absolute_minutes:
+            return self._copy(timeprogram.time_program_days[day_before].time_program_day_settings[-1])
+        for idx in range(len(settings) - 1):
+            if settings[idx].absolute_minutes < absolute_minute < settings[idx + 1].absolute_minutes:
+                return self._copy(settings[idx])
+        return self._copy(settings[-1])
+
+    def _copy(self, setting):
+        return TimeProgramDaySetting(setting.start_time, setting.target_temperature, setting.mode)
+
     def _assert(self, expected, actual):
         self.assertEqual(expected.target_temperature, actual.target_temperature)
         self.assertEqual(expected.mode, actual.mode)
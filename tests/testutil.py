@@ -1,14 +1,55 @@
+import ast
+import importlib
+import importlib.abc
+import importlib.machinery
+import importlib.util
 import json
 import os
+import sys
 import tempfile
 import uuid
 import responses
 
+from vr900connector import model
 from vr900connector.api import Urls
 
 
+class _DictBasedModelLoader(importlib.machinery.SourceFileLoader):
+    """
+    Compile a module of the model package without the ``__slots__`` of its classes, the bytecode cache is not used
+    """
+
+    def get_code(self, fullname):
+        tree = ast.parse(self.get_data(self.path))
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ClassDef):
+                node.body = [statement for statement in node.body if not _is_slots(statement)] or [ast.Pass()]
+        return compile(ast.fix_missing_locations(tree), self.path, 'exec', dont_inherit=True)
+
+
+def _is_slots(statement):
+    return isinstance(statement, ast.Assign) \
+        and any(isinstance(target, ast.Name) and target.id == '__slots__' for target in statement.targets)
+
+
+class _DictBasedModelFinder(importlib.abc.MetaPathFinder):
+
+    def find_spec(self, fullname, path, target=None):
+        if fullname != TestUtil.DICT_BASED_MODEL and not fullname.startswith(TestUtil.DICT_BASED_MODEL + '.'):
+            return None
+
+        model_path = os.path.dirname(model.__file__)
+        module_name = fullname[len(TestUtil.DICT_BASED_MODEL) + 1:]
+        location = os.path.join(model_path, (module_name or '__init__') + '.py')
+        return importlib.util.spec_from_file_location(fullname, location,
+                                                      loader=_DictBasedModelLoader(fullname, location),
+                                                      submodule_search_locations=None if module_name else [model_path])
+
+
 class TestUtil:
 
+    DICT_BASED_MODEL = 'vr900connector._dict_based_model'
+
     @classmethod
     def path(cls, file):
         return os.path.join(os.path.dirname(__file__), file)
@@ -20,10 +61,23 @@ class TestUtil:
         return path
 
     @classmethod
-    def mock_full_auth_success(cls, ):
+    def dict_based_mapper(cls):
+        """
+        :class:`~vr900connector.model.Mapper` of a copy of the model package without ``__slots__``, creating objects
+        with an instance dictionary as they were before being slotted
+        """
+        finder = _DictBasedModelFinder()
+        sys.meta_path.insert(0, finder)
+        try:
+            return importlib.import_module(cls.DICT_BASED_MODEL + '.mapper').Mapper
+        finally:
+            sys.meta_path.remove(finder)
+
+    @classmethod
+    def mock_full_auth_success(cls, facilities='facilities'):
         TestUtil.mock_authentication_success()
         TestUtil.mock_token_success()
-        return TestUtil.mock_serial_success()
+        return TestUtil.mock_serial_success(facilities)
 
     @classmethod
     def mock_token_success(cls, ):
@@ -38,14 +92,40 @@ class TestUtil:
                       headers={"Set-Cookie": "test=value; path=/; Secure; HttpOnly"})
 
     @classmethod
-    def mock_serial_success(cls):
-        with open(TestUtil.path('files/responses/facilities'), 'r') as file:
+    def mock_serial_success(cls, facilities='facilities'):
+        with open(TestUtil.path('files/responses/' + facilities), 'r') as file:
             facilities_data = json.loads(file.read())
 
         responses.add(responses.GET, Urls.facilities_list(), json=facilities_data, status=200)
 
         return facilities_data["body"]["facilitiesList"][0]["serialNumber"]
 
+    @classmethod
+    def serial_numbers(cls, facilities='facilities'):
+        with open(TestUtil.path('files/responses/' + facilities), 'r') as file:
+            facilities_data = json.loads(file.read())
+
+        return [facility["serialNumber"] for facility in facilities_data["body"]["facilitiesList"]]
+
     @classmethod
     def mock_logout(cls):
         responses.add(responses.POST, Urls.logout(), status=200, headers={"Set-Cookies": ""})
+
+    @classmethod
+    def mock_full_auth_success_async(cls, mocked, facilities='facilities'):
+        TestUtil.mock_token_success_async(mocked)
+        mocked.post(Urls.authenticate(), headers={"Set-Cookie": "test=value; path=/; Secure; HttpOnly"}, repeat=True)
+
+        with open(TestUtil.path('files/responses/' + facilities), 'r') as file:
+            facilities_data = json.loads(file.read())
+
+        mocked.get(Urls.facilities_list(), payload=facilities_data, repeat=True)
+
+        return facilities_data["body"]["facilitiesList"][0]["serialNumber"]
+
+    @classmethod
+    def mock_token_success_async(cls, mocked):
+        with open(TestUtil.path('files/responses/token'), 'r') as file:
+            token_data = json.loads(file.read())
+
+        mocked.post(Urls.new_token(), payload=token_data, repeat=True)
@@ -1,4 +1,12 @@
 import logging
 
+from .util import LazyImport
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s:%(levelname)s:%(name)s: %(message)s")
 
+# Not exported before python 3.7: importing them eagerly would import the HTTP stack with any subpackage
+LazyImport.install(globals(), [
+    ('SystemManager', 'systemmanager'),
+    ('PollScheduler', 'pollscheduler'),
+    ('FleetManager', 'fleetmanager')
+], eager=False)
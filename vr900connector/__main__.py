@@ -1,16 +1,120 @@
-import json
-import inspect
+import argparse
+import sys
+
+from vr900connector.api import Defaults
+
+_METHODS = ['GET', 'PUT', 'POST', 'DELETE']
+
+_BATCH_WORKERS = 4
+
+# Arguments of each method of vr900connector.api.Urls available as a command, except login and logout urls. Kept here
+# so the CLI doesn't need to inspect Urls on startup, tests check it is up to date
+_COMMANDS = {
+    'circulation': ('dhw_id',),
+    'circulation_configuration': ('dhw_id',),
+    'circulation_timeprogram': ('dhw_id',),
+    'delete_repeater': ('sgtin',),
+    'dhw': ('dhw_id',),
+    'emf_report': (),
+    'emf_report_device': ('device_id', 'energy_type', 'function', 'time_range', 'start', 'offset'),
+    'facilities_default_settings': (),
+    'facilities_details': (),
+    'facilities_installer_info': (),
+    'facilities_list': (),
+    'facilities_settings': (),
+    'facilities_status': (),
+    'hot_water': ('dhw_id',),
+    'hot_water_configuration': ('dhw_id',),
+    'hot_water_operation_mode': ('dhw_id',),
+    'hot_water_temperature_setpoint': ('dhw_id',),
+    'hot_water_timeprogram': ('dhw_id',),
+    'hvac': (),
+    'hvac_update': (),
+    'live_report': (),
+    'live_report_device': ('device_id', 'report_id'),
+    'photovoltaics': (),
+    'rbr_installation_status': (),
+    'rbr_underfloor_heating_status': (),
+    'repeaters': (),
+    'room': ('room_index',),
+    'room_configuration': ('room_index',),
+    'room_operation_mode': ('room_index',),
+    'room_quick_veto': ('room_index',),
+    'room_set_child_lock': ('room_index',),
+    'room_set_device_name': ('room_index', 'sgtin'),
+    'room_set_name': ('room_index',),
+    'room_set_temperature_setpoint': ('room_index',),
+    'room_timeprogram': ('room_index',),
+    'rooms': (),
+    'set_repeater_name': ('sgtin',),
+    'set_ventilation_day_level': ('ventilation_id',),
+    'set_ventilation_night_level': ('ventilation_id',),
+    'set_ventilation_operation_mode': ('ventilation_id',),
+    'system': (),
+    'system_configuration': (),
+    'system_datetime': (),
+    'system_holiday_mode': (),
+    'system_parameters': (),
+    'system_quickmode': (),
+    'system_status': (),
+    'ventilation': ('ventilation_id',),
+    'ventilation_configuration': ('ventilation_id',),
+    'ventilation_timeprogram': ('ventilation_id',),
+    'zone': ('zone_id',),
+    'zone_configuration': ('zone_id',),
+    'zone_cooling_configuration': ('zone_id',),
+    'zone_cooling_manual_setpoint_temperature': ('zone_id',),
+    'zone_cooling_mode': ('zone_id',),
+    'zone_cooling_setpoint_temperature': ('zone_id',),
+    'zone_cooling_timeprogram': ('zone_id',),
+    'zone_heating_configuration': ('zone_id',),
+    'zone_heating_mode': ('zone_id',),
+    'zone_heating_setback_temperature': ('zone_id',),
+    'zone_heating_setpoint_temperature': ('zone_id',),
+    'zone_heating_timeprogram': ('zone_id',),
+    'zone_name': ('zone_id',),
+    'zone_quick_veto': ('zone_id',),
+    'zones': ()
+}
 
-from vr900connector.api import ApiConnector, ApiError, Defaults, Urls
 
-import argparse
+def main():
+    args = _parse_args(sys.argv[1:])
 
-_IGNORE_LIST = ['new_token', 'authenticate', 'logout']
+    from vr900connector.api import ApiConnector, ApiError
+    connector = ApiConnector(args.username, args.password, Defaults.SMART_PHONE_ID, args.file_path)
 
+    if args.batch:
+        _batch(connector, args)
+        return
 
-def main():
+    try:
+        url = _get_url(args.command, args.arguments)
+        if args.output:
+            with open(args.output, 'wb') as output:
+                connector.query(url, args.method, output=output)
+        elif args.raw:
+            connector.query(url, args.method, output=sys.stdout.buffer)
+            sys.stdout.buffer.flush()
+        else:
+            import json
+            result = connector.query(url, args.method)
+            print(json.dumps(result, indent=4))
+    except ApiError as e:
+        print('Error from {}: {}'.format(e.response.url, e.response.text))
+
+
+def _parse_args(argv):
+    """
+    Parse the common arguments, then only the arguments of the selected command
+    """
     parser = argparse.ArgumentParser(
-        description='Read states of vaillant API')
+        description='Read states of vaillant API',
+        add_help=False)
+    parser.add_argument(
+        '-h', '--help',
+        help='show this help message (or the help of the command) and exit',
+        action='store_true')
     parser.add_argument(
         'username',
         help='username')
@@ -22,53 +126,114 @@ def main():
         help='File path to store cookie and serial number in',
         default=Defaults.FILES_PATH,
         dest='file_path')
+    parser.add_argument(
+        '--raw',
+        help='Print the response as received from the API, without decoding and formatting it',
+        action='store_true')
+    parser.add_argument(
+        '-o', '--output',
+        help='Write the response as received from the API to this file instead of printing it',
+        dest='output')
+    parser.add_argument(
+        '--batch',
+        help='Run the commands listed in this file (- for stdin), one command per line, e.g. "zone Control_ZO1", '
+             'optionally prefixed by an HTTP method. Results are written as JSON lines, in the same order',
+        dest='batch')
+    parser.add_argument(
+        '--workers',
+        help='Number of commands of a batch running at the same time',
+        type=int,
+        default=_BATCH_WORKERS)
     parser.add_argument('method', help='HTTP method')
+    parser.add_argument(
+        'command',
+        help='command, use "COMMAND -h" to get its arguments',
+        nargs='?',
+        choices=sorted(_COMMANDS))
+    parser.add_argument(
+        'arguments',
+        help=argparse.SUPPRESS,
+        nargs='*')
+
+    if ('-h' in argv or '--help' in argv) and not any(arg in _COMMANDS for arg in argv):
+        parser.print_help()
+        parser.exit()
+
+    args = parser.parse_args(argv)
+    if args.command is None:
+        if not args.batch:
+            parser.error('a command or --batch is required')
+        return args
+
+    from vr900connector.api import Urls
+    command_parser = argparse.ArgumentParser(
+        prog='{} {} {}'.format(parser.prog, args.method, args.command),
+        description=getattr(Urls, args.command).__doc__.strip())
+    for name in _COMMANDS[args.command]:
+        command_parser.add_argument(name, help=name)
+    command_args = command_parser.parse_args(args.arguments + (['-h'] if args.help else []))
+    args.arguments = [getattr(command_args, name) for name in _COMMANDS[args.command]]
+    return args
+
+
+def _batch(connector, args):
+    lines = sys.stdin if args.batch == '-' else open(args.batch, 'r')
+    output = open(args.output, 'wb') if args.output else sys.stdout.buffer
+    try:
+        _run_batch(connector, lines, output, args.method, args.workers)
+    finally:
+        if lines is not sys.stdin:
+            lines.close()
+        if output is sys.stdout.buffer:
+            output.flush()
+        else:
+            output.close()
 
-    commands_parser = parser.add_subparsers(
-        help='commands',
-        dest='command')
 
-    functions_list = inspect.getmembers(Urls, predicate=inspect.ismethod)
+def _run_batch(connector, lines, output, method: str = 'GET', workers: int = _BATCH_WORKERS):
+    """
+    Run commands concurrently over the same connector and write one JSON line per command to the binary output, in
+    the order of the commands. Empty lines and lines starting with # are ignored
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from vr900connector.util import JsonCodec
 
-    for function in functions_list:
-        if not function[0] in _IGNORE_LIST:
-            function_parser = commands_parser.add_parser(
-                function[0],
-                help=function[1].__doc__.strip())
+    commands = [line.strip() for line in lines if line.strip() and not line.strip().startswith('#')]
 
-            for item in inspect.signature(function[1]).parameters.items():
-                function_parser.add_argument(item[0], help=item[0])
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for result in executor.map(lambda command: _run_command(connector, command, method), commands):
+            output.write(JsonCodec.dumps(result) + b'\n')
 
-    args = parser.parse_args()
 
-    connector = ApiConnector(args.username, args.password, Defaults.SMART_PHONE_ID, args.file_path)
+def _run_command(connector, command: str, method: str):
+    import shlex
+    from vr900connector.api import ApiError
 
     try:
-        url = _get_url(args)
-        result = connector.query(url, args.method)
-        print(json.dumps(result, indent=4))
+        tokens = shlex.split(command)
+        if tokens and tokens[0].upper() in _METHODS:
+            method = tokens.pop(0).upper()
+        if not tokens:
+            raise ValueError('Unknown command')
+
+        url = _get_url(tokens[0], tokens[1:])
+        return {'command': command, 'result': connector.query(url, method)}
     except ApiError as e:
-        print('Error from {}: {}'.format(e.response.url, e.response.text))
-
-
-def _get_url(args):
-    function = getattr(Urls, args.command)
-    arg_names = _get_args_name(function)
-
-    arg_values = []
-    parsed = vars(args)
-    for name in arg_names:
-        arg_values.append(parsed[name])
+        status = e.response.status_code if e.response is not None else None
+        return {'command': command, 'error': e.message, 'status': status}
+    except ValueError as e:
+        return {'command': command, 'error': str(e)}
 
-    f_kwargs = dict(zip(arg_names, arg_values))
-    return function(**f_kwargs)
 
+def _get_url(command: str, arguments):
+    from vr900connector.api import Urls
 
-def _get_args_name(function):
-    names = []
-    for item in inspect.signature(function).parameters.items():
-        names.append(item[0])
-    return names
+    arg_names = _COMMANDS.get(command)
+    if arg_names is None:
+        raise ValueError('Unknown command')
+    if len(arguments) != len(arg_names):
+        raise ValueError('Expected arguments: {}'.format(', '.join(arg_names) or 'none'))
+    return getattr(Urls, command)(**dict(zip(arg_names, arguments)))
 
 
 if __name__ == "__main__":
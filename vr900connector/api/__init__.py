@@ -1,5 +1,14 @@
-from .defaults import Defaults
-from .payloads import Payloads
-from .urls import Urls
-from .apierror import ApiError
-from .apiconnector import ApiConnector
+from ..util import LazyImport
+
+LazyImport.install(globals(), [
+    ('Defaults', 'defaults'),
+    ('Payloads', 'payloads'),
+    ('Urls', 'urls'),
+    ('ApiError', 'apierror'),
+    ('ResponseCache', 'responsecache'),
+    ('SessionStore', 'sessionstore'),
+    ('MemorySessionStore', 'sessionstore'),
+    ('FileSessionStore', 'sessionstore'),
+    ('ApiConnector', 'apiconnector'),
+    ('SessionRefresher', 'sessionrefresher')
+])
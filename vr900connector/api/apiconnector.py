@@ -1,14 +1,23 @@
 import logging
+import threading
+from concurrent.futures import Future
+from time import monotonic
+from typing import Dict, List
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from . import Urls, ApiError, Defaults
-from ..util import FileUtils
+from . import Urls, ApiError, Defaults, ResponseCache, SessionStore, FileSessionStore
+from ..util import JsonCodec
 
 _LOGGER = logging.getLogger('Connector')
 
 _JSON_CONTENT_TYPE_HEADER = {'content-type': 'application/json'}
 
+_RETRY_METHODS = frozenset(['GET'])
+_RETRY_STATUS = frozenset([502, 503, 504])
+
 
 class ApiConnector:
     """
@@ -26,27 +35,73 @@ class ApiConnector:
 
     Please use :mod:`vr900connector.api.urls` in order to generate URL to be passed to the connector.
 
+    Facilities of the account are enumerated once, on login, see :func:`facilities`. ``{serial_number}`` in urls is
+    replaced by the serial number given to each call, or by the serial number of the first facility, so one connector
+    (and one session) is enough to work with every facility of the account.
+
+    The connector can be shared between threads. Login is done by only one thread at a time and when several calls
+    receive a 401 for the same expired session, only one re-login is done, other calls wait and retry with the new
+    cookies. When connectors share a session store, a connector receiving a 401 first uses the cookies saved in the
+    store by another connector (if they are not the ones which failed), so only one connector logs in again. Identical
+    GET sent at the same time by several threads are coalesced: only one request is sent to the API and every caller
+    receives the same JSON. A GET sent after a PUT, POST or DELETE to the same resource is never coalesced with a GET
+    sent before it.
+
+    HTTP connections are pooled and kept alive, the pool is kept when the connector logs in again. Connection errors
+    are retried with a backoff, as well as GET failing with HTTP 502, 503 or 504.
+
+    Responses are decoded and payloads are encoded with :class:`vr900connector.util.JsonCodec`, which uses a fast JSON
+    library when one is installed.
+
+    GET responses can be cached by giving a :class:`vr900connector.api.ResponseCache`, cached responses of a resource
+    are invalidated when the connector sends a PUT, POST or DELETE to this resource, and responses of GET sent before
+    the write are not cached.
+
     Args:
         user: User for login
         password: Password for login
         smart_phone_id: Smart phone id required by the API
         file_path: Where to store files created by this connector. Cookies and serial number are saved to avoid doing
-        re-login between sessions
+        re-login between sessions, ignored when a session store is given
+        cache: Cache for GET responses, responses are not cached if not provided
+        pool_maxsize: Maximum number of HTTP connections kept open to the API
+        max_retries: Number of retries on connection errors and on idempotent requests failing with HTTP 502, 503 or 504
+        backoff_factor: Backoff factor between retries, see :class:`urllib3.util.retry.Retry`
+        session_store: Where to keep cookies and serial number, a
+        :class:`vr900connector.api.FileSessionStore` in ``file_path`` if not provided. Connectors of the same account
+        can share a store
+        http_adapter: HTTP adapter (and its connection pool) to use, connectors of different accounts can share one,
+        see :func:`create_http_adapter`. ``pool_maxsize``, ``max_retries`` and ``backoff_factor`` are ignored when
+        provided
     """
 
     def __init__(self, user: str, password: str, smart_phone_id: str = Defaults.SMART_PHONE_ID,
-                 file_path: str = Defaults.FILES_PATH):
+                 file_path: str = Defaults.FILES_PATH, cache: ResponseCache = None,
+                 pool_maxsize: int = Defaults.POOL_MAXSIZE, max_retries: int = Defaults.MAX_RETRIES,
+                 backoff_factor: float = Defaults.BACKOFF_FACTOR, session_store: SessionStore = None,
+                 http_adapter: HTTPAdapter = None):
         self._user = user
         self._password = password
         self._smart_phone_Id = smart_phone_id
-        self._file_path = file_path
-        self._serial_number = self._load_serial_number_from_file()
+        self._session_store = session_store if session_store is not None else FileSessionStore(file_path)
+        self._login_lock = threading.RLock()
+        self._session_generation = 0
+        self._cache = cache
+        self._in_flight = dict()
+        self._in_flight_lock = threading.Lock()
+        self._last_call = monotonic()
+        self._pool_maxsize = pool_maxsize
+        self._max_retries = max_retries
+        self._backoff_factor = backoff_factor
+        self._http_adapter = http_adapter
+        self._serial_number = self._session_store.get_serial_number()
+        self._facilities = self._session_store.get_facilities()
         self._session = self._create_or_load_session()
 
     def logout(self):
         """
         To get logged out of the API. It means, the connector will have to request a new token and ask for cookies.
-        Files generated by the connector are also deleted
+        The session store is also cleared
         """
         response = None
         try:
@@ -54,79 +109,220 @@ class ApiConnector:
         except Exception as e:
             raise ApiError("Error during logout", response) from e
         finally:
-            self._clear_session()
+            with self._login_lock:
+                self._clear_session()
+
+    @property
+    def session_expiry(self):
+        """
+        Earliest expiry (timestamp in seconds) of the session cookies, None if there is no session or if cookies don't
+        expire
+        """
+        cookies = self._session.cookies
+        expires = [cookie.expires for cookie in cookies if cookie.expires] if cookies else []
+        return min(expires) if expires else None
+
+    @property
+    def idle_time(self) -> float:
+        """
+        Seconds since the last call to the API
+        """
+        return monotonic() - self._last_call
 
-    def query(self, url: str, method: str = 'GET', payload=None):
+    def refresh_session(self):
+        """
+        Request a new token and new cookies, even if the current session is still valid
+        """
+        with self._login_lock:
+            self._login(True)
+
+    def keep_alive(self):
+        """
+        Send a lightweight request to the API, this keeps the session and the HTTP connection alive. Response is never
+        taken from the cache
+        """
+        self._secure_call('GET', Urls.facilities_list(), use_cache=False)
+
+    def facilities(self) -> List[Dict]:
+        """
+        Facilities of the account, as returned by the API (each facility has a ``serialNumber`` and a ``name``). They
+        are requested once and kept in the session store, the first one is the default facility
+        """
+        with self._login_lock:
+            self._login()
+            if self._facilities is None:
+                self._get_facilities()
+            return list(self._facilities)
+
+    def query(self, url: str, method: str = 'GET', payload=None, output=None, serial_number: str = None):
         """
         Call the vaillant API url with the chosen method, please use :mod:`vr900connector.api.urls` in order to generate
         URL to be passed to the connector
-        """
 
-        return self._secure_call(method, url, payload)
+        When an output is given, the response is not decoded: its raw bytes are streamed to the output by chunks of
+        :attr:`vr900connector.api.Defaults.STREAM_CHUNK_SIZE` and the number of bytes written is returned. Such a call
+        never uses the cache and is never coalesced with identical calls. If the connection fails while streaming, the
+        output may contain a partial response.
+
+        :param url: the url to call
+        :param method: the HTTP method
+        :param payload: the payload to send, encoded to JSON
+        :param output: binary file-like object (with a ``write`` method) receiving the response
+        :param serial_number: serial number of the facility to call, the default facility if not provided
+        :return: the decoded JSON response, or the number of bytes written to the output
+        """
+        if output is not None:
+            return self._secure_call(method, url, payload, use_cache=False, output=output, serial_number=serial_number)
+        if method == 'GET' and payload is None:
+            return self._single_flight_get(url, serial_number)
+        return self._secure_call(method, url, payload, serial_number=serial_number)
 
-    def get(self, url: str):
+    def get(self, url: str, serial_number: str = None):
         """
         GET call to a vaillant API url please use :mod:`vr900connector.api.urls` in order to generate  URL to be passed
         to the connector
         """
-        return self.query(url)
+        return self.query(url, serial_number=serial_number)
 
-    def put(self, url: str, payload=None):
+    def put(self, url: str, payload=None, serial_number: str = None):
         """
         PUT call to a vaillant API url please use :mod:`vr900connector.api.urls` in order to generate  URL to be passed
         to the connector
         """
-        return self.query(url, 'PUT', payload)
+        return self.query(url, 'PUT', payload, serial_number=serial_number)
 
-    def post(self, url: str, payload=None):
+    def post(self, url: str, payload=None, serial_number: str = None):
         """
         POST call to a vaillant API url please use :mod:`vr900connector.api.urls` in order to generate  URL to be passed
         to the connector.
         """
-        return self.query(url, 'POST', payload)
+        return self.query(url, 'POST', payload, serial_number=serial_number)
 
-    def delete(self, url: str):
+    def delete(self, url: str, serial_number: str = None):
         """
         DELETE call to a vaillant API url please use :mod:`vr900connector.api.urls` in order to generate  URL to be
         passed to the connector
         """
-        return self.query(url, 'DELETE')
+        return self.query(url, 'DELETE', serial_number=serial_number)
+
+    def _single_flight_get(self, url: str, serial_number: str = None):
+        key = (url, serial_number)
+        with self._in_flight_lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+
+        if not leader:
+            _LOGGER.debug('GET %s already in flight, waiting for its response', url)
+            return future.result()
 
-    def _secure_call(self, method: str, url: str, payload=None, re_login: bool = False):
+        try:
+            result = self._secure_call('GET', url, serial_number=serial_number)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._in_flight_lock:
+                # a write may have detached the call already
+                if self._in_flight.get(key) is future:
+                    del self._in_flight[key]
+
+    def _detach_in_flight(self, written_url: str):
+        """
+        GET in flight of resources affected by a write were sent before the write: identical GET sent afterwards must
+        not wait for them, they send their own request (same resource rule as
+        :func:`vr900connector.api.ResponseCache.invalidate`)
+        """
+        with self._in_flight_lock:
+            for url, serial_number in list(self._in_flight):
+                safe_url = url.format(serial_number=serial_number if serial_number is not None else self._serial_number)
+                if ResponseCache.is_affected(safe_url, written_url):
+                    _LOGGER.debug('GET %s in flight during a write to %s, detached', safe_url, written_url)
+                    del self._in_flight[(url, serial_number)]
+
+    def _secure_call(self, method: str, url: str, payload=None, re_login: bool = False,
+                     expired_generation: int = None, use_cache: bool = True, output=None, serial_number: str = None):
         response = None
         safe_url = None
         try:
-            self._login(re_login)
-
-            safe_url = url.format(serial_number=self._serial_number)
+            with self._login_lock:
+                # Another thread may have already logged in again since the call received a 401
+                self._login(re_login and expired_generation == self._session_generation)
+                generation = self._session_generation
+                if serial_number is None:
+                    serial_number = self._serial_number
+
+            safe_url = url.format(serial_number=serial_number)
+            cache_generation = None
+            if self._cache and method == 'GET':
+                cached = self._cache.get(safe_url) if use_cache else None
+                if cached is not None:
+                    return cached
+                cache_generation = self._cache.generation(safe_url)
+
+            self._last_call = monotonic()
             response = self._session.request(method,
                                              safe_url,
-                                             json=payload,
-                                             headers=None if payload is None else _JSON_CONTENT_TYPE_HEADER)
+                                             data=None if payload is None else JsonCodec.dumps(payload),
+                                             headers=None if payload is None else _JSON_CONTENT_TYPE_HEADER,
+                                             stream=output is not None)
+
+            if method != 'GET':
+                self._detach_in_flight(safe_url)
+                if self._cache:
+                    self._cache.invalidate(safe_url)
 
             if response.status_code > 399:
                 if not re_login and response.status_code == 401:
                     _LOGGER.debug('Call to %s failed with HTTP 401, will try to re-login', safe_url)
-                    return self._secure_call(method, url, payload, True)
+                    response.close()
+                    return self._secure_call(method, url, payload, True, generation, use_cache, output, serial_number)
                 else:
+                    if output is not None:
+                        # error body is read so it's still available to the caller, the connection goes back to the
+                        # pool
+                        response.content
+                        response.close()
                     raise ApiError('Received error from server url: ' + safe_url + ' and method ' + method,
                                    response, payload)
-            if response.text:
-                return response.json()
+            if output is not None:
+                return self._write_to(response, output)
+            if response.content:
+                result = JsonCodec.loads(response.content)
             else:
-                return {"ok": "ok"}
+                result = {"ok": "ok"}
+
+            if self._cache and method == 'GET':
+                self._cache.put(url, safe_url, result, cache_generation)
+            return result
         except ApiError:
             raise
         except Exception as e:
             raise ApiError('Cannot {} url: {}'.format(method, safe_url if safe_url else url), response, payload) from e
 
+    @classmethod
+    def _write_to(cls, response: requests.Response, output) -> int:
+        written = 0
+        try:
+            for chunk in response.iter_content(Defaults.STREAM_CHUNK_SIZE):
+                output.write(chunk)
+                written += len(chunk)
+        finally:
+            response.close()
+        return written
+
     def _login(self, force_login: bool = False):
         try:
-            if force_login:
+            if force_login and not self._load_stored_session():
                 self._clear_session()
             if not self._session.cookies:
-                self._session = self._create_or_load_session()
-                self._serial_number = self._load_serial_number_from_file()
+                self._session = self._create_or_load_session(self._session)
+                self._serial_number = self._session_store.get_serial_number()
+                self._facilities = self._session_store.get_facilities()
 
                 if not self._session.cookies:
                     _LOGGER.info(
@@ -137,7 +333,7 @@ class ApiConnector:
                     self._get_cookies(authtoken)
 
             if not self._serial_number:
-                self._get_serial_number()
+                self._get_facilities()
         except ApiError:
             raise
         except Exception as e:
@@ -151,10 +347,11 @@ class ApiConnector:
         }
 
         try:
-            response = self._session.post(Urls.new_token(), json=params, headers=_JSON_CONTENT_TYPE_HEADER)
+            response = self._session.post(Urls.new_token(), data=JsonCodec.dumps(params),
+                                          headers=_JSON_CONTENT_TYPE_HEADER)
             if response.status_code == 200:
                 _LOGGER.debug('Token generation successful')
-                return response.json()['body']['authToken']
+                return JsonCodec.loads(response.content)['body']['authToken']
             else:
                 raise ApiError('Authentication failed', response)
 
@@ -171,12 +368,13 @@ class ApiConnector:
         }
 
         try:
-            response = self._session.post(Urls.authenticate(), json=params, headers=_JSON_CONTENT_TYPE_HEADER)
+            response = self._session.post(Urls.authenticate(), data=JsonCodec.dumps(params),
+                                          headers=_JSON_CONTENT_TYPE_HEADER)
 
             if response.status_code == 200:
                 self._session.cookies = response.cookies
                 _LOGGER.debug('Cookie successfully retrieved %s', self._session.cookies)
-                self._save_cookies_to_file()
+                self._save_cookies()
             else:
                 raise ApiError('Cannot get cookies', response)
         except ApiError:
@@ -184,14 +382,16 @@ class ApiConnector:
         except Exception as e:
             raise ApiError('Error while getting cookies', None) from e
 
-    def _get_serial_number(self):
+    def _get_facilities(self):
         try:
             response = self._session.get(Urls.facilities_list())
 
             if response.status_code == 200:
                 _LOGGER.debug('Serial number successfully retrieved')
-                self._serial_number = response.json()['body']['facilitiesList'][0]['serialNumber']
-                self._save_serial_number_to_file()
+                self._facilities = JsonCodec.loads(response.content)['body']['facilitiesList']
+                self._serial_number = self._facilities[0]['serialNumber']
+                self._session_store.set_facilities(self._facilities)
+                self._session_store.set_serial_number(self._serial_number)
             else:
                 raise ApiError('Cannot get serial number', response)
         except ApiError:
@@ -199,36 +399,78 @@ class ApiConnector:
         except Exception as e:
             raise ApiError('Cannot get serial number', None) from e
 
-    def _create_or_load_session(self):
-        session = requests.Session()
-        cookies = self._load_cookies_from_file()
+    def _create_or_load_session(self, session: requests.Session = None):
+        """
+        Load cookies in the given session (or in a new one). An existing session is kept since other threads may be
+        using it
+        """
+        if session is None:
+            session = requests.Session()
+            adapter = self._http_adapter
+            if adapter is None:
+                adapter = self.create_http_adapter(self._pool_maxsize, self._max_retries, self._backoff_factor)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        cookies = self._load_cookies()
         _LOGGER.debug('Found cookies %s', cookies)
         if cookies is not None:
             session.cookies = cookies
         return session
 
-    def _clear_session(self):
-        self._clear_cookie()
-        self._clear_serial_number()
-        self._session.close()
-        self._session = requests.session()
-        FileUtils.delete_dir(self._file_path)
-
-    def _save_cookies_to_file(self):
-        FileUtils.save_to_file(self._session.cookies, self._file_path, Defaults.COOKIE_FILE_NAME)
-
-    def _save_serial_number_to_file(self):
-        FileUtils.save_to_file(self._serial_number, self._file_path, Defaults.SERIAL_NUMBER_FILE_NAME)
-
-    def _load_cookies_from_file(self):
-        return FileUtils.load_from_file(self._file_path, Defaults.COOKIE_FILE_NAME)
+    @classmethod
+    def create_http_adapter(cls, pool_maxsize: int = Defaults.POOL_MAXSIZE, max_retries: int = Defaults.MAX_RETRIES,
+                            backoff_factor: float = Defaults.BACKOFF_FACTOR) -> HTTPAdapter:
+        """
+        Create the HTTP adapter used by a connector: connections are pooled and kept alive, connection errors and
+        GET failing with HTTP 502, 503 or 504 are retried. The adapter can be shared by connectors of different
+        accounts (cookies are kept by each connector)
+        """
+        retry_args = dict(total=max_retries, connect=max_retries, read=max_retries, status=max_retries,
+                          backoff_factor=backoff_factor, status_forcelist=_RETRY_STATUS, raise_on_status=False)
+        try:
+            retry = Retry(allowed_methods=_RETRY_METHODS, **retry_args)
+        except TypeError:
+            # urllib3 < 1.26
+            retry = Retry(method_whitelist=_RETRY_METHODS, **retry_args)
 
-    def _load_serial_number_from_file(self):
-        return FileUtils.load_from_file(self._file_path, Defaults.SERIAL_NUMBER_FILE_NAME)
+        return HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=retry)
 
-    def _clear_cookie(self):
-        FileUtils.delete_file(self._file_path, Defaults.COOKIE_FILE_NAME)
+    def _load_stored_session(self) -> bool:
+        """
+        Load the session saved in the store if it's not the current one: another connector sharing the store has
+        already logged in again, so its cookies are used instead of logging in (and clearing the store)
+        """
+        stored = self._session_store.get_cookies()
+        if not stored or set((cookie['name'], cookie['value']) for cookie in stored) == \
+                set((cookie.name, cookie.value) for cookie in self._session.cookies):
+            return False
+
+        _LOGGER.debug('Session renewed in the store by another connector, will use it')
+        self._session = self._create_or_load_session(self._session)
+        self._serial_number = self._session_store.get_serial_number()
+        self._facilities = self._session_store.get_facilities()
+        self._session_generation += 1
+        return True
 
-    def _clear_serial_number(self):
-        FileUtils.delete_file(self._file_path, Defaults.SERIAL_NUMBER_FILE_NAME)
+    def _clear_session(self):
+        self._session_store.clear()
         self._serial_number = None
+        self._facilities = None
+        self._session.cookies = requests.cookies.RequestsCookieJar()
+        self._session_generation += 1
+
+    def _save_cookies(self):
+        self._session_store.set_cookies([{'name': cookie.name, 'value': cookie.value, 'domain': cookie.domain,
+                                          'path': cookie.path, 'expires': cookie.expires, 'secure': cookie.secure}
+                                         for cookie in self._session.cookies])
+
+    def _load_cookies(self):
+        cookies = self._session_store.get_cookies()
+        if cookies is None:
+            return None
+
+        jar = requests.cookies.RequestsCookieJar()
+        for cookie in cookies:
+            jar.set(cookie['name'], cookie['value'], domain=cookie.get('domain', ''), path=cookie.get('path', '/'),
+                    expires=cookie.get('expires'), secure=cookie.get('secure', False))
+        return jar
@@ -0,0 +1,314 @@
+import asyncio
+import logging
+import time
+from http.cookiejar import http2time
+from http.cookies import Morsel, SimpleCookie
+from typing import Dict, List
+
+import aiohttp
+from yarl import URL
+
+from . import Urls, ApiError, Defaults, SessionStore, FileSessionStore
+from ..util import JsonCodec
+
+_LOGGER = logging.getLogger('AsyncConnector')
+
+_JSON_CONTENT_TYPE_HEADER = {'content-type': 'application/json'}
+
+
+class AsyncApiConnector:
+    """
+    This is the asyncio version of :class:`vr900connector.api.ApiConnector`, based on aiohttp. Login, re-login on
+    HTTP 401 and serial number handling are the same, every method doing a call to the API is a coroutine. When
+    several coroutines receive a 401 for the same expired session, only one of them logs in again. Cookies saved in a
+    shared session store by another connector are used before logging in again.
+
+    Facilities are enumerated once as well and every call can address any facility of the account with its
+    ``serial_number``, the first facility is used otherwise.
+
+    Cookies and serial number are kept in the same session stores as :class:`vr900connector.api.ApiConnector`, so
+    both connectors can share a session.
+
+    The underlying :class:`aiohttp.ClientSession` is created on the first call (inside the running event loop), please
+    use :func:`close` (or ``async with``) when the connector is not needed anymore.
+
+    On error, :exc:`vr900connector.api.ApiError` is raised, its response (if any) is a :class:`aiohttp.ClientResponse`
+
+    Args:
+        user: User for login
+        password: Password for login
+        smart_phone_id: Smart phone id required by the API
+        file_path: Where to store files created by this connector. Cookies and serial number are saved to avoid doing
+        re-login between sessions, ignored when a session store is given
+        session: aiohttp session to use, if not provided, the connector creates (and closes) its own session
+        session_store: Where to keep cookies and serial number, a
+        :class:`vr900connector.api.FileSessionStore` in ``file_path`` if not provided
+    """
+
+    def __init__(self, user: str, password: str, smart_phone_id: str = Defaults.SMART_PHONE_ID,
+                 file_path: str = Defaults.FILES_PATH, session: aiohttp.ClientSession = None,
+                 session_store: SessionStore = None):
+        self._user = user
+        self._password = password
+        self._smart_phone_Id = smart_phone_id
+        self._session_store = session_store if session_store is not None else FileSessionStore(file_path)
+        self._session = session
+        self._own_session = session is None
+        self._login_lock = None
+        self._session_generation = 0
+        self._serial_number = self._session_store.get_serial_number()
+        self._facilities = self._session_store.get_facilities()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """
+        Close the underlying aiohttp session if it has been created by the connector
+        """
+        if self._session and self._own_session:
+            await self._session.close()
+            self._session = None
+
+    async def logout(self):
+        """
+        To get logged out of the API. It means, the connector will have to request a new token and ask for cookies.
+        The session store is also cleared
+        """
+        try:
+            async with self._get_session().request('POST', Urls.logout()) as response:
+                _LOGGER.debug('Logout returned HTTP %s', response.status)
+        except Exception as e:
+            raise ApiError("Error during logout", None) from e
+        finally:
+            self._clear_session()
+
+    async def facilities(self) -> List[Dict]:
+        """
+        Facilities of the account, see :func:`vr900connector.api.ApiConnector.facilities`
+        """
+        async with self._get_login_lock():
+            await self._login()
+            if self._facilities is None:
+                await self._get_facilities()
+            return list(self._facilities)
+
+    async def query(self, url: str, method: str = 'GET', payload=None, serial_number: str = None):
+        """
+        Call the vaillant API url with the chosen method, please use :mod:`vr900connector.api.urls` in order to generate
+        URL to be passed to the connector. The default facility is called if no serial number is given
+        """
+        return await self._secure_call(method, url, payload, serial_number=serial_number)
+
+    async def get(self, url: str, serial_number: str = None):
+        """
+        GET call to a vaillant API url
+        """
+        return await self.query(url, serial_number=serial_number)
+
+    async def put(self, url: str, payload=None, serial_number: str = None):
+        """
+        PUT call to a vaillant API url
+        """
+        return await self.query(url, 'PUT', payload, serial_number)
+
+    async def post(self, url: str, payload=None, serial_number: str = None):
+        """
+        POST call to a vaillant API url
+        """
+        return await self.query(url, 'POST', payload, serial_number)
+
+    async def delete(self, url: str, serial_number: str = None):
+        """
+        DELETE call to a vaillant API url
+        """
+        return await self.query(url, 'DELETE', serial_number=serial_number)
+
+    async def _secure_call(self, method: str, url: str, payload=None, re_login: bool = False,
+                           serial_number: str = None, expired_generation: int = None):
+        response = None
+        safe_url = None
+        try:
+            async with self._get_login_lock():
+                # Another coroutine may have already logged in again since the call received a 401
+                await self._login(re_login and expired_generation == self._session_generation)
+                generation = self._session_generation
+
+            safe_url = url.format(serial_number=serial_number if serial_number is not None else self._serial_number)
+            async with self._session.request(method, safe_url,
+                                             data=None if payload is None else JsonCodec.dumps(payload),
+                                             headers=None if payload is None else _JSON_CONTENT_TYPE_HEADER) \
+                    as response:
+                body = await response.read()
+
+            if response.status > 399:
+                if not re_login and response.status == 401:
+                    _LOGGER.debug('Call to %s failed with HTTP 401, will try to re-login', safe_url)
+                    return await self._secure_call(method, url, payload, True, serial_number, generation)
+                else:
+                    raise ApiError('Received error from server url: ' + safe_url + ' and method ' + method,
+                                   response, payload)
+            if body:
+                return JsonCodec.loads(body)
+            else:
+                return {"ok": "ok"}
+        except ApiError:
+            raise
+        except Exception as e:
+            raise ApiError('Cannot {} url: {}'.format(method, safe_url if safe_url else url), response, payload) from e
+
+    async def _login(self, force_login: bool = False):
+        try:
+            if force_login and not self._load_stored_session():
+                self._clear_session()
+
+            session = self._get_session()
+            if not len(session.cookie_jar):
+                self._load_cookies()
+                self._serial_number = self._session_store.get_serial_number()
+                self._facilities = self._session_store.get_facilities()
+
+                if not len(session.cookie_jar):
+                    _LOGGER.info(
+                        'No previous session found, will try to logging with username: %s and smartphoneId: %s',
+                        self._user, self._smart_phone_Id)
+
+                    authtoken = await self._request_token()
+                    await self._get_cookies(authtoken)
+
+            if not self._serial_number:
+                await self._get_facilities()
+        except ApiError:
+            raise
+        except Exception as e:
+            raise ApiError('Error during login', None) from e
+
+    async def _request_token(self):
+        params = {
+            "smartphoneId": self._smart_phone_Id,
+            "username": self._user,
+            "password": self._password
+        }
+
+        try:
+            async with self._session.post(Urls.new_token(), data=JsonCodec.dumps(params),
+                                          headers=_JSON_CONTENT_TYPE_HEADER) \
+                    as response:
+                if response.status == 200:
+                    _LOGGER.debug('Token generation successful')
+                    return JsonCodec.loads(await response.read())['body']['authToken']
+                else:
+                    raise ApiError('Authentication failed', response)
+        except ApiError:
+            raise
+        except Exception as e:
+            raise ApiError('Error during authentication', None) from e
+
+    async def _get_cookies(self, auth_token: str):
+        params = {
+            "smartphoneId": self._smart_phone_Id,
+            "username": self._user,
+            "authToken": auth_token
+        }
+
+        try:
+            async with self._session.post(Urls.authenticate(), data=JsonCodec.dumps(params),
+                                          headers=_JSON_CONTENT_TYPE_HEADER) \
+                    as response:
+                if response.status == 200:
+                    self._session.cookie_jar.update_cookies(response.cookies, response.url)
+                    _LOGGER.debug('Cookie successfully retrieved %s', response.cookies)
+                    self._save_cookies()
+                else:
+                    raise ApiError('Cannot get cookies', response)
+        except ApiError:
+            raise
+        except Exception as e:
+            raise ApiError('Error while getting cookies', None) from e
+
+    async def _get_facilities(self):
+        try:
+            async with self._session.get(Urls.facilities_list()) as response:
+                if response.status == 200:
+                    _LOGGER.debug('Serial number successfully retrieved')
+                    self._facilities = JsonCodec.loads(await response.read())['body']['facilitiesList']
+                    self._serial_number = self._facilities[0]['serialNumber']
+                    self._session_store.set_facilities(self._facilities)
+                    self._session_store.set_serial_number(self._serial_number)
+                else:
+                    raise ApiError('Cannot get serial number', response)
+        except ApiError:
+            raise
+        except Exception as e:
+            raise ApiError('Cannot get serial number', None) from e
+
+    def _get_session(self):
+        if not self._session:
+            self._session = aiohttp.ClientSession()
+            self._own_session = True
+        return self._session
+
+    def _get_login_lock(self):
+        if not self._login_lock:
+            self._login_lock = asyncio.Lock()
+        return self._login_lock
+
+    def _load_stored_session(self) -> bool:
+        """
+        Load the session saved in the store if it's not the current one, see
+        :func:`vr900connector.api.ApiConnector._load_stored_session`
+        """
+        stored = self._session_store.get_cookies()
+        cookie_jar = self._get_session().cookie_jar
+        if not stored or set((cookie['name'], cookie['value']) for cookie in stored) == \
+                set((cookie.key, cookie.value) for cookie in cookie_jar):
+            return False
+
+        _LOGGER.debug('Session renewed in the store by another connector, will use it')
+        cookie_jar.clear()
+        self._load_cookies()
+        self._serial_number = self._session_store.get_serial_number()
+        self._facilities = self._session_store.get_facilities()
+        self._session_generation += 1
+        return True
+
+    def _clear_session(self):
+        self._session_store.clear()
+        self._serial_number = None
+        self._facilities = None
+        self._session_generation += 1
+        if self._session:
+            self._session.cookie_jar.clear()
+
+    def _save_cookies(self):
+        self._session_store.set_cookies([{'name': cookie.key, 'value': cookie.value, 'domain': cookie['domain'],
+                                          'path': cookie['path'] or '/', 'expires': self._expires(cookie),
+                                          'secure': bool(cookie['secure'])}
+                                         for cookie in self._session.cookie_jar])
+
+    def _load_cookies(self):
+        cookies = self._session_store.get_cookies()
+        _LOGGER.debug('Found cookies %s', cookies)
+        if cookies:
+            morsels = SimpleCookie()
+            for cookie in cookies:
+                morsels[cookie['name']] = cookie['value']
+                if cookie.get('expires'):
+                    morsels[cookie['name']]['max-age'] = str(max(0, int(cookie['expires'] - time.time())))
+            self._session.cookie_jar.update_cookies(morsels, URL(Urls.authenticate()))
+
+    @classmethod
+    def _expires(cls, cookie: Morsel):
+        """
+        Expiry (timestamp in seconds) of a cookie, like ``expires`` of cookies saved by
+        :class:`vr900connector.api.ApiConnector`, so the session can be renewed ahead of time. Cookies are saved when
+        they are received, so max-age is relative to now
+        """
+        if cookie['max-age']:
+            return int(time.time()) + int(cookie['max-age'])
+        if cookie['expires']:
+            return http2time(cookie['expires'])
+        return None
@@ -8,7 +8,41 @@ class Defaults:
 
     FILES_PATH = tempfile.gettempdir() + '/.vaillant_vr900_files'
 
-    COOKIE_FILE_NAME = '.vr900-vaillant.cookies'
-    SERIAL_NUMBER_FILE_NAME = '.vr900-vaillant.serial'
+    SESSION_FILE_NAME = '.vr900-vaillant.session'
 
     SMART_PHONE_ID = 'vr900-connector'
+
+    POOL_MAXSIZE = 20
+    """Maximum number of HTTP connections kept open to the API"""
+
+    MAX_RETRIES = 3
+    """Retries on connection errors and on GET failing with HTTP 502, 503 or 504"""
+
+    BACKOFF_FACTOR = 0.3
+    """Backoff factor between retries, delays are 0s, 0.6s, 1.2s, etc. with 0.3"""
+
+    FLEET_MAX_WORKERS = 8
+    """Maximum number of accounts of a fleet calling the API at the same time"""
+
+    STREAM_CHUNK_SIZE = 64 * 1024
+    """Size in bytes of the chunks written to the output when a response is streamed"""
+
+    KEEP_ALIVE_INTERVAL = 120
+    """Seconds without call to the API before the session refresher sends a keep alive request"""
+
+    SESSION_REFRESH_MARGIN = 300
+    """Seconds before cookies expiry when the session refresher logs in again"""
+
+    POLLING_INTERVALS = {
+        'system': (120, 20, 1800),
+        'rooms': (120, 20, 1800),
+        'live_report': (60, 30, 600),
+        'hvac': (300, 30, 3600)
+    }
+    """(base, minimum, maximum) seconds between two requests of a family of resources when polling the system"""
+
+    POLLING_BACKOFF_FACTOR = 1.5
+    """Factor applied to the polling interval of a family of resources when its data didn't change"""
+
+    POLLING_BOOST_POLLS = 3
+    """Number of requests of a family of resources done at its minimum interval after a write"""
@@ -0,0 +1,140 @@
+import logging
+import threading
+from collections import OrderedDict
+from time import monotonic
+from typing import Dict
+
+_LOGGER = logging.getLogger('ResponseCache')
+
+
+class ResponseCache:
+    """
+    In memory cache of GET responses, to be given to :class:`vr900connector.api.ApiConnector`.
+
+    Responses are stored by resolved url (serial number included) and expire after a time to live depending on the url
+    family. When the cache is full, least recently used responses are evicted first.
+
+    Every PUT, POST or DELETE done by the connector invalidates cached responses of the same resource, e.g. a PUT to a
+    zone configuration invalidates every cached system control response. A response of a GET sent before such a write
+    is not stored when it's received after the write, see :func:`generation`.
+
+    Cached responses are shared between callers, they must not be modified.
+
+    Attributes:
+        hits: number of GET served from the cache
+        misses: number of GET that had to be sent to the API
+
+    Args:
+        default_ttl: Time to live (in seconds) of a response when its url doesn't belong to a family of ttls
+        ttls: Time to live (in seconds) per url family. Keys are urls from :mod:`vr900connector.api.urls`, e.g.
+        ``{Urls.live_report(): 60, Urls.hvac(): 120, Urls.system(): 30}``, the longest matching url wins
+        max_size: Maximum number of responses in the cache
+    """
+
+    def __init__(self, default_ttl: float = 30, ttls: Dict[str, float] = None, max_size: int = 128):
+        self._default_ttl = default_ttl
+        self._ttls = sorted((ttls or dict()).items(), key=lambda item: len(item[0]), reverse=True)
+        self._max_size = max_size
+        self._entries = OrderedDict()
+        self._generations = dict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, safe_url: str):
+        """
+        Get the cached response of a resolved url, or None if there is no response or if it has expired
+        """
+        with self._lock:
+            entry = self._entries.get(safe_url)
+            if entry and entry[0] > monotonic():
+                self._entries.move_to_end(safe_url)
+                self.hits += 1
+                return entry[1]
+
+            if entry:
+                del self._entries[safe_url]
+            self.misses += 1
+            return None
+
+    def generation(self, safe_url: str) -> int:
+        """
+        Number of invalidations of the resource of a resolved url, to be taken before sending a GET and given to
+        :func:`put` with its response
+        """
+        with self._lock:
+            return self._generations.get(self._resource_prefix(safe_url), 0)
+
+    def put(self, url: str, safe_url: str, response, generation: int = None):
+        """
+        Store a response
+
+        :param url: url with placeholders, used to find the time to live
+        :param safe_url: resolved url
+        :param response: the JSON response
+        :param generation: :func:`generation` of the url when the GET was sent, the response is not stored if the
+            resource has been invalidated since (the response may be older than the write)
+        """
+        ttl = self._ttl(url)
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            if generation is not None and generation != self._generations.get(self._resource_prefix(safe_url), 0):
+                _LOGGER.debug('Response of %s sent before an invalidation, not cached', safe_url)
+                return
+            self._entries[safe_url] = (monotonic() + ttl, response)
+            self._entries.move_to_end(safe_url)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, safe_url: str):
+        """
+        Remove cached responses affected by a write to the resolved url: responses of the same resource (for url under
+        a facility, it's the API part, like system control or hvac state) and responses of parent urls
+        """
+        with self._lock:
+            for key in [key for key in self._entries if self.is_affected(key, safe_url)]:
+                _LOGGER.debug('Invalidate cached response of %s', key)
+                del self._entries[key]
+
+            # parent urls are their own resource, so every parent gets a new generation
+            parts = safe_url.split('?')[0].split('/')
+            prefixes = set('/'.join(parts[:index]) for index in range(1, len(parts) + 1))
+            prefixes.add(self._resource_prefix(safe_url))
+            for prefix in prefixes:
+                self._generations[prefix] = self._generations.get(prefix, 0) + 1
+
+    def clear(self):
+        """
+        Remove all cached responses
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def _ttl(self, url: str) -> float:
+        for prefix, ttl in self._ttls:
+            if url.startswith(prefix):
+                return ttl
+        return self._default_ttl
+
+    @classmethod
+    def is_affected(cls, safe_url: str, written_url: str) -> bool:
+        """
+        Whether responses of a resolved url are affected by a write to another resolved url: same resource or parent
+        url
+        """
+        return safe_url.startswith(cls._resource_prefix(written_url)) or written_url.startswith(safe_url)
+
+    @classmethod
+    def _resource_prefix(cls, safe_url: str) -> str:
+        """
+        For '.../facilities/{serial_number}/systemcontrol/v1/zones/...', returns '.../facilities/{serial_number}/
+        systemcontrol/v1'
+        """
+        parts = safe_url.split('?')[0].split('/')
+        if 'facilities' in parts:
+            index = parts.index('facilities')
+            if len(parts) > index + 3:
+                return '/'.join(parts[:index + 4])
+        return safe_url
@@ -0,0 +1,112 @@
+import logging
+import threading
+import time
+
+from . import ApiConnector, Defaults
+
+_LOGGER = logging.getLogger('SessionRefresher')
+
+_MIN_DELAY = 5
+_MAX_DELAY = 3600
+_RETRY_DELAY = 60
+_MAX_MARGIN_RATIO = 0.5
+
+
+class SessionRefresher:
+    """
+    Background thread keeping the session of a :class:`vr900connector.api.ApiConnector` alive, so calls done after an
+    idle period don't pay a failed call and a re-login.
+
+    When cookies have an expiry, the refresher logs in again a bit before the expiry. The margin is at most half of the
+    lifetime of the cookies observed after a renewal, so short-lived cookies don't make the refresher log in again and
+    again. If a renewal doesn't move the expiry, the refresher stops renewing this session and lets the connector log
+    in again on HTTP 401. When the connector didn't call the API for a while, the refresher sends a lightweight
+    request, which keeps the HTTP connection open as well.
+
+    Errors are logged, they are never raised.
+
+    Args:
+        connector: The connector to keep alive
+        keep_alive_interval: Seconds without call to the API before sending a keep alive request, None to disable
+        refresh_margin: Seconds before cookies expiry when the session is renewed
+    """
+
+    def __init__(self, connector: ApiConnector, keep_alive_interval: float = Defaults.KEEP_ALIVE_INTERVAL,
+                 refresh_margin: float = Defaults.SESSION_REFRESH_MARGIN):
+        self._connector = connector
+        self._keep_alive_interval = keep_alive_interval
+        self._refresh_margin = refresh_margin
+        self._lifetime = None
+        self._unchanged_expiry = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """
+        Start the background thread, does nothing if it's already running
+        """
+        if not self.is_running:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name='vr900-session-refresher', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """
+        Stop the background thread and wait for it
+        """
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        delay = self._next_delay()
+        while not self._stop_event.wait(delay):
+            delay = self._next_delay() if self._tick() else _RETRY_DELAY
+
+    def _tick(self) -> bool:
+        try:
+            if self._time_before_refresh() <= 0:
+                _LOGGER.debug('Session will expire soon, renewing it')
+                self._refresh()
+            elif self._time_before_keep_alive() <= 0:
+                _LOGGER.debug('Connector is idle, sending keep alive request')
+                self._connector.keep_alive()
+            return True
+        except Exception:
+            _LOGGER.warning('Cannot refresh session, will retry in %s seconds', _RETRY_DELAY, exc_info=True)
+            return False
+
+    def _refresh(self):
+        previous_expiry = self._connector.session_expiry
+        self._connector.refresh_session()
+        expiry = self._connector.session_expiry
+        if expiry is None:
+            return
+        if expiry == previous_expiry:
+            _LOGGER.debug('Renewing the session did not change its expiry, it will not be renewed again')
+            self._unchanged_expiry = expiry
+        else:
+            self._lifetime = expiry - time.time()
+            self._unchanged_expiry = None
+
+    def _next_delay(self) -> float:
+        return max(_MIN_DELAY, min(_MAX_DELAY, self._time_before_refresh(), self._time_before_keep_alive()))
+
+    def _time_before_refresh(self) -> float:
+        expiry = self._connector.session_expiry
+        if expiry is None or expiry == self._unchanged_expiry:
+            return float('inf')
+        margin = self._refresh_margin
+        if self._lifetime is not None:
+            margin = min(margin, self._lifetime * _MAX_MARGIN_RATIO)
+        return expiry - margin - time.time()
+
+    def _time_before_keep_alive(self) -> float:
+        if self._keep_alive_interval is None:
+            return float('inf')
+        return self._keep_alive_interval - self._connector.idle_time
@@ -0,0 +1,141 @@
+import logging
+import os
+import tempfile
+import threading
+from typing import Dict, List
+
+from . import Defaults
+from ..util import JsonCodec
+
+_LOGGER = logging.getLogger('SessionStore')
+
+
+class SessionStore:
+    """
+    Keep the session of an account (cookies, facilities and serial number of the default facility) between calls of
+    a connector, to be given to :class:`vr900connector.api.ApiConnector`. Values are loaded once and then kept in
+    memory. A store can be shared by several connectors of the same account (and between threads), only one of them
+    has to log in.
+
+    This base class doesn't persist anything, subclasses override :func:`_load`, :func:`_save` and :func:`_delete`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = None
+
+    def get_cookies(self) -> List[Dict]:
+        """
+        Cookies of the session, each cookie is a dict with ``name``, ``value``, ``domain``, ``path``, ``expires`` and
+        ``secure`` keys, None if there is no session
+        """
+        return self._get('cookies')
+
+    def set_cookies(self, cookies: List[Dict]):
+        self._set('cookies', cookies)
+
+    def get_serial_number(self) -> str:
+        return self._get('serial_number')
+
+    def set_serial_number(self, serial_number: str):
+        self._set('serial_number', serial_number)
+
+    def get_facilities(self) -> List[Dict]:
+        """
+        Facilities of the account, as returned by the API, None if they have not been enumerated yet
+        """
+        return self._get('facilities')
+
+    def set_facilities(self, facilities: List[Dict]):
+        self._set('facilities', facilities)
+
+    def clear(self):
+        """
+        Forget the session, it will be loaded again on next access
+        """
+        with self._lock:
+            self._data = None
+            self._delete()
+
+    def _get(self, key: str):
+        with self._lock:
+            if self._data is None:
+                self._data = self._load()
+            return self._data.get(key)
+
+    def _set(self, key: str, value):
+        with self._lock:
+            if self._data is None:
+                self._data = self._load()
+            self._data[key] = value
+            self._save(dict(self._data))
+
+    def _load(self) -> Dict:
+        return dict()
+
+    def _save(self, data: Dict):
+        pass
+
+    def _delete(self):
+        pass
+
+
+class MemorySessionStore(SessionStore):
+    """
+    Keep the session in memory only, a new login is needed each time the process starts
+    """
+
+
+class FileSessionStore(SessionStore):
+    """
+    Keep the session in a JSON file, so it survives between processes. The file is read on first access only and
+    replaced atomically (write to a temporary file, then rename) on each change, it is only readable by its owner.
+
+    Args:
+        path: Directory of the file, created if needed
+        filename: Name of the file
+    """
+
+    def __init__(self, path: str = Defaults.FILES_PATH, filename: str = Defaults.SESSION_FILE_NAME):
+        super().__init__()
+        self._path = path
+        self._file = os.path.join(path, filename)
+
+    def _load(self) -> Dict:
+        try:
+            with open(self._file, 'rb') as file:
+                data = JsonCodec.loads(file.read())
+            if isinstance(data, dict):
+                return data
+            _LOGGER.debug('Ignoring unexpected content of %s', self._file)
+        except FileNotFoundError:
+            pass
+        except Exception:
+            _LOGGER.debug('Cannot read session from %s', self._file, exc_info=True)
+        return dict()
+
+    def _save(self, data: Dict):
+        temp_file = None
+        try:
+            os.makedirs(self._path, exist_ok=True)
+            fd, temp_file = tempfile.mkstemp(dir=self._path, prefix='.session-', suffix='.tmp')
+            with os.fdopen(fd, 'wb') as file:
+                file.write(JsonCodec.dumps(data))
+            os.replace(temp_file, self._file)
+        except Exception:
+            _LOGGER.debug('Cannot save session to %s', self._file, exc_info=True)
+            if temp_file and os.path.exists(temp_file):
+                os.remove(temp_file)
+
+    def _delete(self):
+        try:
+            os.remove(self._file)
+        except FileNotFoundError:
+            pass
+        except Exception:
+            _LOGGER.debug('Cannot delete %s', self._file, exc_info=True)
+
+        try:
+            os.rmdir(self._path)
+        except Exception:
+            _LOGGER.debug('Cannot delete dir %s', self._path, exc_info=True)
@@ -5,7 +5,7 @@ class Urls:
     """
     Vaillant API Urls with placeholder when needed.
     All placeholders are resolved here except {serial_number} which is resolved by
-    :class:`vr900connector.api.ApiConnector`
+    :class:`vr900connector.api.ApiConnector` on each call, with the serial number of the facility given to the call
     """
 
     _BASE = 'https://smart.vaillant.com/mobile/api/v4'
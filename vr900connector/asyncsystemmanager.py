@@ -0,0 +1,307 @@
+import asyncio
+import logging
+from datetime import date, timedelta
+from typing import Dict, List
+
+from .api import Urls, Payloads, Defaults, SessionStore
+from .api.asyncapiconnector import AsyncApiConnector
+from .model import Mapper, HotWater, QuickMode, QuickVeto, Room, Zone, HeatingMode, Circulation, Constants, System, \
+    Facility
+
+LOGGER = logging.getLogger('AsyncSystemManager')
+
+
+class AsyncSystemManager:
+    """
+    This is the asyncio version of :class:`vr900connector.SystemManager`, every method doing a call to the API is a
+    coroutine. Raw responses are mapped with :class:`vr900connector.model.Mapper`, so both managers return the same
+    objects.
+
+    The manager is throwing :exc:`vr900connector.api.ApiError` (thrown by
+    :class:`vr900connector.api.asyncapiconnector.AsyncApiConnector`) without altering it
+
+    Args:
+        user: User for login
+        password: Password for login
+        smart_phone_id: Smart phone id required by the API
+        file_path: Where to store files created by the underlying connector.
+        session: aiohttp session to use, see :class:`vr900connector.api.asyncapiconnector.AsyncApiConnector`
+        session_store: Where to keep cookies and serial number, see :class:`vr900connector.api.SessionStore`
+        serial_number: Serial number of the facility the manager works with, the first facility of the account if not
+        provided. Every method calling the API also accepts the serial number of another facility
+    """
+
+    def __init__(self, user: str, password: str, smart_phone_id: str = Defaults.SMART_PHONE_ID,
+                 file_path: str = Defaults.FILES_PATH, session=None, session_store: SessionStore = None,
+                 serial_number: str = None):
+        self._connector = AsyncApiConnector(user, password, smart_phone_id, file_path, session, session_store)
+        self._serial_number = serial_number
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """
+        Close the underlying connector
+        """
+        await self._connector.close()
+
+    async def get_facilities(self) -> List[Facility]:
+        """
+        See :func:`vr900connector.SystemManager.get_facilities`
+        """
+        return Mapper.facilities(await self._connector.facilities())
+
+    async def get_systems(self) -> Dict[str, System]:
+        """
+        Systems of every facility of the account, requested concurrently, see
+        :func:`vr900connector.SystemManager.get_systems`
+        """
+        serial_numbers = [facility.serial_number for facility in await self.get_facilities()]
+        systems = await asyncio.gather(*[self.get_system(serial_number) for serial_number in serial_numbers])
+        return dict(zip(serial_numbers, systems))
+
+    async def get_system(self, serial_number: str = None):
+        """
+        Live report and hvac state are requested concurrently with the system, rooms are requested as soon as the
+        system shows a zone controlled by rooms
+        """
+        live_report_task = asyncio.ensure_future(self._get(Urls.live_report(), serial_number))
+        hvac_state_task = asyncio.ensure_future(self._get(Urls.hvac(), serial_number))
+
+        try:
+            full_system = await self._get(Urls.system(), serial_number)
+
+            raw_rooms = None
+            if Mapper.has_rbr_zone(full_system):
+                raw_rooms = await self._get(Urls.rooms(), serial_number)
+
+            live_report, hvac_state = await asyncio.gather(live_report_task, hvac_state_task)
+        finally:
+            live_report_task.cancel()
+            hvac_state_task.cancel()
+
+        return Mapper.system(full_system, live_report, hvac_state, raw_rooms)
+
+    async def get_hot_water(self, hot_water: HotWater, serial_number: str = None):
+        full_system, live_report = await asyncio.gather(self._get(Urls.hot_water(hot_water.id), serial_number),
+                                                        self._get(Urls.live_report(), serial_number))
+        return Mapper.domestic_hot_water_alone(full_system, hot_water.id, live_report)
+
+    async def get_room(self, room: Room, serial_number: str = None):
+        new_room = await self._get(Urls.room(room.id), serial_number)
+        return Mapper.room(new_room)
+
+    async def get_zone(self, zone: Zone, serial_number: str = None):
+        new_zone = await self._get(Urls.zone(zone.id), serial_number)
+        return Mapper.zone(new_zone)
+
+    async def get_circulation(self, circulation: Circulation, serial_number: str = None):
+        new_circulation = await self._get(Urls.circulation(circulation.id), serial_number)
+        return Mapper.circulation_alone(new_circulation, circulation.id)
+
+    async def set_hot_water_setpoint_temperature(self, hot_water: HotWater, temperature: float,
+                                                 serial_number: str = None):
+        """
+        See :func:`vr900connector.SystemManager.set_hot_water_setpoint_temperature`
+        """
+        LOGGER.info("Will try to set dhw target temperature to %s", temperature)
+        if temperature and hot_water:
+            await self._put(Urls.hot_water_temperature_setpoint(hot_water.id),
+                            Payloads.hotwater_temperature_setpoint(self._round(temperature)), serial_number)
+            return True
+        else:
+            LOGGER.debug("No temperature nor hot_water provided, nothing to do")
+            return False
+
+    async def set_hot_water_operation_mode(self, hotwater: HotWater, new_mode: HeatingMode, serial_number: str = None):
+        """
+        See :func:`vr900connector.SystemManager.set_hot_water_operation_mode`
+        """
+        LOGGER.info("Will try to set hot water mode to %s", new_mode)
+
+        if not hotwater:
+            LOGGER.debug("No hotwater provided")
+            return False
+        if not new_mode:
+            LOGGER.debug("No new mode provided, nothing to do")
+            return False
+        if new_mode not in HotWater.MODES:
+            LOGGER.debug("New mode is not available for hot water %s", new_mode)
+            return False
+
+        LOGGER.debug("New mode is %s", new_mode)
+        await self._put(Urls.hot_water_operation_mode(hotwater.id),
+                        Payloads.hot_water_operation_mode(new_mode.name), serial_number)
+        return True
+
+    async def set_room_operation_mode(self, room: Room, new_mode: HeatingMode, serial_number: str = None):
+        """
+        See :func:`vr900connector.SystemManager.set_room_operation_mode`
+        """
+        if not room:
+            LOGGER.debug("No room provided")
+            return False
+        if not new_mode:
+            LOGGER.debug("No new mode provided, nothing to do")
+            return False
+        if new_mode not in Room.MODES or new_mode == HeatingMode.QUICK_VETO:
+            LOGGER.debug("New mode is not available for room %s", new_mode)
+            return False
+
+        LOGGER.debug("New mode is %s", new_mode)
+        await self._put(Urls.room_operation_mode(room.id), Payloads.room_operation_mode(new_mode.name), serial_number)
+        return True
+
+    async def set_zone_operation_mode(self, zone: Zone, new_mode: HeatingMode, serial_number: str = None):
+        """
+        See :func:`vr900connector.SystemManager.set_zone_operation_mode`
+        """
+        if not zone:
+            LOGGER.debug("No zone provided")
+            return False
+        if not new_mode:
+            LOGGER.debug("No new mode provided, nothing to do")
+            return False
+        if new_mode not in Zone.MODES or new_mode == HeatingMode.QUICK_VETO:
+            LOGGER.debug("New mode is not available for zone %s", new_mode)
+            return False
+
+        LOGGER.debug("New mode is %s", new_mode)
+        await self._put(Urls.zone_heating_mode(zone.id), Payloads.zone_operation_mode(new_mode.name), serial_number)
+        return True
+
+    async def set_quick_mode(self, current_quick_mode: QuickMode, new_quick_mode: QuickMode, serial_number: str = None):
+        """
+        See :func:`vr900connector.SystemManager.set_quick_mode`
+        """
+        if current_quick_mode:
+            LOGGER.debug("There is already a quick mode in place: %s", current_quick_mode.name)
+            return False
+        if not new_quick_mode:
+            LOGGER.debug("No new quick mode provided")
+            return False
+
+        await self._put(Urls.system_quickmode(), Payloads.quickmode(new_quick_mode.name), serial_number)
+        return True
+
+    async def set_room_quick_veto(self, room: Room, quick_veto: QuickVeto, serial_number: str = None):
+        if quick_veto and room:
+            await self._put(Urls.room_quick_veto(room.id),
+                            Payloads.room_quick_veto(quick_veto.target_temperature,
+                                                     quick_veto.remaining_time), serial_number)
+            return True
+        else:
+            LOGGER.debug("Quick veto %s or room %s not provided", quick_veto, room)
+            return False
+
+    async def remove_room_quick_veto(self, room: Room, serial_number: str = None):
+        await self._delete(Urls.room_quick_veto(room.id), serial_number)
+        return True
+
+    async def set_zone_quick_veto(self, zone: Zone, quick_veto: QuickVeto, serial_number: str = None):
+        if quick_veto and zone:
+            await self._put(Urls.zone_quick_veto(zone.id),
+                            Payloads.zone_quick_veto(quick_veto.target_temperature), serial_number)
+            return True
+        else:
+            LOGGER.debug("Quick veto %s or zone %s not provided", quick_veto, zone)
+            return False
+
+    async def remove_zone_quick_veto(self, zone: Zone, serial_number: str = None):
+        await self._delete(Urls.zone_quick_veto(zone.id), serial_number)
+        return True
+
+    async def set_room_setpoint_temperature(self, room: Room, temperature: float, serial_number: str = None):
+        """
+        See :func:`vr900connector.SystemManager.set_room_setpoint_temperature`
+        """
+        LOGGER.info("Will try to set room target temperature to %s", temperature)
+        if temperature and room:
+            await self._put(Urls.room_set_temperature_setpoint(room.id),
+                            Payloads.room_temperature_setpoint(self._round(temperature)), serial_number)
+            return True
+        else:
+            LOGGER.debug("No temperature nor room provided, nothing to do")
+            return False
+
+    async def set_zone_setpoint_temperature(self, zone: Zone, temperature: float, serial_number: str = None):
+        """
+        See :func:`vr900connector.SystemManager.set_zone_setpoint_temperature`
+        """
+        LOGGER.info("Will try to set zone target temperature to %s", temperature)
+        if temperature and zone:
+            await self._put(Urls.zone_heating_setpoint_temperature(zone.id),
+                            Payloads.zone_temperature_setpoint(self._round(temperature)), serial_number)
+            return True
+        else:
+            LOGGER.debug("No temperature nor zone provided, nothing to do")
+            return False
+
+    async def set_zone_setback_temperature(self, zone: Zone, temperature: float, serial_number: str = None):
+        """
+        See :func:`vr900connector.SystemManager.set_zone_setback_temperature`
+        """
+        LOGGER.info("Will try to set zone setback temperature to %s", temperature)
+        if temperature and zone:
+            await self._put(Urls.zone_heating_setback_temperature(zone.id),
+                            Payloads.zone_temperature_setback(self._round(temperature)), serial_number)
+            return True
+        else:
+            LOGGER.debug("No temperature nor zone provided, nothing to do")
+            return False
+
+    async def set_holiday_mode(self, start_date: date, end_date: date, temperature: float, serial_number: str = None):
+        """
+        See :func:`vr900connector.SystemManager.set_holiday_mode`
+        """
+        await self._put(Urls.system_holiday_mode(),
+                        Payloads.holiday_mode(True, start_date, end_date, temperature), serial_number)
+        return True
+
+    async def remove_holiday_mode(self, temperature: float = Constants.FROST_PROTECTION_TEMP,
+                                  serial_number: str = None):
+        """
+        See :func:`vr900connector.SystemManager.remove_holiday_mode`
+        """
+        await self._put(Urls.system_holiday_mode(), Payloads.holiday_mode(False,
+                                                                          date.today() - timedelta(days=2),
+                                                                          date.today() - timedelta(days=1),
+                                                                          temperature), serial_number)
+        return True
+
+    async def request_hvac_update(self, serial_number: str = None):
+        """
+        See :func:`vr900connector.SystemManager.request_hvac_update`
+        """
+        await self._put(Urls.hvac_update(), serial_number=serial_number)
+        return True
+
+    async def logout(self):
+        """
+        Get logged out from the API
+        """
+        await self._connector.logout()
+
+    async def _get(self, url: str, serial_number: str = None):
+        return await self._connector.get(url, self._facility(serial_number))
+
+    async def _put(self, url: str, payload=None, serial_number: str = None):
+        return await self._connector.put(url, payload, self._facility(serial_number))
+
+    async def _delete(self, url: str, serial_number: str = None):
+        return await self._connector.delete(url, self._facility(serial_number))
+
+    def _facility(self, serial_number: str = None) -> str:
+        return serial_number if serial_number is not None else self._serial_number
+
+    def _round(self, number: float):
+        """
+        This function round a float to the nearest 0.5, as vaillant API only accepts 0.5 step
+        :param number: the number to round
+        :return: the rounded number
+        """
+        return round(number * 2) / 2
@@ -0,0 +1,238 @@
+import logging
+import os
+import threading
+from collections import deque, OrderedDict
+from concurrent.futures import Future
+from time import monotonic
+from typing import Callable, Dict, List
+
+from .api import ApiConnector, Defaults, SessionStore, FileSessionStore, ResponseCache
+from .pollscheduler import PollScheduler
+from .systemmanager import SystemManager
+
+_LOGGER = logging.getLogger('FleetManager')
+
+_POLLING_RETRY_DELAY = 60
+
+_POLLING_MAX_WAIT = 60
+
+
+class FleetManager:
+    """
+    Host many accounts in one process. Each account has its own :class:`vr900connector.SystemManager` and session
+    store, all of them share one HTTP connection pool and a bounded number of worker threads.
+
+    Work is submitted per account and scheduled fairly: accounts with pending work are served in turn and an account
+    never runs more than one task at a time, so an account with a lot of work (or a slow API) cannot starve the
+    others.
+
+    Args:
+        max_workers: Maximum number of accounts calling the API at the same time
+        file_path: Directory where session files of accounts are stored, in a sub directory per account
+        pool_maxsize: Maximum number of HTTP connections kept open to the API, shared by all accounts
+    """
+
+    def __init__(self, max_workers: int = Defaults.FLEET_MAX_WORKERS, file_path: str = Defaults.FILES_PATH,
+                 pool_maxsize: int = None):
+        self._max_workers = max_workers
+        self._file_path = file_path
+        self._http_adapter = ApiConnector.create_http_adapter(pool_maxsize or max_workers)
+        self._managers = OrderedDict()
+        self._queues = dict()
+        self._order = deque()
+        self._running = set()
+        self._condition = threading.Condition()
+        self._workers = list()
+        self._shutdown = False
+        self._polling = set()
+        self._retry_at = dict()
+        self._polling_wakeup = threading.Event()
+        self._polling_stopped = True
+        self._polling_thread = None
+
+    @property
+    def accounts(self) -> List[str]:
+        with self._condition:
+            return list(self._managers)
+
+    def add_account(self, account_id: str, user: str, password: str, smart_phone_id: str = Defaults.SMART_PHONE_ID,
+                    session_store: SessionStore = None, cache: ResponseCache = None,
+                    scheduler: PollScheduler = None) -> SystemManager:
+        """
+        Add an account to the fleet
+
+        :param account_id: id of the account in the fleet, also the name of the directory of its session file
+        :param user: user for login
+        :param password: password for login
+        :param smart_phone_id: smart phone id required by the API
+        :param session_store: where to keep the session of the account, a
+            :class:`vr900connector.api.FileSessionStore` in ``file_path/account_id`` if not provided
+        :param cache: cache for GET responses of the account
+        :param scheduler: polling scheduler of the account
+        :return: the :class:`vr900connector.SystemManager` of the account
+        """
+        if session_store is None:
+            session_store = FileSessionStore(os.path.join(self._file_path, account_id))
+
+        manager = SystemManager(user, password, smart_phone_id, cache=cache, scheduler=scheduler,
+                                session_store=session_store, http_adapter=self._http_adapter)
+        with self._condition:
+            if account_id in self._managers:
+                raise ValueError('Account {} already exists'.format(account_id))
+            self._managers[account_id] = manager
+            self._queues[account_id] = deque()
+            self._order.append(account_id)
+        self._polling_wakeup.set()
+        return manager
+
+    def remove_account(self, account_id: str):
+        """
+        Remove an account, pending tasks of the account are cancelled and its manager is closed
+        """
+        with self._condition:
+            manager = self._managers.pop(account_id, None)
+            if manager:
+                self._order.remove(account_id)
+            for future, _ in self._queues.pop(account_id, list()):
+                future.cancel()
+        if manager:
+            manager.close()
+
+    def manager(self, account_id: str) -> SystemManager:
+        return self._managers[account_id]
+
+    def submit(self, account_id: str, function: Callable[[SystemManager], any]) -> Future:
+        """
+        Schedule ``function(manager)`` for an account
+
+        :param account_id: the account
+        :param function: called with the :class:`vr900connector.SystemManager` of the account
+        :return: a :class:`concurrent.futures.Future` of the result
+        """
+        future = Future()
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError('Cannot submit after shutdown')
+            self._queues[account_id].append((future, function))
+            self._start_workers()
+            self._condition.notify()
+        return future
+
+    def map(self, function: Callable[[SystemManager], any]) -> Dict[str, Future]:
+        """
+        Schedule ``function(manager)`` for every account, e.g. ``fleet.map(SystemManager.get_system)``
+
+        :return: a :class:`concurrent.futures.Future` by account id
+        """
+        return OrderedDict((account_id, self.submit(account_id, function)) for account_id in self.accounts)
+
+    def start_polling(self):
+        """
+        Call :func:`vr900connector.SystemManager.poll` of each account when its scheduler has something due, using the
+        workers of the fleet. Events are sent to subscribers of each manager, errors are logged and the account is
+        polled again later
+        """
+        self.stop_polling()
+        self._polling_stopped = False
+        self._polling_wakeup.clear()
+        self._polling_thread = threading.Thread(target=self._poll_forever, name='vr900-fleet-poller', daemon=True)
+        self._polling_thread.start()
+
+    def stop_polling(self):
+        """
+        Stop the background polling and wait for it, polls already running are not interrupted
+        """
+        self._polling_stopped = True
+        self._polling_wakeup.set()
+        if self._polling_thread:
+            self._polling_thread.join()
+            self._polling_thread = None
+
+    def shutdown(self):
+        """
+        Stop polling, cancel pending tasks, wait for running ones and close the managers
+        """
+        self.stop_polling()
+        with self._condition:
+            self._shutdown = True
+            for queue in self._queues.values():
+                for future, _ in queue:
+                    future.cancel()
+                queue.clear()
+            self._condition.notify_all()
+        for worker in self._workers:
+            worker.join()
+        for manager in list(self._managers.values()):
+            manager.close()
+
+    def _start_workers(self):
+        if len(self._workers) < self._max_workers:
+            worker = threading.Thread(target=self._work, name='vr900-fleet-worker', daemon=True)
+            self._workers.append(worker)
+            worker.start()
+
+    def _work(self):
+        while True:
+            with self._condition:
+                task = self._next_task()
+                while task is None and not self._shutdown:
+                    self._condition.wait()
+                    task = self._next_task()
+                if task is None:
+                    return
+
+            account_id, manager, future, function = task
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(function(manager))
+                    except BaseException as e:
+                        future.set_exception(e)
+            finally:
+                with self._condition:
+                    self._running.discard(account_id)
+                    self._condition.notify()
+
+    def _next_task(self):
+        """
+        Next task of the first account in turn having pending work and no running task, the account then goes to the
+        end of the turn
+        """
+        for _ in range(len(self._order)):
+            account_id = self._order[0]
+            self._order.rotate(-1)
+            queue = self._queues[account_id]
+            if queue and account_id not in self._running:
+                future, function = queue.popleft()
+                self._running.add(account_id)
+                return account_id, self._managers[account_id], future, function
+        return None
+
+    def _poll_forever(self):
+        while not self._polling_stopped:
+            self._polling_wakeup.clear()
+            delay = _POLLING_MAX_WAIT
+            now = monotonic()
+            with self._condition:
+                managers = list(self._managers.items())
+
+            for account_id, manager in managers:
+                if account_id in self._polling:
+                    continue
+                wait = max(manager.next_poll_delay(), self._retry_at.get(account_id, 0) - now)
+                if wait > 0:
+                    delay = min(delay, wait)
+                    continue
+                self._polling.add(account_id)
+                future = self.submit(account_id, SystemManager.poll)
+                future.add_done_callback(lambda done, polled=account_id: self._polled(polled, done))
+
+            self._polling_wakeup.wait(delay)
+
+    def _polled(self, account_id: str, future: Future):
+        if not future.cancelled() and future.exception() is not None:
+            _LOGGER.warning('Cannot poll account %s, will retry in %s seconds', account_id, _POLLING_RETRY_DELAY,
+                            exc_info=future.exception())
+            self._retry_at[account_id] = monotonic() + _POLLING_RETRY_DELAY
+        self._polling.discard(account_id)
+        self._polling_wakeup.set()
@@ -1,15 +1,36 @@
-from .constants import Constants
-from .mode import Mode, HeatingMode, QuickMode, QuickVeto
-from .activemode import ActiveMode
-from .timeprogram import TimeProgram, TimeProgramDay, TimeProgramDaySetting
-from .component import Component
-from .boilerstatus import BoilerStatus
-from .circulation import Circulation
-from .device import Device
-from .holidaymode import HolidayMode
-from .hotwater import HotWater
-from .room import Room
-from .zone import Zone
-from .systemerrormessage import SystemErrorMessage
-from .system import System
-from .mapper import Mapper
+from ..util import LazyImport
+
+LazyImport.install(globals(), [
+    ('Constants', 'constants'),
+    ('Mode', 'mode'),
+    ('HeatingMode', 'mode'),
+    ('QuickMode', 'mode'),
+    ('QuickVeto', 'mode'),
+    ('ActiveMode', 'activemode'),
+    ('TimeProgram', 'timeprogram'),
+    ('TimeProgramDay', 'timeprogram'),
+    ('TimeProgramDaySetting', 'timeprogram'),
+    ('Component', 'component'),
+    ('BoilerStatus', 'boilerstatus'),
+    ('Circulation', 'circulation'),
+    ('Device', 'device'),
+    ('Report', 'report'),
+    ('HolidayMode', 'holidaymode'),
+    ('HotWater', 'hotwater'),
+    ('Room', 'room'),
+    ('Zone', 'zone'),
+    ('SystemErrorMessage', 'systemerrormessage'),
+    ('Facility', 'facility'),
+    ('System', 'system'),
+    ('SystemChanges', 'systemchanges'),
+    ('Event', 'events'),
+    ('Events', 'events'),
+    ('TargetTemperatureChanged', 'events'),
+    ('OperationModeChanged', 'events'),
+    ('QuickVetoStarted', 'events'),
+    ('QuickVetoEnded', 'events'),
+    ('BoilerStatusCodeChanged', 'events'),
+    ('ErrorMessageAdded', 'events'),
+    ('Mapper', 'mapper'),
+    ('LazySystem', 'lazysystem')
+])
@@ -15,6 +15,8 @@ class ActiveMode:
         otherwise it will be None
     """
 
+    __slots__ = ('target_temperature', 'current_mode', 'sub_mode')
+
     def __init__(self, target_temperature: float, current_mode: Mode, sub_mode: Mode = None):
         self.target_temperature = target_temperature
         self.current_mode = current_mode
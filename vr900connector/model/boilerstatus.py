@@ -14,6 +14,9 @@ class BoilerStatus:
         last_update: last update of the status (provided by the API)
     """
 
+    __slots__ = ('device_name', 'description', 'title', 'code', 'hint', 'last_update', 'online_status', 'update_status',
+                 'water_pressure', 'current_temperature')
+
     def __init__(self, device_name: str, description: str, title: str, code: str, hint: str, last_update: datetime,
                  online_status: str, update_status: str, water_pressure: float, current_temperature: float):
         self.device_name = device_name
@@ -14,6 +14,8 @@ class Circulation(Component):
     List of mode available for circulation
     """
 
+    __slots__ = ()
+
     def __init__(self, component_id: any, name: str, time_program: TimeProgram, operation_mode: HeatingMode):
         super().__init__(component_id, name, time_program, None, None, operation_mode, None)
 
@@ -20,6 +20,9 @@ class Component:
         quick_veto: it there is a quick veto running on
     """
 
+    __slots__ = ('id', 'name', 'time_program', 'current_temperature', 'target_temperature', 'operation_mode',
+                 'quick_veto')
+
     def __init__(self, component_id: any, name: str, time_program: TimeProgram, current_temperature: float,
                  target_temperature: float, operation_mode: HeatingMode, quick_veto: QuickVeto):
         self.id = component_id
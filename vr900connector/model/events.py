@@ -0,0 +1,125 @@
+from typing import List
+
+from . import BoilerStatus, Component, QuickVeto, HeatingMode, SystemErrorMessage
+
+
+class Event:
+    """
+    Base class of events emitted by :func:`vr900connector.SystemManager.poll`
+
+    Args:
+        component_id: Id of the component the event is about, see :func:`vr900connector.SystemManager.subscribe`
+    """
+
+    def __init__(self, component_id: any):
+        self.component_id = component_id
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, ', '.join('{}={!r}'.format(key, value)
+                                                              for key, value in vars(self).items()))
+
+
+class TargetTemperatureChanged(Event):
+    """
+    Target temperature of a zone, a room or the hot water changed
+    """
+
+    def __init__(self, component_id: any, old_temperature: float, new_temperature: float):
+        super().__init__(component_id)
+        self.old_temperature = old_temperature
+        self.new_temperature = new_temperature
+
+
+class OperationModeChanged(Event):
+    """
+    Operation mode of a component changed
+    """
+
+    def __init__(self, component_id: any, old_mode: HeatingMode, new_mode: HeatingMode):
+        super().__init__(component_id)
+        self.old_mode = old_mode
+        self.new_mode = new_mode
+
+
+class QuickVetoStarted(Event):
+    """
+    A quick veto is now running on a zone or a room
+    """
+
+    def __init__(self, component_id: any, quick_veto: QuickVeto):
+        super().__init__(component_id)
+        self.quick_veto = quick_veto
+
+
+class QuickVetoEnded(Event):
+    """
+    The quick veto of a zone or a room is over
+    """
+
+
+class BoilerStatusCodeChanged(Event):
+    """
+    Status code of the boiler changed, ``component_id`` is always :attr:`COMPONENT_ID`
+    """
+
+    COMPONENT_ID = 'boiler_status'
+
+    def __init__(self, old_code: str, new_code: str, boiler_status: BoilerStatus):
+        super().__init__(self.COMPONENT_ID)
+        self.old_code = old_code
+        self.new_code = new_code
+        self.boiler_status = boiler_status
+
+
+class ErrorMessageAdded(Event):
+    """
+    A new error is reported by the system, ``component_id`` is always :attr:`COMPONENT_ID`
+    """
+
+    COMPONENT_ID = 'errors'
+
+    def __init__(self, error: SystemErrorMessage):
+        super().__init__(self.COMPONENT_ID)
+        self.error = error
+
+
+class Events:
+    """
+    Compute events between two versions of the same component. Only values that actually differ produce an event.
+    """
+
+    @classmethod
+    def component(cls, old: Component, new: Component) -> List[Event]:
+        events = list()
+        if old is None or new is None:
+            return events
+
+        if old.target_temperature != new.target_temperature:
+            events.append(TargetTemperatureChanged(new.id, old.target_temperature, new.target_temperature))
+
+        if old.operation_mode != new.operation_mode:
+            events.append(OperationModeChanged(new.id, old.operation_mode, new.operation_mode))
+
+        if new.quick_veto and not old.quick_veto:
+            events.append(QuickVetoStarted(new.id, new.quick_veto))
+        elif old.quick_veto and not new.quick_veto:
+            events.append(QuickVetoEnded(new.id))
+
+        return events
+
+    @classmethod
+    def boiler_status(cls, old: BoilerStatus, new: BoilerStatus) -> List[Event]:
+        old_code = old.code if old else None
+        new_code = new.code if new else None
+        if old_code != new_code:
+            return [BoilerStatusCodeChanged(old_code, new_code, new)]
+        return list()
+
+    @classmethod
+    def errors(cls, old: List[SystemErrorMessage], new: List[SystemErrorMessage]) -> List[Event]:
+        known = set(cls._error_key(error) for error in old or list())
+        return [ErrorMessageAdded(error) for error in new or list() if cls._error_key(error) not in known]
+
+    @classmethod
+    def _error_key(cls, error: SystemErrorMessage):
+        return error.device_name, error.status_code, error.timestamp
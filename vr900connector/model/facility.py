@@ -0,0 +1,16 @@
+class Facility:
+    """
+    A facility (installation) of the account, its serial number is given to the connector or the manager to address it
+
+    Args:
+        serial_number: Serial number of the facility
+        name: Name of the facility
+        firmware_version: Firmware version of the gateway
+    """
+
+    __slots__ = ('serial_number', 'name', 'firmware_version')
+
+    def __init__(self, serial_number: str, name: str, firmware_version: str = None):
+        self.serial_number = serial_number
+        self.name = name
+        self.firmware_version = firmware_version
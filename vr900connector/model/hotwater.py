@@ -24,6 +24,8 @@ class HotWater(Component):
     cannot go above 70
     """
 
+    __slots__ = ()
+
     def __init__(self, component_id: any, name: str, time_program: TimeProgram, current_temperature: float,
                  target_temperature: float, operation_mode: HeatingMode):
         super().__init__(component_id, name, time_program, current_temperature, target_temperature, operation_mode,
@@ -0,0 +1,108 @@
+from . import System, Zone, Room, Mapper
+
+_NOT_MAPPED = object()
+
+
+class _LazyAttribute:
+    """
+    Attribute of :class:`LazySystem` mapped from raw responses on first access
+    """
+
+    def __init__(self, name: str, mapper):
+        self._name = name
+        self._mapper = mapper
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+
+        value = instance._values.get(self._name, _NOT_MAPPED)
+        if value is _NOT_MAPPED:
+            value = self._mapper(*instance._responses)
+            instance._values[self._name] = value
+        return value
+
+    def __set__(self, instance, value):
+        instance._values[self._name] = value
+
+
+class LazySystem(System):
+    """
+    This is a :class:`vr900connector.model.System` keeping raw responses and mapping each component on first access
+    only (then the mapped component is kept). E.g. reading ``outdoor_temperature`` and ``boiler_status`` doesn't map
+    zones, rooms and their time programs, :func:`get_zone` maps only the requested zone.
+
+    Args:
+        full_system: Raw system control response
+        live_report: Raw live report response
+        hvac_state: Raw hvac state response
+        raw_rooms: Raw rooms response, None if the system has no zone controlled by rooms
+    """
+
+    holiday_mode = _LazyAttribute('holiday_mode', lambda full_system, live_report, hvac_state, raw_rooms:
+                                  Mapper.holiday_mode(full_system))
+    boiler_status = _LazyAttribute('boiler_status', lambda full_system, live_report, hvac_state, raw_rooms:
+                                   Mapper.boiler_status(hvac_state, live_report))
+    hot_water = _LazyAttribute('hot_water', lambda full_system, live_report, hvac_state, raw_rooms:
+                               Mapper.domestic_hot_water(full_system, live_report))
+    circulation = _LazyAttribute('circulation', lambda full_system, live_report, hvac_state, raw_rooms:
+                                 Mapper.circulation(full_system))
+    outdoor_temperature = _LazyAttribute('outdoor_temperature', lambda full_system, live_report, hvac_state, raw_rooms:
+                                         Mapper.outdoor_temp(full_system))
+    quick_mode = _LazyAttribute('quick_mode', lambda full_system, live_report, hvac_state, raw_rooms:
+                                Mapper.quick_mode(full_system))
+    errors = _LazyAttribute('errors', lambda full_system, live_report, hvac_state, raw_rooms:
+                            Mapper.errors(hvac_state))
+    reports = _LazyAttribute('reports', lambda full_system, live_report, hvac_state, raw_rooms:
+                             Mapper.reports(live_report))
+
+    def __init__(self, full_system, live_report, hvac_state, raw_rooms):
+        self._responses = (full_system, live_report, hvac_state, raw_rooms)
+        self._values = dict()
+
+        raw_zones = full_system.get("body", dict()).get("zones", list()) if full_system else list()
+        raw_rooms = raw_rooms.get("body", dict()).get("rooms", list()) if raw_rooms else list()
+        self._raw_zones = dict((raw_zone.get("_id"), raw_zone) for raw_zone in raw_zones)
+        self._raw_rooms = dict((int(raw_room.get("roomIndex")), raw_room) for raw_room in raw_rooms)
+        # components by id, in the order of the raw responses, not mapped yet
+        self._zones = dict((zone_id, _NOT_MAPPED) for zone_id in self._raw_zones)
+        self._rooms = dict((room_id, _NOT_MAPPED) for room_id in self._raw_rooms)
+
+    @property
+    def _zones_dict(self):
+        for zone_id in self._zones:
+            self.get_zone(zone_id)
+        return self._zones
+
+    @property
+    def _rooms_dict(self):
+        for room_id in self._rooms:
+            self.get_room(room_id)
+        return self._rooms
+
+    def get_zone(self, zone_id: str) -> Zone:
+        zone = self._zones[zone_id]
+        if zone is _NOT_MAPPED:
+            zone = Mapper.zone(self._raw_zones[zone_id])
+            self._zones[zone_id] = zone
+        return zone
+
+    def get_room(self, room_id: int) -> Room:
+        room_id = int(room_id)
+        room = self._rooms[room_id]
+        if room is _NOT_MAPPED:
+            room = Mapper.room(self._raw_rooms[room_id])
+            self._rooms[room_id] = room
+        return room
+
+    def set_zone(self, zone_id: str, zone: Zone):
+        self._zones[zone_id] = zone
+
+    def set_room(self, room_id: int, room: Room):
+        self._rooms[int(room_id)] = room
+
+    def remove_zone(self, zone_id: str):
+        self._zones.pop(zone_id, None)
+
+    def remove_room(self, room_id: int):
+        self._rooms.pop(int(room_id), None)
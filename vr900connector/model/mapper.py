@@ -1,13 +1,73 @@
 import datetime
+import threading
+import weakref
 
 from . import BoilerStatus, Circulation, Device, HolidayMode, HotWater, QuickMode, QuickVeto, Room, TimeProgram, \
-    TimeProgramDay, TimeProgramDaySetting, Zone, HeatingMode, SystemErrorMessage
+    TimeProgramDay, TimeProgramDaySetting, Zone, HeatingMode, SystemErrorMessage, System, Report, Facility
 
 _DATE_FORMAT = "%Y-%m-%d"
 
+_DAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+_TIME_PROGRAMS = weakref.WeakValueDictionary()
+_TIME_PROGRAMS_LOCK = threading.Lock()
+
 
 class Mapper:
 
+    @classmethod
+    def system(cls, full_system, live_report, hvac_state, raw_rooms):
+        report_index = Mapper._live_report_index(live_report)
+        holiday_mode = Mapper.holiday_mode(full_system)
+        boiler_status = Mapper._boiler_status(hvac_state, report_index)
+        zones = Mapper.zones(full_system)
+        rooms = Mapper.rooms(raw_rooms) if raw_rooms is not None else None
+        hot_water = Mapper._domestic_hot_water(full_system, report_index)
+        circulation = Mapper.circulation(full_system)
+
+        outdoor_temperature = Mapper.outdoor_temp(full_system)
+        quick_mode = Mapper.quick_mode(full_system)
+        errors = Mapper.errors(hvac_state)
+        reports = Mapper.reports(live_report)
+
+        return System(holiday_mode, boiler_status, zones, rooms, hot_water, circulation, outdoor_temperature,
+                      quick_mode, errors, reports)
+
+    @classmethod
+    def fragments(cls, full_system, live_report, hvac_state, raw_rooms):
+        """
+        Split raw responses into the parts each component of :func:`system` is mapped from. Zones and rooms are
+        dictionaries by id, other components are keyed by their attribute name in :class:`System`. Metadata which
+        changes on every call without changing the mapped component (like sync state timestamps) is left out.
+        """
+        body = full_system.get("body", dict()) if full_system else dict()
+        configuration = body.get("configuration", dict())
+        dhw = (body.get("dhw") or [dict()])[0]
+        hvac_state = hvac_state or dict()
+        hvac_status = Mapper._find_hvac_message_status(hvac_state)
+        hvac_meta = hvac_state.get("meta", dict())
+        report_index = Mapper._live_report_index(live_report)
+
+        raw_rooms_list = list()
+        if raw_rooms:
+            raw_rooms_list = raw_rooms.get("body", dict()).get("rooms", list())
+
+        return {
+            "zones": dict((raw_zone.get("_id"), raw_zone) for raw_zone in body.get("zones", list())),
+            "rooms": dict((raw_room.get("roomIndex"), raw_room) for raw_room in raw_rooms_list),
+            "holiday_mode": configuration.get("holidaymode"),
+            "quick_mode": configuration.get("quickmode"),
+            "outdoor_temperature": body.get("status", dict()).get("outside_temperature"),
+            "hot_water": (dhw.get("_id"), dhw.get("hotwater"), Mapper._find_dhw_temperature_report(report_index)),
+            "circulation": (dhw.get("_id"), dhw.get("circulation")),
+            "boiler_status": (hvac_status, hvac_meta.get("onlineStatus"), hvac_meta.get("firmwareUpdateStatus"),
+                              Mapper._find_water_pressure_report(report_index),
+                              Mapper._find_boiler_temperature_report(report_index)),
+            "errors": [error for error in hvac_state.get("body", dict()).get("errorMessages", list())
+                       if error.get("type") == "ERROR"],
+            "reports": live_report.get("body") if live_report else None
+        }
+
     @classmethod
     def quick_mode(cls, full_system):
         if full_system:
@@ -23,9 +83,26 @@ class Mapper:
             return full_system.get("body", dict()).get("status", dict()).get('outside_temperature')
 
     @classmethod
-    def installation_name(cls, facilities):
+    def installation_name(cls, facilities, serial_number: str = None):
+        """
+        Name of the facility having the serial number, or of the first facility if no serial number is given
+        """
         if facilities:
-            return facilities.get("body", dict()).get("facilitiesList", list())[0].get("name")
+            for facility in facilities.get("body", dict()).get("facilitiesList", list()):
+                if serial_number is None or facility.get("serialNumber") == serial_number:
+                    return facility.get("name")
+        return None
+
+    @classmethod
+    def facilities(cls, raw_facilities):
+        """
+        Map facilities, either the response of the facilities list or the list of facilities itself (as returned by
+        :func:`vr900connector.api.ApiConnector.facilities`)
+        """
+        if isinstance(raw_facilities, dict):
+            raw_facilities = raw_facilities.get("body", dict()).get("facilitiesList", list())
+        return [Facility(raw.get("serialNumber"), raw.get("name"), raw.get("firmwareVersion"))
+                for raw in raw_facilities or list()]
 
     @classmethod
     def rooms(cls, raw_rooms):
@@ -79,6 +156,28 @@ class Mapper:
 
     @classmethod
     def time_program(cls, raw_time_program, mode_key_name=""):
+        """
+        Time programs are interned by content: as long as a time program is referenced, mapping the same raw time
+        program again returns the same instance (shared by snapshots and by components having the same schedule), this
+        is safe since time programs are immutable
+        """
+        key = (mode_key_name,)
+        if raw_time_program:
+            key += tuple(tuple((setting.get("startTime"), setting.get("temperatureSetpoint"),
+                                setting.get(mode_key_name))
+                               for setting in raw_time_program.get(day) or ()) for day in _DAYS)
+        with _TIME_PROGRAMS_LOCK:
+            time_program = _TIME_PROGRAMS.get(key)
+
+        if time_program is None:
+            time_program = Mapper._map_time_program(raw_time_program, mode_key_name)
+            with _TIME_PROGRAMS_LOCK:
+                time_program = _TIME_PROGRAMS.setdefault(key, time_program)
+
+        return time_program
+
+    @classmethod
+    def _map_time_program(cls, raw_time_program, mode_key_name):
         result = dict()
         if raw_time_program:
             result["monday"] = Mapper.time_program_day(raw_time_program.get("monday"), mode_key_name)
@@ -121,6 +220,10 @@ class Mapper:
 
     @classmethod
     def boiler_status(cls, hvac_state, live_report):
+        return cls._boiler_status(hvac_state, cls._live_report_index(live_report))
+
+    @classmethod
+    def _boiler_status(cls, hvac_state, report_index):
         if hvac_state:
             hvac_state_info = Mapper._find_hvac_message_status(hvac_state)
             meta = hvac_state.get('meta', dict())
@@ -133,8 +236,8 @@ class Mapper:
                 hint = hvac_state_info.get("hint")
                 online = meta.get('onlineStatus', dict()).get('status')
                 update = meta.get('firmwareUpdateStatus', dict()).get('status')
-                water_pressure = Mapper._find_water_pressure_report(live_report)
-                boiler_temperature = Mapper._find_boiler_temperature_report(live_report)
+                water_pressure = Mapper._find_water_pressure_report(report_index)
+                boiler_temperature = Mapper._find_boiler_temperature_report(report_index)
 
                 return BoilerStatus(device_name, description, title, code, hint, last_update, online, update,
                                     water_pressure, boiler_temperature)
@@ -176,13 +279,25 @@ class Mapper:
                 # No way to find start_date, Quick veto on zone lasts 6 hours
                 quick_veto = QuickVeto(-1, raw_quick_veto.get("setpoint_temperature"))
 
-            rbr = raw_zone.get("currently_controlled_by", dict()).get("name", "") == "RBR"
+            rbr = cls._is_rbr(raw_zone)
 
             return Zone(zone_id, name, time_program, current_temperature, target_temp, operation_mode, quick_veto,
                         target_min_temp, active_function, rbr)
 
+    @classmethod
+    def has_rbr_zone(cls, full_system):
+        if full_system:
+            for raw_zone in full_system.get("body", dict()).get("zones", list()):
+                if cls._is_rbr(raw_zone):
+                    return True
+        return False
+
     @classmethod
     def domestic_hot_water(cls, full_system, live_report):
+        return cls._domestic_hot_water(full_system, cls._live_report_index(live_report))
+
+    @classmethod
+    def _domestic_hot_water(cls, full_system, report_index):
         hot_water_list = None
         if full_system:
             hot_water_list = full_system.get("body", dict()).get("dhw")
@@ -192,16 +307,16 @@ class Mapper:
             dwh_id = hot_water_list[0].get("_id")
 
             if raw_hot_water:
-                return cls._map_hot_water(raw_hot_water, dwh_id, live_report)
+                return cls._map_hot_water(raw_hot_water, dwh_id, report_index)
 
     @classmethod
     def domestic_hot_water_alone(cls, raw_hot_water, dhw_id, live_report):
         if raw_hot_water:
             raw_hot_water_body = raw_hot_water.get("body", dict())
-            return cls._map_hot_water(raw_hot_water_body, dhw_id, live_report)
+            return cls._map_hot_water(raw_hot_water_body, dhw_id, cls._live_report_index(live_report))
 
     @classmethod
-    def _map_hot_water(cls, raw_hot_water, dhw_id, live_report):
+    def _map_hot_water(cls, raw_hot_water, dhw_id, report_index):
         target_temp = raw_hot_water.get("configuration", dict()).get("temperature_setpoint")
         raw_operation_mode = raw_hot_water.get("configuration", dict()).get("operation_mode")
         operation_mode = None
@@ -211,12 +326,10 @@ class Mapper:
 
         current_temp = None
         name = None
-        if live_report:
-            dhw_report = Mapper._find_dhw_temperature_report(live_report)
-
-            if dhw_report:
-                current_temp = dhw_report.get("value")
-                name = dhw_report.get("name")
+        dhw_report = Mapper._find_dhw_temperature_report(report_index)
+        if dhw_report:
+            current_temp = dhw_report.get("value")
+            name = dhw_report.get("name")
 
         return HotWater(dhw_id, name, time_program, current_temp, target_temp, operation_mode)
 
@@ -258,6 +371,10 @@ class Mapper:
 
         return Circulation(circulation_id, name, time_program, operation_mode)
 
+    @classmethod
+    def _is_rbr(cls, raw_zone):
+        return raw_zone.get("currently_controlled_by", dict()).get("name", "") == "RBR"
+
     @classmethod
     def _find_hvac_message_status(cls, hvac_state):
         for message in hvac_state.get("body", dict()).get("errorMessages", list()):
@@ -265,31 +382,44 @@ class Mapper:
                 return message
 
     @classmethod
-    def _find_water_pressure_report(cls, live_report):
+    def reports(cls, live_report):
+        reports = list()
         if live_report:
             for device in live_report.get("body", dict()).get("devices", list()):
                 for report in device.get("reports", list()):
-                    if report.get("associated_device_function") == "HEATING" \
-                            and report.get("_id") == "WaterPressureSensor":
-                        return report.get("value")
+                    reports.append(Report(device.get("_id"), device.get("name"), report.get("_id"), report.get("name"),
+                                          report.get("value"), report.get("unit"), report.get("measurement_category"),
+                                          report.get("associated_device_function")))
+        return reports
 
     @classmethod
-    def _find_boiler_temperature_report(cls, live_report):
-        if live_report:
-            for device in live_report.get("body", dict()).get("devices", list()):
-                for report in device.get("reports", list()):
-                    if report.get("associated_device_function") == "HEATING" \
-                            and report.get("_id") == "FlowTemperatureSensor":
-                        return report.get("value")
+    def _find_water_pressure_report(cls, report_index):
+        report = report_index.get(("HEATING", "WaterPressureSensor"))
+        if report:
+            return report.get("value")
+
+    @classmethod
+    def _find_boiler_temperature_report(cls, report_index):
+        report = report_index.get(("HEATING", "FlowTemperatureSensor"))
+        if report:
+            return report.get("value")
+
+    @classmethod
+    def _find_dhw_temperature_report(cls, report_index):
+        return report_index.get(("DHW", "DomesticHotWaterTankTemperature"))
 
     @classmethod
-    def _find_dhw_temperature_report(cls, live_report):
+    def _live_report_index(cls, live_report):
+        """
+        Reports of a live report by (associated_device_function, _id), built in one pass. The live report is searched
+        several times when mapping a system, so the index is built once by the caller and passed to the _find_* methods
+        """
+        index = dict()
         if live_report:
             for device in live_report.get("body", dict()).get("devices", list()):
                 for report in device.get("reports", list()):
-                    if report.get("associated_device_function") == "DHW" \
-                            and report.get("_id") == "DomesticHotWaterTankTemperature":
-                        return report
+                    index.setdefault((report.get("associated_device_function"), report.get("_id")), report)
+        return index
 
     @classmethod
     def _datetime(cls, timestamp):
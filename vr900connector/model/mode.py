@@ -2,7 +2,7 @@ from enum import Enum
 
 
 class Mode:
-    pass
+    __slots__ = ()
 
 
 class QuickVeto(Mode):
@@ -19,6 +19,8 @@ class QuickVeto(Mode):
         target_temperature: Target temperature of the quick veto
     """
 
+    __slots__ = ('remaining_time', 'target_temperature')
+
     def __init__(self, remaining_time: int, target_temperature: float):
         if remaining_time > 1440:
             raise ValueError(remaining_time)
@@ -0,0 +1,28 @@
+class Report:
+    """
+    This class represents a sensor reading of the live report, like a temperature or the water pressure
+
+    Args:
+        device_id: Id of the device providing the report, e.g. 'Control_DHW'
+        device_name: Name of the device
+        report_id: Id of the report, e.g. 'WaterPressureSensor'
+        name: Name of the report
+        value: Value of the reading
+        unit: Unit of the value, e.g. '°C' or 'bar'
+        measurement_category: Category of the reading, e.g. 'TEMPERATURE' or 'PRESSURE'
+        associated_device_function: Function the reading is related to, e.g. 'DHW' or 'HEATING'
+    """
+
+    __slots__ = ('device_id', 'device_name', 'report_id', 'name', 'value', 'unit', 'measurement_category',
+                 'associated_device_function')
+
+    def __init__(self, device_id: str, device_name: str, report_id: str, name: str, value: float, unit: str,
+                 measurement_category: str, associated_device_function: str):
+        self.device_id = device_id
+        self.device_name = device_name
+        self.report_id = report_id
+        self.name = name
+        self.value = value
+        self.unit = unit
+        self.measurement_category = measurement_category
+        self.associated_device_function = associated_device_function
@@ -28,6 +28,8 @@ class Room(Component):
     Maximum temperature celsius for a room, this is coming from my tests with android application, cannot go above 30
     """
 
+    __slots__ = ('child_lock', 'window_open', 'devices')
+
     def __init__(self, component_id: any, name: str, time_program: TimeProgram, current_temperature: float,
                  target_temperature: float, operation_mode: HeatingMode, quick_veto: QuickVeto, child_lock: bool,
                  window_open: bool, devices: List[Device]):
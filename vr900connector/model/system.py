@@ -1,7 +1,8 @@
 import datetime
 from typing import List
 
-from . import ActiveMode, HolidayMode, HotWater, Room, Zone, BoilerStatus, Circulation, QuickMode, SystemErrorMessage
+from . import ActiveMode, HolidayMode, HotWater, Room, Zone, BoilerStatus, Circulation, QuickMode, SystemErrorMessage, \
+    Report
 
 
 class System:
@@ -21,11 +22,12 @@ class System:
         outdoor_temperature: Outdoor temperature, if available
         quick_mode: A :class:`vr900connector.QuickMode` if any is running on
         errors: List of errors :class:`vr900connector.SystemErrorMessage` if any
+        reports: List of every sensor reading :class:`vr900connector.model.Report` of the live report
     """
 
     def __init__(self, holiday_mode: HolidayMode, boiler_status: BoilerStatus, zones: List[Zone], rooms: List[Room],
                  hot_water: HotWater, circulation: Circulation, outdoor_temperature: float, quick_mode: QuickMode,
-                 errors: List[SystemErrorMessage]):
+                 errors: List[SystemErrorMessage], reports: List[Report] = None):
         if holiday_mode:
             self.holiday_mode = holiday_mode
         else:
@@ -48,6 +50,7 @@ class System:
         self.outdoor_temperature = outdoor_temperature
         self.quick_mode = quick_mode
         self.errors = errors
+        self.reports = reports if reports is not None else []
 
     def get_zone(self, zone_id: str) -> Zone:
         return self._zones_dict[zone_id]
@@ -61,6 +64,12 @@ class System:
     def set_room(self, room_id: int, room: Room):
         self._rooms_dict[int(room_id)] = room
 
+    def remove_zone(self, zone_id: str):
+        self._zones_dict.pop(zone_id, None)
+
+    def remove_room(self, room_id: int):
+        self._rooms_dict.pop(int(room_id), None)
+
     @property
     def rooms(self):
         return self._rooms_dict.values()
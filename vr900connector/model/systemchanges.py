@@ -0,0 +1,26 @@
+class SystemChanges:
+    """
+    Represents what has been updated in a :class:`vr900connector.model.System` by
+    :func:`vr900connector.SystemManager.refresh`. An empty change set is falsy.
+
+    Args:
+        zones: Ids of zones added or updated
+        rooms: Ids of rooms added or updated
+        removed_zones: Ids of zones not in the system anymore
+        removed_rooms: Ids of rooms not in the system anymore
+        attributes: Names of other system attributes that have been replaced, e.g. 'hot_water' or 'boiler_status'
+    """
+
+    def __init__(self, zones=None, rooms=None, removed_zones=None, removed_rooms=None, attributes=None):
+        self.zones = zones if zones is not None else []
+        self.rooms = rooms if rooms is not None else []
+        self.removed_zones = removed_zones if removed_zones is not None else []
+        self.removed_rooms = removed_rooms if removed_rooms is not None else []
+        self.attributes = attributes if attributes is not None else []
+
+    def __bool__(self):
+        return bool(self.zones or self.rooms or self.removed_zones or self.removed_rooms or self.attributes)
+
+    def __repr__(self):
+        return 'SystemChanges(zones={}, rooms={}, removed_zones={}, removed_rooms={}, attributes={})' \
+            .format(self.zones, self.rooms, self.removed_zones, self.removed_rooms, self.attributes)
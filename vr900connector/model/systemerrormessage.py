@@ -3,6 +3,8 @@ import datetime
 
 class SystemErrorMessage:
 
+    __slots__ = ('device_name', 'title', 'status_code', 'description', 'timestamp')
+
     def __init__(self, device_name: str, title: str, status_code: str, description: str, timestamp: datetime):
         self.device_name = device_name
         self.title = title
@@ -1,23 +1,39 @@
-import copy
-from datetime import timedelta, datetime
-from typing import List, Dict
+from array import array
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from types import MappingProxyType
+from typing import Iterable, Iterator, Mapping, Optional, Tuple
 from . import HeatingMode
 
+_DAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+_MINUTES_PER_DAY = 24 * 60
+_MODE_CODES = dict((mode, code) for code, mode in enumerate(HeatingMode))
+
+_numpy_module = False
+
 
 class TimeProgramDaySetting:
     """
-    This class represents a time program setting within a day
+    This class represents a time program setting within a day, settings are immutable
 
     Args:
         start_time: Start time of the setting (format hh:mm)
         target_temperature: Target temperature of the setting
         mode: The mode that will be applied to the component (always None for a :class: `vr900connector.Room`)
     """
+    __slots__ = ('start_time', 'target_temperature', 'mode', 'absolute_minutes')
+
     def __init__(self, start_time: str, target_temperature: float, mode: HeatingMode):
-        self.start_time = start_time
-        self.target_temperature = target_temperature
-        self.mode = mode
-        self.absolute_minutes = TimeProgramDaySetting.to_absolute_minute(start_time)
+        object.__setattr__(self, 'start_time', start_time)
+        object.__setattr__(self, 'target_temperature', target_temperature)
+        object.__setattr__(self, 'mode', mode)
+        object.__setattr__(self, 'absolute_minutes', TimeProgramDaySetting.to_absolute_minute(start_time))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('TimeProgramDaySetting is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('TimeProgramDaySetting is immutable')
 
     @classmethod
     def to_absolute_minute(cls, start_time) -> int:
@@ -28,59 +44,218 @@ class TimeProgramDaySetting:
             return hour + minute
         raise ValueError(start_time)
 
+    def __copy__(self):
+        return self
+
     def __deepcopy__(self, memodict={}):
-        return TimeProgramDaySetting(self.start_time, self.target_temperature, self.mode)
+        return self
 
 
 class TimeProgramDay:
     """
-    This class represents a time program day, it's basically a list of :class: `vr900connector.TimeProgramDaySetting`
+    This class represents a time program day, it's basically a tuple of :class: `vr900connector.TimeProgramDaySetting`,
+    time program days are immutable
 
     Args:
-        time_program_day_settings: list of settings (:class: `vr900connector.TimeProgramDaySetting`)
+        time_program_day_settings: settings of the day (:class: `vr900connector.TimeProgramDaySetting`)
     """
 
-    def __init__(self, time_program_day_settings: List[TimeProgramDaySetting]):
-        self.time_program_day_settings = time_program_day_settings
+    __slots__ = ('time_program_day_settings',)
+
+    def __init__(self, time_program_day_settings: Iterable[TimeProgramDaySetting]):
+        object.__setattr__(self, 'time_program_day_settings', tuple(time_program_day_settings))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('TimeProgramDay is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('TimeProgramDay is immutable')
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memodict={}):
+        return self
 
 
 class TimeProgram:
     """
-    This class represents a time program (a week)
+    This class represents a time program (a week), time programs are immutable: ``time_program_days`` is a read-only
+    mapping of immutable :class: `vr900connector.TimeProgramDay`.
+
+    On the first lookup, the time program is compiled into a sorted index of the settings by minute of the week, so
+    lookups are done with a binary search.
 
     Args:
-        time_program_days: List of time program day (:class: `vr900connector.TimeProgramDay`)
+        time_program_days: Time program days by day name (:class: `vr900connector.TimeProgramDay`)
     """
 
-    def __init__(self, time_program_days: Dict[str, TimeProgramDay]):
-        self.time_program_days = time_program_days
+    __slots__ = ('time_program_days', '_index', '__weakref__')
+
+    def __init__(self, time_program_days: Mapping[str, TimeProgramDay]):
+        object.__setattr__(self, 'time_program_days', MappingProxyType(dict(time_program_days)))
+        object.__setattr__(self, '_index', None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('TimeProgram is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('TimeProgram is immutable')
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memodict={}):
+        return self
 
     def get_time_program_for(self, search_date: datetime) -> TimeProgramDaySetting:
         """
-        This return the corresponding time program day setting for a given date
+        This return the corresponding time program day setting for a given date, it's the last setting starting at or
+        before the date, going back to the previous days (and to the end of the week) if needed. The setting is shared,
+        it's not a copy.
 
         :param search_date: The date for which you want to get the :class:`vr900connector.TimeProgramDaySetting`
-        :return: The time program day setting corresponding to the date
+        :return: The time program day setting corresponding to the date, None if the time program has no setting
         """
-        day = search_date.strftime("%A").lower()
-        day_before = (search_date - timedelta(days=1)).strftime("%A").lower()
-        time = str(search_date.hour) + ':' + str(search_date.minute)
+        starts, settings, _ = self._get_index()
+        if settings:
+            # index -1 (date before the first setting of the week) wraps to the last setting of the week
+            return settings[bisect_right(starts, _minute_of_week(search_date)) - 1]
+        return None
 
-        absolute_minute = TimeProgramDaySetting.to_absolute_minute(time)
-        timeProgramDay = self.time_program_days[day]
-        timeProgramDayBefore = self.time_program_days[day_before]
+    def evaluate(self, start: datetime, end: datetime, step: timedelta = timedelta(minutes=1)):
+        """
+        Evaluate the time program at ``start``, ``start + step``, ... until ``end`` (excluded). Arrays are filled
+        between the changes of setting, there is no lookup per date.
+
+        Arrays are numpy arrays if numpy is installed, :class:`array.array` otherwise. Mode codes are indexes in
+        ``list(HeatingMode)``, -1 when the setting has no mode. Temperature is NaN when the setting has no temperature.
+
+        :param start: first date to evaluate
+        :param end: end of the range, excluded
+        :param step: time between two dates
+        :return: a tuple (target temperatures, mode codes)
+        """
+        if step <= timedelta(0):
+            raise ValueError(step)
 
-        # if given hour:minute is before the first setting of the day, get last setting of the previous day
-        if absolute_minute < timeProgramDay.time_program_day_settings[0].absolute_minutes:
-            return copy.deepcopy(timeProgramDayBefore.time_program_day_settings[-1])
+        count = max(0, -((start - end) // step))
+        numpy = _numpy()
+        if numpy:
+            temperatures = numpy.full(count, numpy.nan)
+            modes = numpy.full(count, -1, dtype=numpy.int8)
         else:
-            idx = 0
-            while idx < len(timeProgramDay.time_program_day_settings) - 1:
-                if absolute_minute > timeProgramDay.time_program_day_settings[idx].absolute_minutes and \
-                        (idx + 1 == len(timeProgramDay.time_program_day_settings)
-                         or absolute_minute < timeProgramDay.time_program_day_settings[idx + 1].absolute_minutes):
-                    return copy.deepcopy(timeProgramDay.time_program_day_settings[idx])
-                idx += 1
-
-            # if no match a this point, it means search date is after the last setting of the day
-            return copy.deepcopy(timeProgramDay.time_program_day_settings[-1])
+            temperatures = array('d', [float('nan')]) * count
+            modes = array('b', [-1]) * count
+
+        first_index = 0
+        setting = self.get_time_program_for(start)
+        for change_date, next_setting in self._changes(start, end):
+            index = -((start - change_date) // step)
+            _fill(temperatures, modes, first_index, index, setting, numpy)
+            first_index, setting = index, next_setting
+        _fill(temperatures, modes, first_index, count, setting, numpy)
+
+        return temperatures, modes
+
+    def next_transition(self, after: datetime) -> Optional[Tuple[datetime, TimeProgramDaySetting]]:
+        """
+        Get the next time the target temperature or the mode of the time program changes
+
+        :param after: the search starts strictly after this date
+        :return: a tuple (date, setting starting at this date), None if the time program never changes
+        """
+        # every setting starts once a week, so a change, if any, happens within a week
+        for transition in self.transitions(after, after + timedelta(weeks=1, minutes=1)):
+            return transition
+        return None
+
+    def transitions(self, start: datetime, end: datetime = None) -> Iterator[Tuple[datetime, TimeProgramDaySetting]]:
+        """
+        Lazily iterate over the changes of target temperature or mode, across days and weeks. Settings starting with
+        the same target temperature and mode as the previous setting are skipped.
+
+        :param start: changes strictly after this date are returned
+        :param end: changes before this date (excluded) are returned, if None, the iteration never stops (unless the
+        time program never changes)
+        :return: tuples (date, setting starting at this date)
+        """
+        previous = self.get_time_program_for(start)
+        if previous is None or not self._get_index()[2]:
+            return
+
+        for change_date, setting in self._changes(start, end):
+            if setting.target_temperature != previous.target_temperature or setting.mode != previous.mode:
+                yield change_date, setting
+                previous = setting
+
+    def _changes(self, start: datetime, end: datetime = None):
+        """
+        Dates (and settings) strictly after start and before end when a setting starts, in chronological order
+        """
+        starts, settings, _ = self._get_index()
+        if not settings:
+            return
+
+        week_start = start.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=start.weekday())
+        index = bisect_right(starts, _minute_of_week(start))
+        week = 0
+        while True:
+            if index == len(starts):
+                index = 0
+                week += 1
+            change_date = week_start + timedelta(weeks=week, minutes=starts[index])
+            if end is not None and change_date >= end:
+                return
+            yield change_date, settings[index]
+            index += 1
+
+    def _get_index(self):
+        """
+        Sorted minutes of the week when a setting starts, with the corresponding settings and whether the target
+        temperature or the mode ever changes
+        """
+        if self._index is None:
+            entries = list()
+            for day_index, day in enumerate(_DAYS):
+                time_program_day = self.time_program_days.get(day)
+                if time_program_day:
+                    for setting in time_program_day.time_program_day_settings:
+                        entries.append((day_index * _MINUTES_PER_DAY + setting.absolute_minutes, setting))
+            entries.sort(key=lambda entry: entry[0])
+            settings = tuple(entry[1] for entry in entries)
+            has_transition = len(set((setting.target_temperature, setting.mode) for setting in settings)) > 1
+            object.__setattr__(self, '_index', (tuple(entry[0] for entry in entries), settings, has_transition))
+        return self._index
+
+
+def _minute_of_week(date: datetime) -> int:
+    return date.weekday() * _MINUTES_PER_DAY + date.hour * 60 + date.minute
+
+
+def _fill(temperatures, modes, first_index: int, last_index: int, setting: TimeProgramDaySetting, numpy):
+    if setting is None or last_index <= first_index:
+        return
+
+    temperature = setting.target_temperature if setting.target_temperature is not None else float('nan')
+    mode = _MODE_CODES.get(setting.mode, -1)
+    if numpy:
+        temperatures[first_index:last_index] = temperature
+        modes[first_index:last_index] = mode
+    else:
+        temperatures[first_index:last_index] = array('d', [temperature]) * (last_index - first_index)
+        modes[first_index:last_index] = array('b', [mode]) * (last_index - first_index)
+
+
+def _numpy():
+    """
+    numpy is optional and slow to import, it's imported on first use only
+    """
+    global _numpy_module
+    if _numpy_module is False:
+        try:
+            import numpy
+            _numpy_module = numpy
+        except ImportError:
+            _numpy_module = None
+    return _numpy_module
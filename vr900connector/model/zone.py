@@ -30,6 +30,8 @@ class Zone(Component):
     Maximum temperature celsius for a room, this is coming from my tests with android application, cannot go above 30
     """
 
+    __slots__ = ('target_min_temperature', 'active_function', 'rbr')
+
     def __init__(self, component_id: any, name: str, time_program: TimeProgram, current_temperature: float,
                  target_temperature: float, operation_mode: HeatingMode, quick_veto: QuickVeto,
                  target_min_temperature: float, active_function: str, rbr: bool):
@@ -0,0 +1,125 @@
+import logging
+import threading
+from time import monotonic
+from typing import Dict, List, Tuple
+
+from .api import Defaults
+from .model import Mapper
+
+_LOGGER = logging.getLogger('PollScheduler')
+
+
+class PollScheduler:
+    """
+    Decide when each family of API resources has to be requested again by :func:`vr900connector.SystemManager.poll`.
+
+    Each family has a base, a minimum and a maximum interval (in seconds). When a response brings the same data as the
+    previous one (only data mapped to the system is compared, see :func:`vr900connector.model.Mapper.fragments`), the
+    interval of the family grows by the backoff factor, up to the maximum. When data changes, the interval goes back to
+    the base interval. After a write, :func:`boost` gets the affected families requested at their minimum interval for
+    the next ``boost_polls`` requests, then the usual intervals apply again.
+
+    Args:
+        intervals: (base, minimum, maximum) intervals per family, e.g. ``{PollScheduler.HVAC: (600, 30, 3600)}``,
+        families not provided use :attr:`vr900connector.api.Defaults.POLLING_INTERVALS`
+        backoff_factor: Factor applied to the interval of a family when its data didn't change
+        boost_polls: Number of requests of a family done at its minimum interval after :func:`boost`
+    """
+
+    SYSTEM = 'system'
+    ROOMS = 'rooms'
+    LIVE_REPORT = 'live_report'
+    HVAC = 'hvac'
+
+    FAMILIES = [SYSTEM, ROOMS, LIVE_REPORT, HVAC]
+    """
+    Families of resources needed to build a :class:`vr900connector.model.System`
+    """
+
+    _FRAGMENTS_ARGUMENTS = {SYSTEM: 0, LIVE_REPORT: 1, HVAC: 2, ROOMS: 3}
+
+    def __init__(self, intervals: Dict[str, Tuple[float, float, float]] = None,
+                 backoff_factor: float = Defaults.POLLING_BACKOFF_FACTOR,
+                 boost_polls: int = Defaults.POLLING_BOOST_POLLS):
+        self._intervals = dict(Defaults.POLLING_INTERVALS)
+        self._intervals.update(intervals or dict())
+        self._backoff_factor = backoff_factor
+        self._boost_polls = boost_polls
+        self._lock = threading.Lock()
+        self._current = dict((family, self._intervals[family][0]) for family in self.FAMILIES)
+        self._next = dict((family, 0) for family in self.FAMILIES)
+        self._last = dict()
+        self._boosted = dict((family, 0) for family in self.FAMILIES)
+
+    def interval(self, family: str) -> float:
+        """
+        Current interval of a family
+        """
+        return self._current[family]
+
+    def due(self) -> List[str]:
+        """
+        Families that have to be requested now
+        """
+        now = monotonic()
+        with self._lock:
+            return [family for family in self.FAMILIES if self._next[family] <= now]
+
+    def next_delay(self) -> float:
+        """
+        Seconds before a family is due
+        """
+        with self._lock:
+            return max(0, min(self._next.values()) - monotonic())
+
+    def record(self, family: str, response) -> bool:
+        """
+        Record the response received for a family and schedule its next request
+
+        :param family: the family requested
+        :param response: the JSON response, metadata (sync states, timestamps) and values changing on every response
+            (like the clock of the controller) are ignored
+        :return: True if data changed since the previous response
+        """
+        data = self._data(family, response)
+        base, minimum, maximum = self._intervals[family]
+
+        with self._lock:
+            changed = family not in self._last or self._last[family] != data
+            if self._boosted[family] > 0:
+                self._boosted[family] -= 1
+                self._current[family] = minimum
+            elif changed:
+                self._current[family] = base
+            else:
+                self._current[family] = min(self._current[family] * self._backoff_factor, maximum)
+            self._last[family] = data
+            self._next[family] = monotonic() + self._current[family]
+
+        _LOGGER.debug('%s %s, next request in %s seconds', family, 'changed' if changed else 'unchanged',
+                      self._current[family])
+        return changed
+
+    def boost(self, *families: str):
+        """
+        Request families again after their minimum interval, e.g. after a write the API needs some time to reflect
+        it. The minimum interval is kept for the next ``boost_polls`` requests of each family
+        """
+        now = monotonic()
+        with self._lock:
+            for family in families:
+                minimum = self._intervals[family][1]
+                self._current[family] = minimum
+                self._boosted[family] = self._boost_polls
+                self._next[family] = min(self._next[family], now + minimum)
+
+    @classmethod
+    def _data(cls, family: str, response):
+        """
+        Parts of a response the system is mapped from
+        """
+        if not isinstance(response, dict):
+            return response
+        responses = [None] * len(cls._FRAGMENTS_ARGUMENTS)
+        responses[cls._FRAGMENTS_ARGUMENTS[family]] = response
+        return Mapper.fragments(*responses)
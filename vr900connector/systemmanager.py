@@ -1,11 +1,40 @@
+import hashlib
 import logging
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
+from typing import Callable, Dict, List
 
-from .api import ApiConnector, Urls, Payloads, Defaults
-from .model import Mapper, System, HotWater, QuickMode, QuickVeto, Room, Zone, HeatingMode, Circulation, Constants
+from .api import ApiConnector, Urls, Payloads, Defaults, ResponseCache, SessionRefresher, SessionStore
+from .util import JsonCodec
+from .pollscheduler import PollScheduler
+from .model import Mapper, HotWater, QuickMode, QuickVeto, Room, Zone, HeatingMode, Circulation, Constants, System, \
+    LazySystem, SystemChanges, Event, Events, Facility
 
 LOGGER = logging.getLogger('SystemManager')
 
+_MAX_WORKERS = 4
+
+_POLLING_RETRY_DELAY = 60
+
+_BOOSTED_FAMILIES = [
+    (Urls.rooms(), (PollScheduler.ROOMS,)),
+    (Urls.system(), (PollScheduler.SYSTEM,)),
+    (Urls.hvac_update(), (PollScheduler.HVAC, PollScheduler.LIVE_REPORT))
+]
+
+_ATTRIBUTE_MAPPERS = {
+    'holiday_mode': lambda full_system, live_report, hvac_state: Mapper.holiday_mode(full_system),
+    'quick_mode': lambda full_system, live_report, hvac_state: Mapper.quick_mode(full_system),
+    'outdoor_temperature': lambda full_system, live_report, hvac_state: Mapper.outdoor_temp(full_system),
+    'hot_water': lambda full_system, live_report, hvac_state: Mapper.domestic_hot_water(full_system, live_report),
+    'circulation': lambda full_system, live_report, hvac_state: Mapper.circulation(full_system),
+    'boiler_status': lambda full_system, live_report, hvac_state: Mapper.boiler_status(hvac_state, live_report),
+    'errors': lambda full_system, live_report, hvac_state: Mapper.errors(hvac_state),
+    'reports': lambda full_system, live_report, hvac_state: Mapper.reports(live_report)
+}
+
 
 class SystemManager:
     """
@@ -19,79 +48,425 @@ class SystemManager:
         password: Password for login
         smart_phone_id: Smart phone id required by the API
         file_path: Where to store files created by the underlying connector.
+        concurrent: If True, the independent requests needed by :func:`get_system` are sent concurrently, so a refresh
+        takes roughly the time of the slowest request instead of the sum of all of them
+        cache: Cache for GET responses, see :class:`vr900connector.api.ResponseCache`
+        scheduler: Decides which resources are requested by :func:`poll`, see
+        :class:`vr900connector.pollscheduler.PollScheduler`
+        session_store: Where to keep cookies and serial number, see :class:`vr900connector.api.SessionStore`
+        http_adapter: HTTP adapter shared with other managers, see :class:`vr900connector.api.ApiConnector`
+        serial_number: Serial number of the facility the manager works with, the first facility of the account if not
+        provided, see :func:`get_facilities`. Every method calling the API also accepts the serial number of another
+        facility
     """
 
     def __init__(self, user: str, password: str, smart_phone_id: str = Defaults.SMART_PHONE_ID,
-                 file_path: str = Defaults.FILES_PATH):
-        self._connector = ApiConnector(user, password, smart_phone_id, file_path)
+                 file_path: str = Defaults.FILES_PATH, concurrent: bool = False, cache: ResponseCache = None,
+                 scheduler: PollScheduler = None, session_store: SessionStore = None, http_adapter=None,
+                 serial_number: str = None):
+        self._connector = ApiConnector(user, password, smart_phone_id, file_path, cache,
+                                       session_store=session_store, http_adapter=http_adapter)
+        self._serial_number = serial_number
+        self._concurrent = concurrent
+        self._executor = None
+        self._rbr = dict()
+        self._serial_numbers = weakref.WeakKeyDictionary()
+        self._session_refresher = None
+        self._system_digests = weakref.WeakKeyDictionary()
+        self._subscribers = dict()
+        self._subscribers_lock = threading.Lock()
+        self._scheduler = scheduler if scheduler else PollScheduler()
+        self._polled_system = None
+        self._polled_responses = dict()
+        self._poll_lock = threading.Lock()
+        self._polling_stop = threading.Event()
+        self._polling_thread = None
+
+    def get_facilities(self) -> List[Facility]:
+        """
+        Get the facilities of the account, they are requested once per session
+
+        :return: list of :class:`vr900connector.model.Facility`, the first one is the default facility
+        """
+        return Mapper.facilities(self._connector.facilities())
+
+    def get_system(self, lazy: bool = False, serial_number: str = None) -> System:
+        """
+        Get the full :class:`vr900connector.model.System`
+
+        :param lazy: if True, a :class:`vr900connector.model.LazySystem` is returned: components are mapped from the
+            responses when they are first accessed, which is cheaper when only a few values are read
+        :param serial_number: serial number of the facility, the facility of the manager if not provided
+        :return: the system
+        """
+        serial_number = serial_number if serial_number is not None else self._serial_number
+        return self._create_system(lazy, serial_number, *self._fetch_system(serial_number))
+
+    def get_systems(self, lazy: bool = False) -> Dict[str, System]:
+        """
+        Get the :class:`vr900connector.model.System` of every facility of the account. Facilities are requested
+        concurrently over the same session
+
+        :param lazy: see :func:`get_system`
+        :return: systems by serial number, in the order of :func:`get_facilities`
+        """
+        serial_numbers = [facility.serial_number for facility in self.get_facilities()]
+        executor = self._get_executor()
+        futures = [executor.submit(self._fetch_system_sequentially, serial_number) for serial_number in serial_numbers]
+        return dict((serial_number, self._create_system(lazy, serial_number, *future.result()))
+                    for serial_number, future in zip(serial_numbers, futures))
+
+    def _create_system(self, lazy: bool, serial_number: str, full_system, live_report, hvac_state, raw_rooms) \
+            -> System:
+        if lazy:
+            system = LazySystem(full_system, live_report, hvac_state, raw_rooms)
+        else:
+            system = Mapper.system(full_system, live_report, hvac_state, raw_rooms)
+        self._system_digests[system] = self._digests(Mapper.fragments(full_system, live_report, hvac_state, raw_rooms))
+        if serial_number is not None:
+            self._serial_numbers[system] = serial_number
+        return system
+
+    def refresh(self, system: System) -> SystemChanges:
+        """
+        Update a system returned by :func:`get_system` with the current state of the API. The same requests as
+        :func:`get_system` are sent, but only components whose raw data changed since the previous call are mapped
+        again: changed zones and rooms are replaced with :func:`vr900connector.model.System.set_zone` and
+        :func:`vr900connector.model.System.set_room`, other changed components are replaced on the system. Unchanged
+        components are left untouched (same objects).
 
-    def get_system(self):
-        full_system = self._connector.get(Urls.system())
-        live_report = self._connector.get(Urls.live_report())
-        hvac_state = self._connector.get(Urls.hvac())
+        If the system doesn't come from this manager, every component is considered as changed. A system returned for
+        another facility is refreshed from its own facility.
 
-        holiday_mode = Mapper.holiday_mode(full_system)
-        boiler_status = Mapper.boiler_status(hvac_state, live_report)
+        :param system: the :class:`vr900connector.model.System` to update
+        :return: a :class:`vr900connector.model.SystemChanges` describing what has been replaced
+        """
+        serial_number = self._serial_numbers.get(system, self._serial_number)
+        full_system, live_report, hvac_state, raw_rooms = self._fetch_system(serial_number)
+        return self._apply_responses(system, full_system, live_report, hvac_state, raw_rooms)
+
+    def _apply_responses(self, system: System, full_system, live_report, hvac_state, raw_rooms) -> SystemChanges:
+        new_fragments = Mapper.fragments(full_system, live_report, hvac_state, raw_rooms)
+        new_digests = self._digests(new_fragments)
+        old_digests = self._system_digests.get(system)
+        if old_digests is None:
+            old_digests = dict(zones=dict((zone.id, None) for zone in system.zones),
+                               rooms=dict((room.id, None) for room in system.rooms))
+
+        changes = SystemChanges()
+
+        old_zones, new_zones = old_digests['zones'], new_digests['zones']
+        for zone_id, digest in new_zones.items():
+            if self._changed(old_zones, zone_id, digest):
+                system.set_zone(zone_id, Mapper.zone(new_fragments['zones'][zone_id]))
+                changes.zones.append(zone_id)
+        for zone_id in old_zones.keys() - new_zones.keys():
+            system.remove_zone(zone_id)
+            changes.removed_zones.append(zone_id)
+
+        old_rooms, new_rooms = old_digests['rooms'], new_digests['rooms']
+        for room_id, digest in new_rooms.items():
+            if self._changed(old_rooms, room_id, digest):
+                system.set_room(room_id, Mapper.room(new_fragments['rooms'][room_id]))
+                changes.rooms.append(room_id)
+        for room_id in old_rooms.keys() - new_rooms.keys():
+            system.remove_room(room_id)
+            changes.removed_rooms.append(room_id)
+
+        for attribute, mapper in _ATTRIBUTE_MAPPERS.items():
+            if self._changed(old_digests, attribute, new_digests[attribute]):
+                setattr(system, attribute, mapper(full_system, live_report, hvac_state))
+                changes.attributes.append(attribute)
+
+        self._system_digests[system] = new_digests
+        LOGGER.debug("System refreshed, changes: %s", changes)
+        return changes
+
+    def subscribe(self, component_id: any, callback: Callable[[Event], None]):
+        """
+        Register a callback receiving :class:`vr900connector.model.Event` emitted by :func:`poll` for a component.
+        Component id is the id of a zone, a room, the hot water or the circulation,
+        :attr:`vr900connector.model.BoilerStatusCodeChanged.COMPONENT_ID` for boiler status events or
+        :attr:`vr900connector.model.ErrorMessageAdded.COMPONENT_ID` for new errors. Use None to receive every event.
 
-        zones = Mapper.zones(full_system)
+        Exceptions raised by callbacks are logged, they don't prevent other callbacks to be called.
+        """
+        with self._subscribers_lock:
+            self._subscribers.setdefault(component_id, list()).append(callback)
 
-        rooms = None
-        for zone in zones:
-            if zone.rbr:
-                raw_rooms = self._connector.get(Urls.rooms())
-                rooms = Mapper.rooms(raw_rooms)
+    def unsubscribe(self, component_id: any, callback: Callable[[Event], None]):
+        """
+        Remove a callback registered with :func:`subscribe`
+        """
+        with self._subscribers_lock:
+            callbacks = self._subscribers.get(component_id, list())
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def poll(self) -> List[Event]:
+        """
+        Update the system kept by the manager (see :func:`refresh`), compute events for components that changed and
+        send them to subscribers. The first poll only loads the system and doesn't emit any event.
+
+        Only resources due according to the scheduler are requested, other components are compared with the previous
+        responses, so they don't change.
+
+        :return: the events emitted
+        """
+        with self._poll_lock:
+            system = self._polled_system
+            if system is None:
+                responses = self._fetch_system()
+                self._polled_system = Mapper.system(*responses)
+                self._system_digests[self._polled_system] = self._digests(Mapper.fragments(*responses))
+                self._record_polled_responses(PollScheduler.FAMILIES, *responses)
+                return list()
+
+            due = self._scheduler.due()
+            if not due:
+                return list()
+
+            old_zones = dict((zone.id, zone) for zone in system.zones)
+            old_rooms = dict((room.id, room) for room in system.rooms)
+            old_hot_water, old_circulation = system.hot_water, system.circulation
+            old_boiler_status, old_errors = system.boiler_status, system.errors
+
+            changes = self._apply_responses(system, *self._fetch_polled_responses(due))
+
+            events = list()
+            for zone_id in changes.zones:
+                events.extend(Events.component(old_zones.get(zone_id), system.get_zone(zone_id)))
+            for room_id in changes.rooms:
+                events.extend(Events.component(old_rooms.get(room_id), system.get_room(room_id)))
+            if 'hot_water' in changes.attributes:
+                events.extend(Events.component(old_hot_water, system.hot_water))
+            if 'circulation' in changes.attributes:
+                events.extend(Events.component(old_circulation, system.circulation))
+            if 'boiler_status' in changes.attributes:
+                events.extend(Events.boiler_status(old_boiler_status, system.boiler_status))
+            if 'errors' in changes.attributes:
+                events.extend(Events.errors(old_errors, system.errors))
+
+        self._dispatch(events)
+        return events
+
+    def next_poll_delay(self) -> float:
+        """
+        Seconds before :func:`poll` has something to request
+        """
+        if self._polled_system is None:
+            return 0
+        return self._scheduler.next_delay()
+
+    def start_polling(self):
+        """
+        Call :func:`poll` in a background thread each time a family of resources is due according to the scheduler,
+        errors are logged
+        """
+        self.stop_polling()
+        self._polling_stop.clear()
+        self._polling_thread = threading.Thread(target=self._poll_forever, name='vr900-system-poller', daemon=True)
+        self._polling_thread.start()
+
+    def stop_polling(self):
+        """
+        Stop the background polling and wait for it
+        """
+        self._polling_stop.set()
+        if self._polling_thread:
+            self._polling_thread.join()
+            self._polling_thread = None
+
+    def _poll_forever(self):
+        while True:
+            try:
+                self.poll()
+                delay = self._scheduler.next_delay()
+            except Exception:
+                LOGGER.warning("Cannot poll system, will retry in %s seconds", _POLLING_RETRY_DELAY, exc_info=True)
+                delay = _POLLING_RETRY_DELAY
+            if self._polling_stop.wait(delay):
                 break
 
-        hot_water = Mapper.domestic_hot_water(full_system, live_report)
-        circulation = Mapper.circulation(full_system)
+    def _fetch_polled_responses(self, due: List[str]):
+        """
+        Request due families, rooms are requested as well when a zone controlled by rooms shows up
+        """
+        responses = self._polled_responses
+        families = list()
+
+        if PollScheduler.SYSTEM in due:
+            responses[PollScheduler.SYSTEM] = self._get(Urls.system())
+            families.append(PollScheduler.SYSTEM)
+
+        if Mapper.has_rbr_zone(responses[PollScheduler.SYSTEM]):
+            if PollScheduler.ROOMS in due or responses.get(PollScheduler.ROOMS) is None:
+                responses[PollScheduler.ROOMS] = self._get(Urls.rooms())
+                families.append(PollScheduler.ROOMS)
+        else:
+            responses[PollScheduler.ROOMS] = None
+            if PollScheduler.ROOMS in due:
+                families.append(PollScheduler.ROOMS)
+
+        for family, url in ((PollScheduler.LIVE_REPORT, Urls.live_report()), (PollScheduler.HVAC, Urls.hvac())):
+            if family in due:
+                responses[family] = self._get(url)
+                families.append(family)
+
+        for family in families:
+            self._scheduler.record(family, responses[family])
+
+        return responses[PollScheduler.SYSTEM], responses[PollScheduler.LIVE_REPORT], \
+            responses[PollScheduler.HVAC], responses[PollScheduler.ROOMS]
+
+    def _record_polled_responses(self, families: List[str], full_system, live_report, hvac_state, raw_rooms):
+        self._polled_responses = {
+            PollScheduler.SYSTEM: full_system,
+            PollScheduler.LIVE_REPORT: live_report,
+            PollScheduler.HVAC: hvac_state,
+            PollScheduler.ROOMS: raw_rooms
+        }
+        for family in families:
+            self._scheduler.record(family, self._polled_responses[family])
+
+    def _get(self, url: str, serial_number: str = None):
+        return self._connector.get(url, self._facility(serial_number))
+
+    def _facility(self, serial_number: str = None) -> str:
+        return serial_number if serial_number is not None else self._serial_number
+
+    def _put(self, url: str, payload=None, serial_number: str = None):
+        self._connector.put(url, payload, self._facility(serial_number))
+        self._boost(url, serial_number)
+
+    def _delete(self, url: str, serial_number: str = None):
+        self._connector.delete(url, self._facility(serial_number))
+        self._boost(url, serial_number)
+
+    def _boost(self, url: str, serial_number: str = None):
+        """
+        Only writes to the facility of the manager speed up polling, which follows this facility
+        """
+        if self._facility(serial_number) != self._serial_number:
+            return
+        for prefix, families in _BOOSTED_FAMILIES:
+            if url.startswith(prefix):
+                self._scheduler.boost(*families)
+                return
+
+    def _dispatch(self, events: List[Event]):
+        for event in events:
+            with self._subscribers_lock:
+                callbacks = self._subscribers.get(event.component_id, list()) + self._subscribers.get(None, list())
+            for callback in callbacks:
+                try:
+                    callback(event)
+                except Exception:
+                    LOGGER.warning("Subscriber %s failed on %s", callback, event, exc_info=True)
+
+    @classmethod
+    def _changed(cls, old_digests, key, new_digest):
+        return key not in old_digests or old_digests[key] != new_digest
+
+    @classmethod
+    def _digests(cls, fragments):
+        """
+        Digest of each fragment (of each zone and each room), kept for every system returned by the manager to find
+        changes on :func:`refresh`. Digests are much smaller than raw responses, which are not kept alive by systems
+        """
+        return dict((key, dict((component_id, cls._digest(fragment)) for component_id, fragment in value.items())
+                     if key in ('zones', 'rooms') else cls._digest(value)) for key, value in fragments.items())
 
-        outdoorTemperature = Mapper.outdoor_temp(full_system)
-        quickMode = Mapper.quick_mode(full_system)
-        errors = Mapper.errors(hvac_state)
+    @classmethod
+    def _digest(cls, fragment) -> bytes:
+        return hashlib.sha1(JsonCodec.dumps(fragment)).digest()
 
-        return System(holiday_mode, boiler_status, zones, rooms, hot_water, circulation, outdoorTemperature, quickMode,
-                      errors)
+    def _fetch_system(self, serial_number: str = None):
+        if self._concurrent:
+            return self._fetch_system_concurrently(serial_number)
+        return self._fetch_system_sequentially(serial_number)
 
-    def get_hot_water(self, hot_water: HotWater):
-        full_system = self._connector.get(Urls.hot_water(hot_water.id))
-        live_report = self._connector.get(Urls.live_report())
+    def _fetch_system_sequentially(self, serial_number: str = None):
+        full_system = self._get(Urls.system(), serial_number)
+        live_report = self._get(Urls.live_report(), serial_number)
+        hvac_state = self._get(Urls.hvac(), serial_number)
+
+        raw_rooms = None
+        if Mapper.has_rbr_zone(full_system):
+            raw_rooms = self._get(Urls.rooms(), serial_number)
+
+        return full_system, live_report, hvac_state, raw_rooms
+
+    def _fetch_system_concurrently(self, serial_number: str = None):
+        """
+        Live report and hvac state are requested in background while the system is requested in the current thread.
+        If the previous call found a zone controlled by rooms, rooms are requested speculatively at the same time,
+        otherwise they are requested as soon as the system shows a RBR zone.
+        """
+        executor = self._get_executor()
+        live_report_future = executor.submit(self._get, Urls.live_report(), serial_number)
+        hvac_state_future = executor.submit(self._get, Urls.hvac(), serial_number)
+        rbr = self._rbr.get(serial_number)
+        rooms_future = executor.submit(self._get, Urls.rooms(), serial_number) if rbr else None
+
+        full_system = self._get(Urls.system(), serial_number)
+        rbr = self._rbr[serial_number] = Mapper.has_rbr_zone(full_system)
+
+        raw_rooms = None
+        if rbr:
+            raw_rooms = rooms_future.result() if rooms_future else self._get(Urls.rooms(), serial_number)
+        elif rooms_future:
+            rooms_future.cancel()
+
+        return full_system, live_report_future.result(), hvac_state_future.result(), raw_rooms
+
+    def _get_executor(self):
+        if not self._executor:
+            self._executor = ThreadPoolExecutor(max_workers=_MAX_WORKERS)
+        return self._executor
+
+    def get_hot_water(self, hot_water: HotWater, serial_number: str = None):
+        full_system = self._get(Urls.hot_water(hot_water.id), serial_number)
+        live_report = self._get(Urls.live_report(), serial_number)
         return Mapper.domestic_hot_water_alone(full_system, hot_water.id, live_report)
 
-    def get_room(self, room: Room):
-        new_room = self._connector.get(Urls.room(room.id))
+    def get_room(self, room: Room, serial_number: str = None):
+        new_room = self._get(Urls.room(room.id), serial_number)
         return Mapper.room(new_room)
 
-    def get_zone(self, zone: Zone):
-        new_zone = self._connector.get(Urls.zone(zone.id))
+    def get_zone(self, zone: Zone, serial_number: str = None):
+        new_zone = self._get(Urls.zone(zone.id), serial_number)
         return Mapper.zone(new_zone)
 
-    def get_circulation(self, circulation: Circulation):
-        new_circulation = self._connector.get(Urls.circulation(circulation.id))
+    def get_circulation(self, circulation: Circulation, serial_number: str = None):
+        new_circulation = self._get(Urls.circulation(circulation.id), serial_number)
         return Mapper.circulation_alone(new_circulation, circulation.id)
 
-    def set_hot_water_setpoint_temperature(self, hot_water: HotWater, temperature: float):
+    def set_hot_water_setpoint_temperature(self, hot_water: HotWater, temperature: float, serial_number: str = None):
         """
         This set the target temperature for the hotwater.
 
         :param hot_water: the hot_water you want to set target temperature
         :param temperature: the temperature
+        :param serial_number: serial number of the facility, the facility of the manager if not provided
         :return: True/False whether the update occurred or not
         """
         LOGGER.info("Will try to set dhw target temperature to %s", temperature)
         if temperature and hot_water:
-            self._connector.put(Urls.hot_water_temperature_setpoint(hot_water.id),
-                                Payloads.hotwater_temperature_setpoint(self._round(temperature)))
+            self._put(Urls.hot_water_temperature_setpoint(hot_water.id),
+                      Payloads.hotwater_temperature_setpoint(self._round(temperature)), serial_number)
             return True
         else:
             LOGGER.debug("No temperature nor hot_water provided, nothing to do")
             return False
 
-    def set_hot_water_operation_mode(self, hotwater: HotWater, new_mode: HeatingMode):
+    def set_hot_water_operation_mode(self, hotwater: HotWater, new_mode: HeatingMode, serial_number: str = None):
         """
         Set new operation mode for the hot water.
 
         :param hotwater: the :class:`vr900connector.model.HotWater` representing to current hotwater component
         :param new_mode: Name of the new mode, see :mod:`vr900connector.model.HeatingMode`
+        :param serial_number: serial number of the facility, the facility of the manager if not provided
         :return: True/False whether new_mode has been set or not
         """
         LOGGER.info("Will try to set hot water mode to %s", new_mode)
@@ -100,8 +475,8 @@ class SystemManager:
             if new_mode:
                 if new_mode in HotWater.MODES:
                     LOGGER.debug("New mode is %s", new_mode)
-                    self._connector.put(Urls.hot_water_operation_mode(hotwater.id),
-                                        Payloads.hot_water_operation_mode(new_mode.name))
+                    self._put(Urls.hot_water_operation_mode(hotwater.id),
+                              Payloads.hot_water_operation_mode(new_mode.name), serial_number)
                     return True
                 else:
                     LOGGER.debug("New mode is not available for hot water %s", new_mode)
@@ -113,12 +488,13 @@ class SystemManager:
             LOGGER.debug("No hotwater provided")
             return False
 
-    def set_room_operation_mode(self, room: Room, new_mode: HeatingMode):
+    def set_room_operation_mode(self, room: Room, new_mode: HeatingMode, serial_number: str = None):
         """
         Set new operation mode for a room.
 
         :param room: the :class:`vr900connector.model.Room` representing to current room component
         :param new_mode:
+        :param serial_number: serial number of the facility, the facility of the manager if not provided
         :return: True/False whether new_mode has been set or not
         """
 
@@ -126,7 +502,8 @@ class SystemManager:
             if new_mode:
                 if new_mode in Room.MODES and new_mode != HeatingMode.QUICK_VETO:
                     LOGGER.debug("New mode is %s", new_mode)
-                    self._connector.put(Urls.room_operation_mode(room.id), Payloads.room_operation_mode(new_mode.name))
+                    self._put(Urls.room_operation_mode(room.id), Payloads.room_operation_mode(new_mode.name),
+                              serial_number)
                     return True
                 else:
                     LOGGER.debug("New mode is not available for room %s", new_mode)
@@ -138,12 +515,13 @@ class SystemManager:
             LOGGER.debug("No room provided")
             return False
 
-    def set_zone_operation_mode(self, zone: Zone, new_mode: HeatingMode):
+    def set_zone_operation_mode(self, zone: Zone, new_mode: HeatingMode, serial_number: str = None):
         """
         Set new operation mode for a zone.
 
         :param zone: the :class:`vr900connector.model.Zone` representing to current zone component
         :param new_mode:
+        :param serial_number: serial number of the facility, the facility of the manager if not provided
         :return: True/False whether new_mode has been set or not
         """
 
@@ -151,7 +529,8 @@ class SystemManager:
             if new_mode:
                 if new_mode in Zone.MODES and new_mode != HeatingMode.QUICK_VETO:
                     LOGGER.debug("New mode is %s", new_mode)
-                    self._connector.put(Urls.zone_heating_mode(zone.id), Payloads.zone_operation_mode(new_mode.name))
+                    self._put(Urls.zone_heating_mode(zone.id), Payloads.zone_operation_mode(new_mode.name),
+                              serial_number)
                     return True
                 else:
                     LOGGER.debug("New mode is not available for zone %s", new_mode)
@@ -163,7 +542,7 @@ class SystemManager:
             LOGGER.debug("No zone provided")
             return False
 
-    def set_quick_mode(self, current_quick_mode: QuickMode, new_quick_mode: QuickMode):
+    def set_quick_mode(self, current_quick_mode: QuickMode, new_quick_mode: QuickMode, serial_number: str = None):
         """
         Set quick mode system wise
         :return: True/False whether new_mode has been set or not
@@ -171,7 +550,7 @@ class SystemManager:
 
         if not current_quick_mode:
             if new_quick_mode:
-                self._connector.put(Urls.system_quickmode(), Payloads.quickmode(new_quick_mode.name))
+                self._put(Urls.system_quickmode(), Payloads.quickmode(new_quick_mode.name), serial_number)
                 return True
             else:
                 LOGGER.debug("No new quick mode provided")
@@ -180,122 +559,161 @@ class SystemManager:
             LOGGER.debug("There is already a quick mode in place: %s", current_quick_mode.name)
             return False
 
-    def set_room_quick_veto(self, room: Room, quick_veto: QuickVeto):
+    def set_room_quick_veto(self, room: Room, quick_veto: QuickVeto, serial_number: str = None):
         if quick_veto and room:
-            self._connector.put(Urls.room_quick_veto(room.id),
-                                Payloads.room_quick_veto(quick_veto.target_temperature, quick_veto.remaining_time))
+            self._put(Urls.room_quick_veto(room.id),
+                      Payloads.room_quick_veto(quick_veto.target_temperature, quick_veto.remaining_time),
+                      serial_number)
             return True
         else:
             LOGGER.debug("Quick veto %s or room %s not provided", quick_veto, room)
             return False
 
-    def remove_room_quick_veto(self, room: Room):
-        self._connector.delete(Urls.room_quick_veto(room.id))
+    def remove_room_quick_veto(self, room: Room, serial_number: str = None):
+        self._delete(Urls.room_quick_veto(room.id), serial_number)
         return True
 
-    def set_zone_quick_veto(self, zone: Zone, quick_veto: QuickVeto):
+    def set_zone_quick_veto(self, zone: Zone, quick_veto: QuickVeto, serial_number: str = None):
         if quick_veto and zone:
-            self._connector.put(Urls.zone_quick_veto(zone.id),
-                                Payloads.zone_quick_veto(quick_veto.target_temperature))
+            self._put(Urls.zone_quick_veto(zone.id),
+                      Payloads.zone_quick_veto(quick_veto.target_temperature), serial_number)
             return True
         else:
             LOGGER.debug("Quick veto %s or zone %s not provided", quick_veto, zone)
             return False
 
-    def remove_zone_quick_veto(self, zone: Zone):
-        self._connector.delete(Urls.zone_quick_veto(zone.id))
+    def remove_zone_quick_veto(self, zone: Zone, serial_number: str = None):
+        self._delete(Urls.zone_quick_veto(zone.id), serial_number)
         return True
 
-    def set_room_setpoint_temperature(self, room: Room, temperature: float):
+    def set_room_setpoint_temperature(self, room: Room, temperature: float, serial_number: str = None):
         """
         This set the target temperature for a room.
 
         :param room: the room you want to set target temperature
         :param temperature: the temperature
+        :param serial_number: serial number of the facility, the facility of the manager if not provided
         :return: True/False whether the update occurred or not
         """
         LOGGER.info("Will try to set room target temperature to %s", temperature)
         if temperature and room:
-            self._connector.put(Urls.room_set_temperature_setpoint(room.id),
-                                Payloads.room_temperature_setpoint(self._round(temperature)))
+            self._put(Urls.room_set_temperature_setpoint(room.id),
+                      Payloads.room_temperature_setpoint(self._round(temperature)), serial_number)
             return True
         else:
             LOGGER.debug("No temperature nor room provided, nothing to do")
             return False
 
-    def set_zone_setpoint_temperature(self, zone: Zone, temperature: float):
+    def set_zone_setpoint_temperature(self, zone: Zone, temperature: float, serial_number: str = None):
         """
         This set the target temperature for a zone.
 
         :param zone: the zone you want to set target temperature
         :param temperature: the temperature
+        :param serial_number: serial number of the facility, the facility of the manager if not provided
         :return: True/False whether the update occurred or not
         """
         LOGGER.info("Will try to set zone target temperature to %s", temperature)
         if temperature and zone:
-            self._connector.put(Urls.zone_heating_setpoint_temperature(zone.id),
-                                Payloads.zone_temperature_setpoint(self._round(temperature)))
+            self._put(Urls.zone_heating_setpoint_temperature(zone.id),
+                      Payloads.zone_temperature_setpoint(self._round(temperature)), serial_number)
             return True
         else:
             LOGGER.debug("No temperature nor zone provided, nothing to do")
             return False
 
-    def set_zone_setback_temperature(self, zone: Zone, temperature: float):
+    def set_zone_setback_temperature(self, zone: Zone, temperature: float, serial_number: str = None):
         """
         This set the setback temperature for a zone.
 
         :param zone: the zone you want to set setback temperature
         :param temperature: the temperature
+        :param serial_number: serial number of the facility, the facility of the manager if not provided
         :return: True/False whether the update occurred or not
         """
         LOGGER.info("Will try to set zone setback temperature to %s", temperature)
         if temperature and zone:
-            self._connector.put(Urls.zone_heating_setback_temperature(zone.id),
-                                Payloads.zone_temperature_setback(self._round(temperature)))
+            self._put(Urls.zone_heating_setback_temperature(zone.id),
+                      Payloads.zone_temperature_setback(self._round(temperature)), serial_number)
             return True
         else:
             LOGGER.debug("No temperature nor zone provided, nothing to do")
             return False
 
-    def set_holiday_mode(self, start_date: date, end_date: date, temperature: float):
+    def set_holiday_mode(self, start_date: date, end_date: date, temperature: float, serial_number: str = None):
         """
         Set the holiday mode
 
         :param start_date: starting date of the holiday mode
         :param end_date: ending date of the holiday mode
         :param temperature: minimal temperature
+        :param serial_number: serial number of the facility, the facility of the manager if not provided
         :return: True if update occurred
         """
-        self._connector.put(Urls.system_holiday_mode(), Payloads.holiday_mode(True, start_date, end_date, temperature))
+        self._put(Urls.system_holiday_mode(), Payloads.holiday_mode(True, start_date, end_date, temperature),
+                  serial_number)
         return True
 
-    def remove_holiday_mode(self, temperature: float = Constants.FROST_PROTECTION_TEMP):
+    def remove_holiday_mode(self, temperature: float = Constants.FROST_PROTECTION_TEMP, serial_number: str = None):
         """
         Remove holiday mode. Set start date to two days before and end date to yesterday
 
         :param temperature: default is :class:`vr900connector.model.Constants#FROST_PROTECTION_TEMP`
+        :param serial_number: serial number of the facility, the facility of the manager if not provided
         :return: True if update occurred
         """
-        self._connector.put(Urls.system_holiday_mode(), Payloads.holiday_mode(False,
-                                                                              date.today() - timedelta(days=2),
-                                                                              date.today() - timedelta(days=1),
-                                                                              temperature))
+        self._put(Urls.system_holiday_mode(), Payloads.holiday_mode(False,
+                                                                    date.today() - timedelta(days=2),
+                                                                    date.today() - timedelta(days=1),
+                                                                    temperature), serial_number)
         return True
 
-    def request_hvac_update(self):
+    def request_hvac_update(self, serial_number: str = None):
         """
         Request an hvac update. Please note the update is done asynchronously. Most of the time, it takes about 1 or 2
         minutes before you can see the new status in :class:`vr900connector.model.BoilerStatus`
+        :param serial_number: serial number of the facility, the facility of the manager if not provided
         :return: True if the update request was accepted by the API
         """
-        self._connector.put(Urls.hvac_update())
+        self._put(Urls.hvac_update(), serial_number=serial_number)
         return True
 
+    def start_session_refresher(self, keep_alive_interval: float = Defaults.KEEP_ALIVE_INTERVAL,
+                                refresh_margin: float = Defaults.SESSION_REFRESH_MARGIN):
+        """
+        Keep the session alive in background, see :class:`vr900connector.api.SessionRefresher`
+        """
+        self.stop_session_refresher()
+        self._session_refresher = SessionRefresher(self._connector, keep_alive_interval, refresh_margin)
+        self._session_refresher.start()
+
+    def stop_session_refresher(self):
+        """
+        Stop keeping the session alive in background
+        """
+        if self._session_refresher:
+            self._session_refresher.stop()
+            self._session_refresher = None
+
     def logout(self):
         """
-        Get logged out from the API
+        Get logged out from the API, the session refresher and the polling (if any) are stopped and the worker threads
+        are shut down
         """
+        self.stop_polling()
+        self.stop_session_refresher()
         self._connector.logout()
+        self.close()
+
+    def close(self):
+        """
+        Stop the polling (if any) and shut down the worker threads used for concurrent requests, without logging out.
+        The manager can still be used afterwards, worker threads are started again when needed
+        """
+        self.stop_polling()
+        executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown()
 
     def _round(self, number: float):
         """
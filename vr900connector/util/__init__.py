@@ -1 +1,5 @@
-from .fileutils import FileUtils
+from .lazyimport import LazyImport
+
+LazyImport.install(globals(), [
+    ('JsonCodec', 'jsoncodec')
+])
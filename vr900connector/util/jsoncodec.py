@@ -0,0 +1,103 @@
+import json
+import logging
+
+_LOGGER = logging.getLogger('JsonCodec')
+
+
+def _stdlib_backend():
+    def dumps(data):
+        return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+    return json.loads, dumps
+
+
+def _orjson_backend():
+    import orjson
+    return orjson.loads, orjson.dumps
+
+
+def _ujson_backend():
+    import ujson
+
+    def dumps(data):
+        return ujson.dumps(data, ensure_ascii=False).encode('utf-8')
+
+    return ujson.loads, dumps
+
+
+class JsonCodec:
+    """
+    Decode API responses and encode payloads. The fastest installed backend is used: `orjson`_, then `ujson`_, then
+    the :mod:`json` module of the standard library. Install the ``fastjson`` extra to get one, e.g.
+    ``pip install vr900-connector[fastjson]``.
+
+    .. _orjson: https://github.com/ijl/orjson
+    .. _ujson: https://github.com/ultrajson/ultrajson
+    """
+
+    BACKENDS = ['orjson', 'ujson', 'json']
+    """
+    Available backends, by order of preference
+    """
+
+    _FACTORIES = {
+        'orjson': _orjson_backend,
+        'ujson': _ujson_backend,
+        'json': _stdlib_backend
+    }
+
+    _name = None
+    _loads = None
+    _dumps = None
+
+    @classmethod
+    def loads(cls, data):
+        """
+        Decode a JSON document
+
+        Args:
+            data: JSON document as :class:`bytes` or :class:`str`
+        """
+        return cls._loads(data)
+
+    @classmethod
+    def dumps(cls, data) -> bytes:
+        """
+        Encode data to a compact UTF-8 JSON document
+        """
+        return cls._dumps(data)
+
+    @classmethod
+    def backend(cls) -> str:
+        """
+        Name of the backend in use
+        """
+        return cls._name
+
+    @classmethod
+    def use(cls, name: str = None):
+        """
+        Switch to another backend
+
+        Args:
+            name: One of :attr:`BACKENDS`, if not provided, the fastest installed backend is used
+
+        Raises:
+            ValueError: if the backend is unknown or not installed
+        """
+        names = [name] if name else cls.BACKENDS
+        for backend in names:
+            factory = cls._FACTORIES.get(backend)
+            if factory is None:
+                raise ValueError('Unknown JSON backend: {}'.format(backend))
+            try:
+                cls._loads, cls._dumps = factory()
+                cls._name = backend
+                _LOGGER.debug('Using %s to encode and decode JSON', backend)
+                return
+            except ImportError:
+                if name:
+                    raise ValueError('JSON backend {} is not installed'.format(backend))
+
+
+JsonCodec.use()
@@ -0,0 +1,45 @@
+import importlib
+import sys
+from typing import List, Tuple
+
+
+class LazyImport:
+    """
+    Load the attributes exported by a package from their module on first access (PEP 562), so importing a package
+    only imports what is actually used. Before python 3.7, module ``__getattr__`` is not supported and modules are
+    imported eagerly, in the given order.
+    """
+
+    @classmethod
+    def install(cls, module_globals: dict, attributes: List[Tuple[str, str]], eager: bool = True):
+        """
+        Args:
+            module_globals: ``globals()`` of the package
+            attributes: (attribute, module) exported by the package, modules are relative to the package and listed
+            in the order they can be imported eagerly
+            eager: Whether to import the attributes eagerly before python 3.7, if False, they are not exported
+        """
+        package = module_globals['__name__']
+        modules = dict(attributes)
+
+        if sys.version_info < (3, 7):
+            if eager:
+                for name, module_name in attributes:
+                    module_globals[name] = getattr(importlib.import_module('.' + module_name, package), name)
+                module_globals['__all__'] = [name for name, _ in attributes]
+            return
+
+        def __getattr__(name):
+            module_name = modules.get(name)
+            if module_name is None:
+                raise AttributeError('module {!r} has no attribute {!r}'.format(package, name))
+            value = getattr(importlib.import_module('.' + module_name, package), name)
+            module_globals[name] = value
+            return value
+
+        def __dir__():
+            return sorted(set(module_globals) | set(modules))
+
+        module_globals['__getattr__'] = __getattr__
+        module_globals['__dir__'] = __dir__
+        module_globals['__all__'] = [name for name, _ in attributes]